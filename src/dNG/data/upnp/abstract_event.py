@@ -30,15 +30,15 @@ https://www.direct-netware.de/redirect?licenses;gpl
 #echo(__FILEPATH__)#
 """
 
-from threading import Thread
-
+from dNG.net.upnp.event_dispatcher import EventDispatcher
 from dNG.runtime.exception_log_trap import ExceptionLogTrap
 from dNG.runtime.not_implemented_exception import NotImplementedException
 from dNG.runtime.value_exception import ValueException
 
-class AbstractEvent(Thread):
+class AbstractEvent(object):
     """
 The abstract event class for scheduled delivery by the UPnP control point.
+Events are delivered by the worker threads of the "EventDispatcher".
 
 :author:     direct Netware Group et al.
 :copyright:  direct Netware Group - All rights reserved
@@ -58,8 +58,6 @@ Constructor __init__(AbstractEvent)
 :since: v0.2.00
         """
 
-        Thread.__init__(self, target = self._send)
-
         self.control_point = None
         """
 The UPnP ControlPoint scheduling the event delivery.
@@ -84,7 +82,7 @@ Activates all relevant multicast listeners based on the IP address given.
         """
 
         if (wait_timeout > 0): self.schedule(wait_timeout)
-        else: self.start()
+        else: EventDispatcher.get_instance().deliver(self)
     #
 
     def get_usn(self):
@@ -100,13 +98,14 @@ Returns the UPnP USN value.
 
     def run(self):
         """
-python.org: Method representing the thread's activity.
+Delivers the event. It is called by a worker thread of the
+"EventDispatcher".
 
 :since: v0.2.00
         """
 
         with ExceptionLogTrap("pas_upnp"):
-            Thread.run(self)
+            self._send()
         #
     #
 
@@ -119,14 +118,8 @@ Activates all relevant multicast listeners based on the IP address given.
 :since: v0.2.00
         """
 
-        # pylint: disable=star-args
-
         if (self.control_point is None): raise ValueException("UPnP control point needs to be defined to schedule event delivery")
-
-        event_data = { "event": self }
-        if (self.usn is not None): event_data['usn'] = self.usn
-
-        self.control_point._add_task(wait_timeout, "deliver_event", **event_data)
+        EventDispatcher.get_instance().schedule(self, wait_timeout)
     #
 
     def _send(self):
@@ -30,14 +30,15 @@ https://www.direct-netware.de/redirect?licenses;gpl
 #echo(__FILEPATH__)#
 """
 
-from random import randint
 from time import time
 
 from dNG.data.rfc.basics import Basics as RfcBasics
 from dNG.data.settings import Settings
 from dNG.data.upnp.device import Device
+from dNG.net.upnp.announcement_planner import AnnouncementPlanner
 from dNG.net.upnp.ssdp_message import SsdpMessage
 from dNG.net.upnp.ssdp_response import SsdpResponse
+from dNG.runtime.thread_lock import ThreadLock
 from dNG.runtime.value_exception import ValueException
 
 from .abstract_event import AbstractEvent
@@ -81,6 +82,15 @@ UPnP device update announcement
 Search result announcement
     """
 
+    _notify_datagrams = { }
+    """
+Dict of USNs with cached NOTIFY messages per target and NTS value
+    """
+    _notify_datagrams_lock = ThreadLock()
+    """
+Thread safety lock for cached NOTIFY messages
+    """
+
     def __init__(self, _type, control_point = None):
         """
 Constructor __init__(ControlPointEvent)
@@ -93,10 +103,6 @@ Constructor __init__(ControlPointEvent)
 
         AbstractEvent.__init__(self, _type)
 
-        self.announcement_divider = None
-        """
-Divider for the announcements interval to set how many announcements will be within the interval
-        """
         self.announcement_interval = None
         """
 Announcement interval
@@ -128,7 +134,6 @@ UPnP USN
 
         Settings.read_file("{0}/settings/pas_upnp.json".format(Settings.get("path_data")))
 
-        self.announcement_divider = int(Settings.get("pas_upnp_announcement_divider", 3))
         self.announcement_interval = int(Settings.get("pas_upnp_announcement_interval", 3600))
         self.control_point = control_point
     #
@@ -140,142 +145,31 @@ Send event.
 :since: v0.2.00
         """
 
-        bootid = self.control_point.get_bootid()
-        configid = (self.control_point.get_configid() if (self.configid is None) else self.configid)
-
-        identifier = Device.get_identifier(self.usn, bootid, configid)
-
-        targets = [ ]
-        if (self.control_point.is_listening_ipv4()): targets.append("239.255.255.250")
-        if (self.control_point.is_listening_ipv6()): targets += [ "[ff02::c]", "[ff04::c]", "[ff05::c]", "[ff08::c]", "[ff0e::c]" ]
-
         if (self.type == ControlPointEvent.TYPE_DEVICE_SHUTDOWN):
-            device = self.control_point.get_device(identifier)
-
-            services = ([ ] if (device is None) else device.get_unique_service_type_ids())
-
-            for target in targets:
-                ssdp_request = SsdpMessage(target)
-
-                for service_id in services:
-                    service = device.get_service(service_id)
-
-                    ssdp_request.reset_headers()
-                    ssdp_request.set_header("NTS", "ssdp:byebye")
-                    ssdp_request.set_header("NT", "urn:{0}".format(service.get_urn()))
-                    ssdp_request.set_header("USN", service.get_usn())
-                    ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                    ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                    ssdp_request.send_notify()
-                #
-
-                ssdp_request.reset_headers()
-                ssdp_request.set_header("NTS", "ssdp:byebye")
-                ssdp_request.set_header("NT", "urn:{0}".format(identifier['urn']))
-                ssdp_request.set_header("USN", self.usn)
-                ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                ssdp_request.send_notify()
-
-                if (identifier['class'] == "device"):
-                    ssdp_request.reset_headers()
-                    ssdp_request.set_header("NTS", "ssdp:byebye")
-                    ssdp_request.set_header("NT", "uuid:{0}".format(identifier['uuid']))
-                    ssdp_request.set_header("USN", "uuid:{0}".format(identifier['uuid']))
-                    ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                    ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                    ssdp_request.send_notify()
-                #
-
-                if (self.control_point.is_rootdevice_known(device = identifier['device'])):
-                    ssdp_request.reset_headers()
-                    ssdp_request.set_header("NTS", "ssdp:byebye")
-                    ssdp_request.set_header("NT", "upnp:rootdevice")
-                    ssdp_request.set_header("USN", "uuid:{0}::upnp:rootdevice".format(identifier['uuid']))
-                    ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                    ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                    ssdp_request.send_notify()
-                #
-            #
+            self.send_notify(self.get_notify_targets(), "ssdp:byebye")
+            ControlPointEvent._remove_notify_datagrams(self.usn)
         elif (self.type in ( ControlPointEvent.TYPE_DEVICE_ALIVE,
                              ControlPointEvent.TYPE_DEVICE_REANNOUNCE_ALIVE,
                              ControlPointEvent.TYPE_DEVICE_CONFIG_CHANGED,
                              ControlPointEvent.TYPE_DEVICE_UPDATE
                            )
              ):
-            if (self.location is None): raise ValueException("UPnP location value is required for ssdp:alive")
-
-            device = self.control_point.get_device(identifier)
-            if (device is None or (not device.is_managed())): raise ValueException("UPnP device is invalid")
-
-            nts = ("ssdp:update" if (self.type == ControlPointEvent.TYPE_DEVICE_UPDATE) else "ssdp:alive")
-            services = device.get_unique_service_type_ids()
-
-            for target in targets:
-                ssdp_request = SsdpMessage(target)
-
-                if (self.control_point.is_rootdevice_known(device = identifier['device'])):
-                    ssdp_request.reset_headers()
-                    ssdp_request.set_header("Cache-Control", "max-age={0:d}".format(self.announcement_interval))
-                    ssdp_request.set_header("NTS", nts)
-                    ssdp_request.set_header("NT", "upnp:rootdevice")
-                    ssdp_request.set_header("USN", "uuid:{0}::upnp:rootdevice".format(identifier['uuid']))
-                    ssdp_request.set_header("LOCATION", self.location)
-                    ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                    ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                    ssdp_request.send_notify()
-                #
-
-                if (identifier['class'] == "device"):
-                    ssdp_request.reset_headers()
-                    ssdp_request.set_header("Cache-Control", "max-age={0:d}".format(self.announcement_interval))
-                    ssdp_request.set_header("NTS", nts)
-                    ssdp_request.set_header("NT", "uuid:{0}".format(identifier['uuid']))
-                    ssdp_request.set_header("USN", "uuid:{0}".format(identifier['uuid']))
-                    ssdp_request.set_header("LOCATION", self.location)
-                    ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                    ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                    ssdp_request.send_notify()
-                #
-
-                ssdp_request.reset_headers()
-                ssdp_request.set_header("Cache-Control", "max-age={0:d}".format(self.announcement_interval))
-                ssdp_request.set_header("NTS", nts)
-                ssdp_request.set_header("NT", "urn:{0}".format(identifier['urn']))
-                ssdp_request.set_header("USN", self.usn)
-                ssdp_request.set_header("LOCATION", self.location)
-                ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                ssdp_request.send_notify()
-
-                for service_id in services:
-                    service = device.get_service(service_id)
-
-                    ssdp_request.reset_headers()
-                    ssdp_request.set_header("Cache-Control", "max-age={0:d}".format(self.announcement_interval))
-                    ssdp_request.set_header("NTS", nts)
-                    ssdp_request.set_header("NT", "urn:{0}".format(service.get_urn()))
-                    ssdp_request.set_header("USN", service.get_usn())
-                    ssdp_request.set_header("LOCATION", self.location)
-                    ssdp_request.set_header("BOOTID.UPNP.ORG", bootid)
-                    ssdp_request.set_header("CONFIGID.UPNP.ORG", configid)
-                    ssdp_request.send_notify()
-                #
-            #
-
-            event = ControlPointEvent(ControlPointEvent.TYPE_DEVICE_REANNOUNCE_ALIVE, control_point = self.control_point)
-            if (self.configid is not None): event.set_configid(self.configid)
-            event.set_usn(self.usn)
-            event.set_location(self.location)
-
-            if (self.type == ControlPointEvent.TYPE_DEVICE_ALIVE): event.schedule(0.3)
-            else:
-                announcement_divider = (self.announcement_divider if (self.announcement_divider > 0) else 1)
-
-                wait_seconds = randint(int(self.announcement_interval / (2 * announcement_divider)), int(self.announcement_interval / announcement_divider))
-                event.schedule(wait_seconds)
-            #
+            self.send_notify(self.get_notify_targets(),
+                             ("ssdp:update" if (self.type == ControlPointEvent.TYPE_DEVICE_UPDATE) else "ssdp:alive")
+                            )
+
+            if (self.type == ControlPointEvent.TYPE_DEVICE_ALIVE):
+                # Repeat the initial announcement before handing it over to the planner
+                event = ControlPointEvent(ControlPointEvent.TYPE_DEVICE_REANNOUNCE_ALIVE, control_point = self.control_point)
+                if (self.configid is not None): event.set_configid(self.configid)
+                event.set_usn(self.usn)
+                event.set_location(self.location)
+                event.schedule(0.3)
+            else: AnnouncementPlanner.get_instance().add(self)
         elif (self.type == ControlPointEvent.TYPE_SEARCH_RESULT):
+            bootid = self.control_point.get_bootid()
+            configid = (self.control_point.get_configid() if (self.configid is None) else self.configid)
+
             if (self.location is None): raise ValueException("UPnP location value is required for M-SEARCH responses")
             if (self.search_target is None): raise ValueException("M-SEARCH ST value is invalid")
             if (self.target_host is None or self.target_port is None): raise ValueException("UPnP M-SEARCH response recipient address is invalid")
@@ -294,6 +188,96 @@ Send event.
         #
     #
 
+    def _get_notify_datagrams(self, ssdp_request, target, nts, identifier, device, is_rootdevice):
+        """
+Returns the encoded NOTIFY messages for the given target and NTS value.
+Messages are cached per USN until the UPnP bootId, configId or location
+URL changes.
+
+:param ssdp_request: SSDP message instance for the target
+:param target: Multicast target
+:param nts: NTS value
+:param identifier: Parsed UPnP identifier including bootId and configId
+:param device: UPnP device; None if unknown
+:param is_rootdevice: True if the UPnP device is a known root device
+
+:return: (list) List of encoded SSDP messages
+:since:  v0.2.00
+        """
+
+        cache_key = ( target, nts )
+        validator = ( identifier['bootid'], identifier['configid'], self.location, self.announcement_interval, is_rootdevice, (device is None) )
+
+        with ControlPointEvent._notify_datagrams_lock:
+            cached_entry = ControlPointEvent._notify_datagrams.get(self.usn, { }).get(cache_key)
+        #
+
+        if (cached_entry is not None and cached_entry[0] == validator): _return = cached_entry[1]
+        else:
+            _return = [ ]
+            device_headers_list = [ ]
+
+            if (is_rootdevice): device_headers_list.append({ "NT": "upnp:rootdevice", "USN": "uuid:{0}::upnp:rootdevice".format(identifier['uuid']) })
+
+            if (identifier['class'] == "device"):
+                device_headers_list.append({ "NT": "uuid:{0}".format(identifier['uuid']), "USN": "uuid:{0}".format(identifier['uuid']) })
+            #
+
+            device_headers_list.append({ "NT": "urn:{0}".format(identifier['urn']), "USN": self.usn })
+
+            service_headers_list = [ ]
+
+            if (device is not None):
+                for service_id in device.get_unique_service_type_ids():
+                    service = device.get_service(service_id)
+                    service_headers_list.append({ "NT": "urn:{0}".format(service.get_urn()), "USN": service.get_usn() })
+                #
+            #
+
+            # ssdp:byebye messages are sent for services first and for the root device last
+            headers_list = (service_headers_list + device_headers_list[::-1]
+                            if (nts == "ssdp:byebye") else
+                            device_headers_list + service_headers_list
+                           )
+
+            for headers in headers_list:
+                ssdp_request.reset_headers()
+                if (nts != "ssdp:byebye"): ssdp_request.set_header("Cache-Control", "max-age={0:d}".format(self.announcement_interval))
+                ssdp_request.set_header("NTS", nts)
+                ssdp_request.set_header("NT", headers['NT'])
+                ssdp_request.set_header("USN", headers['USN'])
+                if (nts != "ssdp:byebye"): ssdp_request.set_header("LOCATION", self.location)
+                ssdp_request.set_header("BOOTID.UPNP.ORG", identifier['bootid'])
+                ssdp_request.set_header("CONFIGID.UPNP.ORG", identifier['configid'])
+
+                _return.append(ssdp_request.get_notify_data())
+            #
+
+            with ControlPointEvent._notify_datagrams_lock:
+                if (self.usn not in ControlPointEvent._notify_datagrams): ControlPointEvent._notify_datagrams[self.usn] = { }
+                ControlPointEvent._notify_datagrams[self.usn][cache_key] = ( validator, _return )
+            #
+        #
+
+        return _return
+    #
+
+    def get_notify_targets(self):
+        """
+Returns the multicast targets of the interfaces the ControlPoint listens on.
+
+:return: (list) List of multicast targets
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        if (self.control_point.is_listening_ipv4()): _return.append("239.255.255.250")
+        if (self.control_point.is_listening_ipv6()): _return += [ "[ff02::c]", "[ff04::c]", "[ff05::c]", "[ff08::c]", "[ff0e::c]" ]
+
+        return _return
+    #
+
     def schedule(self, wait_timeout = 0):
         """
 Activates all relevant multicast listeners based on the IP address given.
@@ -326,6 +310,38 @@ Activates all relevant multicast listeners based on the IP address given.
         AbstractEvent.schedule(self, wait_timeout)
     #
 
+    def send_notify(self, targets, nts = "ssdp:alive"):
+        """
+Sends the NOTIFY messages of the USN to the given multicast targets.
+
+:param targets: List of multicast targets
+:param nts: NTS value
+
+:since: v0.2.00
+        """
+
+        bootid = self.control_point.get_bootid()
+        configid = (self.control_point.get_configid() if (self.configid is None) else self.configid)
+
+        identifier = Device.get_identifier(self.usn, bootid, configid)
+        device = self.control_point.get_device(identifier)
+
+        if (nts != "ssdp:byebye"):
+            if (self.location is None): raise ValueException("UPnP location value is required for ssdp:alive")
+            if (device is None or (not device.is_managed())): raise ValueException("UPnP device is invalid")
+        #
+
+        is_rootdevice = self.control_point.is_rootdevice_known(device = identifier['device'])
+
+        for target in targets:
+            ssdp_request = SsdpMessage(target)
+
+            for data in self._get_notify_datagrams(ssdp_request, target, nts, identifier, device, is_rootdevice):
+                ssdp_request.send_data(data)
+            #
+        #
+    #
+
     def set_configid(self, configid):
         """
 Sets the UPnP configId value.
@@ -376,6 +392,19 @@ Sets the M-SEARCH response target host and port.
         self.target_port = port
     #
 
+    @staticmethod
+    def _remove_notify_datagrams(usn):
+        """
+Removes all cached NOTIFY messages of the given USN.
+
+:param usn: UPnP USN
+
+:since: v0.2.00
+        """
+
+        with ControlPointEvent._notify_datagrams_lock: ControlPointEvent._notify_datagrams.pop(usn, None)
+    #
+
     def set_search_target(self, _value):
         """
 Sets the M-SEARCH ST value.
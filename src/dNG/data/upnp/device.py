@@ -34,6 +34,7 @@ from dNG.data.logging.log_line import LogLine
 from dNG.data.xml_resource import XmlResource
 from dNG.module.named_loader import NamedLoader
 from dNG.runtime.io_exception import IOException
+from dNG.runtime.thread_lock import ThreadLock
 from dNG.runtime.value_exception import ValueException
 
 from .identifier_mixin import IdentifierMixin
@@ -114,6 +115,10 @@ UPnP presentationURL value
         self.services = { }
         """
 UPnP services
+        """
+        self.services_lock = ThreadLock()
+        """
+Thread safety lock for lazily initialized services
         """
         self.url_base = None
         """
@@ -324,9 +329,12 @@ Returns a UPnP service for the given UPnP service ID.
         if (_id in self.services):
             _return = self.services[_id]
 
-            if (not _return.is_initialized()):
-                if (not _return.init_scpd()): raise IOException("Failed to initialize service {0}".format(_return.get_service_id_urn()))
-                if (_return.is_managed()): _return.set_configid(self.configid)
+            # Devices are shared between threads and the SCPD is parsed in place
+            with self.services_lock:
+                if (not _return.is_initialized()):
+                    if (not _return.init_scpd()): raise IOException("Failed to initialize service {0}".format(_return.get_service_id_urn()))
+                    if (_return.is_managed()): _return.set_configid(self.configid)
+                #
             #
         #
 
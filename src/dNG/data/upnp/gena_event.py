@@ -30,8 +30,6 @@ https://www.direct-netware.de/redirect?licenses;gpl
 #echo(__FILEPATH__)#
 """
 
-from dNG.data.xml_resource import XmlResource
-from dNG.net.http.client import Client
 from dNG.net.upnp.control_point import ControlPoint
 from dNG.net.upnp.gena import Gena
 from dNG.runtime.value_exception import ValueException
@@ -123,6 +121,17 @@ Returns the moderated event interval as specified by the formal specification.
         return self.moderated_interval
     #
 
+    def get_variables(self):
+        """
+Returns the upnp:propchange variables.
+
+:return: (dict) Dictionary of UPnP state variables changed
+:since:  v0.2.00
+        """
+
+        return self.variables
+    #
+
     def _get_subscribers(self):
         """
 Returns a dictionary of subscribers interested in this event.
@@ -149,8 +158,6 @@ Send event.
 :since: v0.2.00
         """
 
-        # pylint: disable=protected-access
-
         if (self.usn is None): raise ValueException("UPnP USN is required for GENA events")
 
         subscribers = self._get_subscribers()
@@ -158,49 +165,7 @@ Send event.
         if (self.type == GenaEvent.TYPE_PROPCHANGE):
             if (not isinstance(self.variables, dict)): raise ValueException("upnp:propchange requires a dictionary of variables changed")
 
-            xml_resource = XmlResource()
-            xml_resource.set_cdata_encoding(False)
-
-            xml_resource.add_node("e:propertyset", attributes = { "xmlns:e": "urn:schemas-upnp-org:event-1-0" })
-
-            xml_base_path = "e:propertyset e:property"
-            xml_resource.add_node(xml_base_path)
-            xml_resource.set_cached_node(xml_base_path)
-
-            for key in self.variables: xml_resource.add_node("{0} {1}".format(xml_base_path, key), self.variables[key])
-
-            xml_data = "<?xml version='1.0' encoding='UTF-8' ?>{0}".format(xml_resource.export_cache(True))
-
-            for subscriber_sid in subscribers:
-                seq = self.gena._approve_seq_for_event(self, subscriber_sid)
-                if (seq is not None): self._send_propchange(subscriber_sid, subscribers[subscriber_sid], seq, xml_data)
-            #
-        #
-    #
-
-    def _send_propchange(self, subscriber_sid, subscriber, seq, xml_data):
-        """
-Sends the upnp:propchange event to the given subscriber.
-
-:param subscriber_sid: UPnP SID
-:param subscriber: Dictionary with subscription information
-:param seq: GENA notification sequence number for the event
-:param xml_data: XML encoded e:propertyset
-
-:since: v0.2.00
-        """
-
-        for callback_url in subscriber['callback_urls']:
-            client = Client(callback_url, 2)
-            client.set_header("Content-Type", "text/xml; charset=UTF-8")
-            client.set_header("USN", self.usn)
-            client.set_header("SID", subscriber_sid)
-            client.set_header("NT", "upnp:event")
-            client.set_header("NTS", "upnp:propchange")
-            client.set_header("SEQ", seq)
-
-            response = client.request("NOTIFY", data = xml_data)
-            if (response.is_readable()): break
+            for subscriber_sid in subscribers: self.gena.queue_event(self, subscriber_sid, (self.sid is None))
         #
     #
 
@@ -34,6 +34,9 @@ import re
 
 from dNG.data.binary import Binary
 
+from .lru_cache import LruCache
+from .usn_record import UsnRecord
+
 class IdentifierMixin(object):
     """
 "IdentifierMixin" implements methods to get UPnP identifier values.
@@ -52,6 +55,11 @@ class IdentifierMixin(object):
 URN RegExp
     """
 
+    _identifier_cache = LruCache(512)
+    """
+Cache of parsed UPnP identifiers without bootId and configId
+    """
+
     def __init__(self):
         """
 Constructor __init__(IdentifierMixin)
@@ -69,7 +77,7 @@ Parsed UPnP identifier
         """
 Returns the UPnP USN string.
 
-:return: (dict) Parsed UPnP identifier; None if not set
+:return: (object) Parsed UPnP identifier; None if not set
 :since:  v0.2.00
         """
 
@@ -163,11 +171,49 @@ Parses the given UPnP USN string.
 :param bootid: UPnP bootId (bootid.upnp.org) if any
 :param configid: UPnP configId (configid.upnp.org) if any
 
-:return: (dict) Parsed UPnP identifier; None on error
+:return: (object) Parsed UPnP identifier as an immutable UsnRecord; None on
+         error
 :since:  v0.2.00
         """
 
         usn = Binary.str(usn)
+        _return = (IdentifierMixin._identifier_cache.get(usn) if (type(usn) == str) else None)
+
+        if (_return is None):
+            _return = IdentifierMixin._parse_identifier(usn)
+            if (_return is not None): IdentifierMixin._identifier_cache.set(usn, _return)
+        #
+
+        if (_return is not None and bootid is not None and configid is not None):
+            _return = _return.replace_ids(bootid, configid)
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def get_identifier_cache_statistics():
+        """
+Returns the hit and miss counters of the parsed UPnP identifier cache.
+
+:return: (dict) Cache statistics
+:since:  v0.2.00
+        """
+
+        return IdentifierMixin._identifier_cache.get_statistics()
+    #
+
+    @staticmethod
+    def _parse_identifier(usn):
+        """
+Parses the given UPnP USN string without bootId and configId.
+
+:param usn: UPnP USN
+
+:return: (object) Parsed UPnP identifier as an immutable UsnRecord; None on
+         error
+:since:  v0.2.00
+        """
 
         if (type(usn) == str):
             usn_data = usn.split("::", 1)
@@ -185,11 +231,6 @@ Parses the given UPnP USN string.
                         "usn": usn
                       }
 
-            if (bootid is not None and configid is not None):
-                _return['bootid'] = bootid
-                _return['configid'] = configid
-            #
-
             re_result = (IdentifierMixin.RE_USN_URN.match(usn_data[1]) if (len(usn_data) > 1) else None)
 
             if (re_result is not None):
@@ -200,6 +241,8 @@ Parses the given UPnP USN string.
                 _return['type'] = re_result.group(3)
                 _return['version'] = re_result.group(4)
             elif (usn[-17:].lower() == "::upnp:rootdevice"): _return['class'] = "rootdevice"
+
+            _return = UsnRecord(_return)
         else: _return = None
 
         return _return
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import OrderedDict
+
+from dNG.runtime.thread_lock import ThreadLock
+
+class LruCache(object):
+    """
+"LruCache" is a thread-safe dictionary limited in size. The least recently
+used entry is removed first if the limit is reached.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, size_max = 128, eviction_callback = None):
+        """
+Constructor __init__(LruCache)
+
+:param size_max: Maximum number of entries
+:param eviction_callback: Callable receiving each value evicted, replaced or
+                          cleared (e.g. to close connections)
+
+:since: v0.2.00
+        """
+
+        self.entries = OrderedDict()
+        """
+Cached entries in least recently used order
+        """
+        self.eviction_callback = eviction_callback
+        """
+Callable receiving each value evicted, replaced or cleared
+        """
+        self.hits = 0
+        """
+Number of successful lookups
+        """
+        self._lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.misses = 0
+        """
+Number of failed lookups
+        """
+        self.size_max = (size_max if (size_max > 0) else 1)
+        """
+Maximum number of entries
+        """
+    #
+
+    def __contains__(self, key):
+        """
+python.org: Called to implement membership test operators.
+
+:param key: Key to be looked up
+
+:return: (bool) True if cached
+:since:  v0.2.00
+        """
+
+        return (key in self.entries)
+    #
+
+    def __len__(self):
+        """
+python.org: Called to implement the built-in function len().
+
+:return: (int) Number of cached entries
+:since:  v0.2.00
+        """
+
+        return len(self.entries)
+    #
+
+    def clear(self):
+        """
+Removes all cached entries.
+
+:since: v0.2.00
+        """
+
+        with self._lock:
+            values = (list(self.entries.values()) if (self.eviction_callback is not None) else [ ])
+            self.entries.clear()
+        #
+
+        for value in values: self.eviction_callback(value)
+    #
+
+    def get(self, key, default = None):
+        """
+Returns the cached value for the given key and marks it as recently used.
+
+:param key: Key
+:param default: Default return value
+
+:return: (mixed) Cached value; default if not cached
+:since:  v0.2.00
+        """
+
+        _return = default
+
+        with self._lock:
+            if (key in self.entries):
+                _return = self.entries.pop(key)
+                self.entries[key] = _return
+
+                self.hits += 1
+            else: self.misses += 1
+        #
+
+        return _return
+    #
+
+    def get_statistics(self):
+        """
+Returns the cache statistics.
+
+:return: (dict) Dict with "hits", "misses", "size" and "size_max"
+:since:  v0.2.00
+        """
+
+        return { "hits": self.hits,
+                 "misses": self.misses,
+                 "size": len(self.entries),
+                 "size_max": self.size_max
+               }
+    #
+
+    def remove(self, key):
+        """
+Removes the cached entry for the given key.
+
+:param key: Key
+
+:return: (bool) True if an entry has been removed
+:since:  v0.2.00
+        """
+
+        with self._lock:
+            _return = (key in self.entries)
+            if (_return): del(self.entries[key])
+        #
+
+        return _return
+    #
+
+    def set(self, key, value):
+        """
+Caches the given value and removes the least recently used entry if the
+limit is exceeded.
+
+:param key: Key
+:param value: Value to be cached
+
+:since: v0.2.00
+        """
+
+        values_evicted = [ ]
+
+        with self._lock:
+            if (key in self.entries):
+                value_replaced = self.entries.pop(key)
+                if (value_replaced is not value): values_evicted.append(value_replaced)
+            #
+
+            self.entries[key] = value
+
+            while (len(self.entries) > self.size_max): values_evicted.append(self.entries.popitem(False)[1])
+        #
+
+        if (self.eviction_callback is not None):
+            for value_evicted in values_evicted: self.eviction_callback(value_evicted)
+        #
+    #
+#
@@ -48,6 +48,7 @@ from .identifier_mixin import IdentifierMixin
 from .pas_upnp_version_mixin import PasUpnpVersionMixin
 from .service_proxy import ServiceProxy
 from .spec_mixin import SpecMixin
+from .usn_record import UsnRecord
 from .variable import Variable
 
 class Service(IdentifierMixin, PasUpnpVersionMixin, SpecMixin):
@@ -135,6 +136,20 @@ Returns the UPnP variable definition.
         return self.variables[name]
     #
 
+    def get_evented_variables(self):
+        """
+Returns the names of all UPnP variables sending events.
+
+:return: (frozenset) Names of evented variables
+:since:  v0.2.00
+        """
+
+        return (frozenset()
+                if (self.variables is None) else
+                frozenset(name for name in self.variables if self.variables[name].get("is_sending_events", True))
+               )
+    #
+
     def get_name(self):
         """
 Returns the UPnP service name (URN without version).
@@ -252,17 +267,17 @@ Initialize the service metadata from a UPnP description.
                 self.name = "{0}:service:{1}".format(re_result.group(1), re_result.group(3))
                 urn = "{0}:{1}".format(self.name, re_result.group(4))
 
-                self._set_identifier({ "device": device_identifier['device'],
-                                       "bootid": device_identifier['bootid'],
-                                       "configid": device_identifier['configid'],
-                                       "uuid": device_identifier['uuid'],
-                                       "class": "service",
-                                       "usn": "uuid:{0}::{1}".format(device_identifier['uuid'], value),
-                                       "urn": urn,
-                                       "domain": re_result.group(1),
-                                       "type": re_result.group(3),
-                                       "version": re_result.group(4)
-                                     })
+                self._set_identifier(UsnRecord({ "device": device_identifier['device'],
+                                                 "bootid": device_identifier['bootid'],
+                                                 "configid": device_identifier['configid'],
+                                                 "uuid": device_identifier['uuid'],
+                                                 "class": "service",
+                                                 "usn": "uuid:{0}::{1}".format(device_identifier['uuid'], value),
+                                                 "urn": urn,
+                                                 "domain": re_result.group(1),
+                                                 "type": re_result.group(3),
+                                                 "version": re_result.group(4)
+                                               }))
             #
         #
 
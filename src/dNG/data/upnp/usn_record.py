@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=redefined-builtin
+
+from operator import attrgetter
+
+try: from sys import intern
+except ImportError: pass
+
+from dNG.runtime.type_exception import TypeException
+
+class UsnRecord(object):
+    """
+"UsnRecord" is an immutable record of a parsed UPnP identifier and the data
+received for the USN. It provides read-only dict methods for compatibility
+with code expecting a dict.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    __slots__ = ( "bootid",
+                  "configid",
+                  "device",
+                  "domain",
+                  "http_client_name",
+                  "http_version",
+                  "ips",
+                  "ssdp_server_name",
+                  "type",
+                  "unicast_port",
+                  "upnp_class",
+                  "url_base",
+                  "url_desc",
+                  "urn",
+                  "usn",
+                  "uuid",
+                  "version"
+                )
+    """
+python.org: __slots__ reserves space for the declared variables and prevents
+the automatic creation of __dict__ and __weakref__ for each instance.
+    """
+
+    KEYS = ( "device", "bootid", "configid", "uuid", "class", "usn", "urn", "domain", "type", "version",
+             "ips", "http_client_name", "http_version", "ssdp_server_name", "unicast_port", "url_base", "url_desc"
+           )
+    """
+Keys supported in the order of the dict representation
+    """
+    KEYS_ALWAYS_DEFINED = ( "device", "bootid", "configid", "uuid", "class", "usn" )
+    """
+Keys defined even if their value is None
+    """
+    KEYS_INTERNED = ( "device", "uuid", "class", "domain", "type", "version", "ssdp_server_name" )
+    """
+Keys with string values shared between records
+    """
+
+    _SLOTS_GETTER = attrgetter(*__slots__)
+    """
+Callable returning all slot values of a record as a tuple
+    """
+
+    def __init__(self, data):
+        """
+Constructor __init__(UsnRecord)
+
+:param data: Dict or UsnRecord instance to initialize the record with
+
+:since: v0.2.00
+        """
+
+        for key in UsnRecord.KEYS:
+            object.__setattr__(self, UsnRecord._get_slot_name(key), UsnRecord._get_normalized_value(key, data.get(key)))
+        #
+    #
+
+    def __contains__(self, key):
+        """
+python.org: Called to implement membership test operators.
+
+:param key: Key to be looked up
+
+:return: (bool) True if defined
+:since:  v0.2.00
+        """
+
+        return (key in UsnRecord.KEYS
+                and (key in UsnRecord.KEYS_ALWAYS_DEFINED
+                     or getattr(self, UsnRecord._get_slot_name(key)) is not None
+                    )
+               )
+    #
+
+    def __delattr__(self, name):
+        """
+python.org: Like __setattr__() but for attribute deletion instead of
+assignment.
+
+:param name: Attribute name
+
+:since: v0.2.00
+        """
+
+        raise TypeException("UsnRecord instances are immutable")
+    #
+
+    def __getitem__(self, key):
+        """
+python.org: Called to implement evaluation of self[key].
+
+:param key: Key
+
+:return: (mixed) Value
+:since:  v0.2.00
+        """
+
+        if (key not in self): raise KeyError(key)
+        return getattr(self, UsnRecord._get_slot_name(key))
+    #
+
+    def __iter__(self):
+        """
+python.org: Return an iterator object.
+
+:return: (object) Iterator of defined keys
+:since:  v0.2.00
+        """
+
+        return iter(self.keys())
+    #
+
+    def __len__(self):
+        """
+python.org: Called to implement the built-in function len().
+
+:return: (int) Number of defined keys
+:since:  v0.2.00
+        """
+
+        return len(self.keys())
+    #
+
+    def __repr__(self):
+        """
+python.org: Called by the repr() built-in function to compute the "official"
+string representation of an object.
+
+:return: (str) String representation
+:since:  v0.2.00
+        """
+
+        return "<UsnRecord {0!r}>".format(self.to_dict())
+    #
+
+    def __setattr__(self, name, value):
+        """
+python.org: Called when an attribute assignment is attempted.
+
+:param name: Attribute name
+:param value: Value
+
+:since: v0.2.00
+        """
+
+        raise TypeException("UsnRecord instances are immutable")
+    #
+
+    def _copy(self):
+        """
+Returns a new record with the slot values of this record copied directly.
+
+:return: (object) UsnRecord instance
+:since:  v0.2.00
+        """
+
+        _return = object.__new__(UsnRecord)
+
+        for ( name, value ) in zip(UsnRecord.__slots__, UsnRecord._SLOTS_GETTER(self)):
+            object.__setattr__(_return, name, value)
+        #
+
+        return _return
+    #
+
+    def copy(self):
+        """
+python.org: Return a shallow copy of the dictionary.
+
+:return: (dict) Mutable dict of the defined keys and values
+:since:  v0.2.00
+        """
+
+        return self.to_dict()
+    #
+
+    def get(self, key, default = None):
+        """
+python.org: Return the value for key if key is in the dictionary, else
+default.
+
+:param key: Key
+:param default: Default return value
+
+:return: (mixed) Value
+:since:  v0.2.00
+        """
+
+        _return = (getattr(self, UsnRecord._get_slot_name(key)) if (key in UsnRecord.KEYS) else None)
+        return (default if (_return is None) else _return)
+    #
+
+    def items(self):
+        """
+python.org: Return a new view of the dictionary's items ((key, value)
+pairs).
+
+:return: (list) List of key and value tuples
+:since:  v0.2.00
+        """
+
+        return [ ( key, self[key] ) for key in self.keys() ]
+    #
+
+    def keys(self):
+        """
+python.org: Return a new view of the dictionary's keys.
+
+:return: (list) List of defined keys
+:since:  v0.2.00
+        """
+
+        return [ key for key in UsnRecord.KEYS if (key in self) ]
+    #
+
+    def merge(self, record):
+        """
+Returns a new record with all values of the given record defined replacing
+the ones of this record.
+
+:param record: UsnRecord or dict
+
+:return: (object) UsnRecord instance
+:since:  v0.2.00
+        """
+
+        _return = self._copy()
+
+        for key in UsnRecord.KEYS:
+            value = record.get(key)
+
+            if (value is not None or key in UsnRecord.KEYS_ALWAYS_DEFINED):
+                object.__setattr__(_return, UsnRecord._get_slot_name(key), UsnRecord._get_normalized_value(key, value))
+            #
+        #
+
+        return _return
+    #
+
+    def replace(self, **kwargs):
+        """
+Returns a new record with the values given as keyword arguments replacing
+the ones of this record.
+
+:return: (object) UsnRecord instance
+:since:  v0.2.00
+        """
+
+        _return = self._copy()
+
+        for key in kwargs:
+            if (key in UsnRecord.KEYS): object.__setattr__(_return, UsnRecord._get_slot_name(key), UsnRecord._get_normalized_value(key, kwargs[key]))
+        #
+
+        return _return
+    #
+
+    def replace_ids(self, bootid, configid):
+        """
+Returns a new record with the given UPnP bootId and configId replacing the
+ones of this record.
+
+:param bootid: UPnP bootId (bootid.upnp.org)
+:param configid: UPnP configId (configid.upnp.org)
+
+:return: (object) UsnRecord instance
+:since:  v0.2.00
+        """
+
+        _return = self._copy()
+
+        object.__setattr__(_return, "bootid", bootid)
+        object.__setattr__(_return, "configid", configid)
+
+        return _return
+    #
+
+    def to_dict(self):
+        """
+Returns a dict of the defined keys and values.
+
+:return: (dict) Dict representation
+:since:  v0.2.00
+        """
+
+        _return = { }
+
+        for key in UsnRecord.KEYS:
+            value = getattr(self, UsnRecord._get_slot_name(key))
+
+            if (value is not None):
+                _return[key] = (list(value) if (key == "ips") else value)
+            elif (key in UsnRecord.KEYS_ALWAYS_DEFINED): _return[key] = None
+        #
+
+        return _return
+    #
+
+    def values(self):
+        """
+python.org: Return a new view of the dictionary's values.
+
+:return: (list) List of values
+:since:  v0.2.00
+        """
+
+        return [ self[key] for key in self.keys() ]
+    #
+
+    @staticmethod
+    def _get_normalized_value(key, value):
+        """
+Returns the value stored for the given key. Strings of keys shared between
+records are interned and IP lists are stored as tuples.
+
+:param key: Key
+:param value: Value
+
+:return: (mixed) Value to be stored
+:since:  v0.2.00
+        """
+
+        if (value is not None):
+            if (key in UsnRecord.KEYS_INTERNED and type(value) is str): value = intern(value)
+            elif (key == "ips"): value = tuple(value)
+        #
+
+        return value
+    #
+
+    @staticmethod
+    def _get_slot_name(key):
+        """
+Returns the slot name used for the given key.
+
+:param key: Key
+
+:return: (str) Slot name
+:since:  v0.2.00
+        """
+
+        return ("upnp_class" if (key == "class") else key)
+    #
+#
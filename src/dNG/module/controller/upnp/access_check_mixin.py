@@ -34,6 +34,7 @@ import socket
 
 from dNG.data.http.translatable_error import TranslatableError
 from dNG.net.upnp.control_point import ControlPoint
+from dNG.net.upnp.resolver_cache import ResolverCache
 
 class AccessCheckMixin(object):
     """
@@ -61,7 +62,7 @@ Validates that the requesting client is allowed to access UPnP resources.
 
         if (client_host is None): is_allowed = False
         else:
-            ip_address_paths = socket.getaddrinfo(client_host, self.request.get_client_port(), socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
+            ip_address_paths = ResolverCache.get_addrinfo(client_host, self.request.get_client_port(), socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
             is_allowed = (False if (len(ip_address_paths) < 1) else upnp_control_point.is_ip_allowed(ip_address_paths[0][4][0]))
         #
 
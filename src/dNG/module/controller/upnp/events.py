@@ -94,12 +94,23 @@ Action for "request"
         if (gena_sid is None):
             gena_variables = self.request.get_header("StateVar")
 
-            gena_sid = gena.register(usn, callback_value, timeout, variables = gena_variables)
+            gena_sid = gena.register(usn,
+                                     callback_value,
+                                     timeout,
+                                     variables = gena_variables,
+                                     variables_evented = upnp_service.get_evented_variables()
+                                    )
+
             if (gena_sid is None): raise UpnpException("pas_http_core_404", 412)
 
             self.response.set_header("SID", gena_sid)
             self.response.set_header("Timeout", "Second-{0:d}".format(timeout))
-            if (gena_variables != ""): self.response.set_header("Accepted-StateVar", gena_variables)
+
+            subscriber = gena.get_subscriber(gena_sid)
+
+            if (subscriber is not None and subscriber['variables_subscribed'] != "*"):
+                self.response.set_header("Accepted-StateVar", ",".join(sorted(subscriber['variables_subscribed'])))
+            #
             self.response.set_raw_data("")
         else:
             result = gena.reregister(usn, gena_sid, timeout)
@@ -39,6 +39,7 @@ from dNG.data.upnp.client_settings_mixin import ClientSettingsMixin
 from dNG.data.upnp.pas_upnp_version_mixin import PasUpnpVersionMixin
 from dNG.module.controller.abstract_http import AbstractHttp as AbstractHttpController
 from dNG.net.upnp.control_point import ControlPoint
+from dNG.net.upnp.resolver_cache import ResolverCache
 
 class Module(ClientSettingsMixin, PasUpnpVersionMixin, AbstractHttpController):
     """
@@ -83,7 +84,7 @@ Initialize block from the given request and response.
             user_agent_blacklist = Settings.get("pas_upnp_http_client_name_blacklist", [ ])
             if (user_agent is not None and user_agent in user_agent_blacklist): user_agent = None
 
-            ip_address_list = socket.getaddrinfo(host, None, socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
+            ip_address_list = ResolverCache.get_addrinfo(host, None, socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
 
             for ip_address_data in ip_address_list:
                 if (user_agent is None):
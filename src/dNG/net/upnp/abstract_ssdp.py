@@ -37,8 +37,9 @@ from dNG.data.settings import Settings
 from dNG.data.upnp.pas_upnp_version_mixin import PasUpnpVersionMixin
 from dNG.module.named_loader import NamedLoader
 from dNG.net.http.raw_client import RawClient
-from dNG.net.udp_ne_ipv4_socket import UdpNeIpv4Socket
-from dNG.net.udp_ne_ipv6_socket import UdpNeIpv6Socket
+
+from .resolver_cache import ResolverCache
+from .ssdp_socket_pool import SsdpSocketPool
 
 class AbstractSsdp(RawClient, PasUpnpVersionMixin):
     """
@@ -100,16 +101,6 @@ Sets a specific source port for messages sent.
         if (self.path == "/*"): self.path = "*"
     #
 
-    def __del__(self):
-        """
-Destructor __del__(AbstractSsdp)
-
-:since: v0.2.00
-        """
-
-        if (self.connection is not None): self.connection.close()
-    #
-
     def _configure(self, url):
         """
 Returns a connection to the HTTP server.
@@ -123,52 +114,34 @@ Returns a connection to the HTTP server.
         RawClient._configure(self, url)
 
         self.ssdp_host = (self.host[1:-1] if (":" in self.host) else self.host)
-        address_list = socket.getaddrinfo(self.ssdp_host, self.port, socket.AF_UNSPEC, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        address_list = ResolverCache.get_addrinfo(self.ssdp_host, self.port, socket.AF_UNSPEC, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         if (len(address_list) == 1): self.ssdp_family = address_list[0][0]
     #
 
     def _get_connection(self):
         """
-Returns a connection to the configured UDP address.
+Returns a shared UDP socket configured for the SSDP target family.
 
-:return: (mixed) Response data; Exception on error
+:return: (object) UDP socket
 :since:  v0.2.00
         """
 
-        if (self.connection is None):
-            if (self.ssdp_family == socket.AF_INET):
-                self.connection = UdpNeIpv4Socket()
-                self.connection.bind(( "", self.source_port ))
-                if (hasattr(socket, "IP_MULTICAST_LOOP")): self.connection.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 0)
-                if (hasattr(socket, "IP_MULTICAST_TTL")): self.connection.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ipv4_udp_ttl)
-
-                if (self.ipv4_broadcast_interface is not None
-                    and hasattr(socket, "SO_BINDTODEVICE")
-                   ): self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, Binary.bytes(self.ipv4_broadcast_interface))
-
-                self.connection.connect(( self.ssdp_host, self.port ))
-            else:
-                self.connection = UdpNeIpv6Socket()
-                self.connection.bind(( "::", self.source_port ))
-
-                if (hasattr(socket, "IPPROTO_IPV6")):
-                    if (hasattr(socket, "IPV6_MULTICAST_LOOP")): self.connection.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_LOOP, 0)
-                    if (hasattr(socket, "IPV6_MULTICAST_HOPS")): self.connection.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS, self.ipv6_udp_hops)
-                #
-            #
-        #
-
-        return self.connection
+        return SsdpSocketPool.get_socket((socket.AF_INET if (self.ssdp_family == socket.AF_INET) else socket.AF_INET6),
+                                         self.source_port,
+                                         self.ipv4_broadcast_interface,
+                                         self.ipv4_udp_ttl,
+                                         self.ipv6_udp_hops
+                                        )
     #
 
-    def request(self, method, data = None):
+    def get_request_data(self, method, data = None):
         """
-Invoke a given SSDP method on the unicast or multicast recipient.
+Returns the encoded SSDP message for the given method and the headers set.
 
 :param method: HTTP method
 :param data: HTTP body
 
-:return: (bool) Request result
+:return: (bytes) SSDP message
 :since:  v0.2.00
         """
 
@@ -193,7 +166,33 @@ Invoke a given SSDP method on the unicast or multicast recipient.
 
         ssdp_header = Binary.utf8_bytes("{0}\r\n".format(ssdp_header))
 
-        data = (ssdp_header if (data is None) else ssdp_header + data)
+        return (ssdp_header if (data is None) else ssdp_header + data)
+    #
+
+    def request(self, method, data = None):
+        """
+Invoke a given SSDP method on the unicast or multicast recipient.
+
+:param method: HTTP method
+:param data: HTTP body
+
+:return: (bool) Request result
+:since:  v0.2.00
+        """
+
+        return self._write_data(self.get_request_data(method, data))
+    #
+
+    def send_data(self, data):
+        """
+Send the given SSDP message previously encoded for the same recipient.
+
+:param data: SSDP message
+
+:return: (bool) Request result
+:since:  v0.2.00
+        """
+
         return self._write_data(data)
     #
 
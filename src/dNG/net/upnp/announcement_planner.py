@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from random import uniform as randfloat
+from threading import Condition, Thread
+from time import sleep, time
+from weakref import ref
+
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.instance_lock import InstanceLock
+from dNG.runtime.value_exception import ValueException
+
+from .task_heap import TaskHeap
+
+class AnnouncementPlanner(object):
+    """
+"AnnouncementPlanner" reannounces all managed UPnP devices from one thread.
+Each USN gets a fixed phase within the announcement period. Phases follow
+a van der Corput sequence to spread announcements evenly. Due announcements
+are sent in paced batches per multicast target and repeated as recommended
+by UPnP.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    _instance_lock = InstanceLock()
+    """
+Thread safety lock
+    """
+    _weakref_instance = None
+    """
+AnnouncementPlanner weakref instance
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(AnnouncementPlanner)
+
+:since: v0.2.00
+        """
+
+        self.announcements = { }
+        """
+Dict of USNs with the event used to reannounce them
+        """
+        self.batch_interval = None
+        """
+Seconds between two batches of announcements
+        """
+        self.batch_size = None
+        """
+Maximum number of USNs announced per batch
+        """
+        self.batches_count = 0
+        """
+Number of batches sent
+        """
+        self.condition = Condition()
+        """
+Condition used by the planner thread to wait for announcements due
+        """
+        self.epoch = time()
+        """
+UNIX timestamp phases are relative to
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.period = None
+        """
+Seconds between two announcements of the same USN
+        """
+        self.phases = { }
+        """
+Dict of USNs with their phase within the announcement period
+        """
+        self.phases_count = 0
+        """
+Number of phases assigned
+        """
+        self.repeat_count = None
+        """
+Number of times each announcement is sent
+        """
+        self.repeat_spacing = None
+        """
+Seconds between repeated announcements
+        """
+        self.sent_count = 0
+        """
+Number of USN announcements sent
+        """
+        self.tasks = TaskHeap()
+        """
+Announcements queued by their UNIX timestamp
+        """
+        self.thread = None
+        """
+Planner thread sending announcements due
+        """
+
+        Settings.read_file("{0}/settings/pas_upnp.json".format(Settings.get("path_data")))
+
+        announcement_divider = int(Settings.get("pas_upnp_announcement_divider", 3))
+        if (announcement_divider < 1): announcement_divider = 1
+
+        announcement_interval = int(Settings.get("pas_upnp_announcement_interval", 3600))
+
+        self.batch_interval = float(Settings.get("pas_upnp_announcement_batch_interval", 0.1))
+        self.batch_size = max(1, int(Settings.get("pas_upnp_announcement_batch_size", 16)))
+
+        # Keep the average of the former random waits between interval / (2 * divider)
+        # and interval / divider but announce within half of the "max-age" value.
+        self.period = min(0.75 * announcement_interval / announcement_divider, 0.45 * announcement_interval)
+
+        self.repeat_count = min(3, max(1, int(Settings.get("pas_upnp_announcement_repeat_count", 2))))
+        self.repeat_spacing = float(Settings.get("pas_upnp_announcement_repeat_spacing", 0.3))
+    #
+
+    def add(self, event):
+        """
+Adds or updates the event used to periodically reannounce its USN.
+
+:param event: UPnP "ControlPointEvent" instance
+
+:since: v0.2.00
+        """
+
+        usn = event.get_usn()
+
+        with self.condition:
+            is_new = (usn not in self.announcements)
+            self.announcements[usn] = event
+
+            if (is_new):
+                phase = self._get_phase()
+                self.phases[usn] = phase
+
+                if (self.tasks.add(self._get_next_timestamp(phase, time()), "announce", ( usn, 0 ), usn)): self.condition.notify()
+            #
+
+            if (self.thread is None):
+                self.thread = Thread(target = self._run)
+                self.thread.daemon = True
+                self.thread.start()
+            #
+        #
+    #
+
+    def _get_next_timestamp(self, phase, timestamp):
+        """
+Returns the UNIX timestamp of the next announcement for the given phase
+after the given one. A small jitter is added.
+
+:param phase: Phase within the announcement period
+:param timestamp: UNIX timestamp
+
+:return: (float) UNIX timestamp
+:since:  v0.2.00
+        """
+
+        cycles = int((timestamp - self.epoch - phase) / self.period) + 1
+        return self.epoch + phase + (cycles * self.period) + randfloat(0, self.batch_interval)
+    #
+
+    def _get_phase(self):
+        """
+Returns the phase for the next USN added. The radical inverse of the number
+of phases assigned places each new phase in the largest gap left.
+
+:return: (float) Phase within the announcement period
+:since:  v0.2.00
+        """
+
+        index = self.phases_count
+        self.phases_count += 1
+
+        fraction = 0.0
+        base = 0.5
+
+        while (index > 0):
+            if (index & 1): fraction += base
+
+            index >>= 1
+            base /= 2
+        #
+
+        return fraction * self.period
+    #
+
+    def get_statistics(self):
+        """
+Returns the number of USNs planned as well as batches and announcements
+sent.
+
+:return: (dict) Dict with "announcements", "batches", "period" and "sent"
+:since:  v0.2.00
+        """
+
+        with self.condition:
+            _return = { "announcements": len(self.announcements),
+                        "batches": self.batches_count,
+                        "period": self.period,
+                        "sent": self.sent_count
+                      }
+        #
+
+        return _return
+    #
+
+    def remove(self, usn):
+        """
+Removes the given USN from the announcements planned.
+
+:param usn: UPnP USN
+
+:return: (bool) True if the USN was planned
+:since:  v0.2.00
+        """
+
+        with self.condition:
+            _return = (self.announcements.pop(usn, None) is not None)
+
+            self.phases.pop(usn, None)
+            self.tasks.remove(usn)
+        #
+
+        return _return
+    #
+
+    def _run(self):
+        """
+Planner thread sending announcements due until no USN is planned anymore.
+
+:since: v0.2.00
+        """
+
+        while (True):
+            batch = [ ]
+
+            with self.condition:
+                while (len(batch) < 1):
+                    if (len(self.announcements) < 1):
+                        self.thread = None
+                        return
+                    #
+
+                    _time = time()
+                    timestamp = self.tasks.get_next_timestamp()
+
+                    if (timestamp < 0 or timestamp > _time):
+                        self.condition.wait(None if (timestamp < 0) else timestamp - _time)
+                        continue
+                    #
+
+                    while (len(batch) < self.batch_size):
+                        task = self.tasks.pop(_time)
+                        if (task is None): break
+
+                        ( usn, repeat ) = task
+                        if (usn not in self.announcements): continue
+
+                        batch.append(( usn, self.announcements[usn] ))
+
+                        if (repeat + 1 < self.repeat_count): self.tasks.add(_time + self.repeat_spacing, "announce", ( usn, repeat + 1 ), usn)
+                        if (repeat == 0): self.tasks.add(self._get_next_timestamp(self.phases[usn], _time), "announce", ( usn, 0 ), usn)
+                    #
+                #
+
+                self.batches_count += 1
+                self.sent_count += len(batch)
+            #
+
+            self._send(batch)
+            if (self.batch_interval > 0): sleep(self.batch_interval)
+        #
+    #
+
+    def _send(self, batch):
+        """
+Sends the given batch of announcements to each multicast target in turn.
+
+:param batch: List of USN and event tuples
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        usns_invalid = set()
+        targets = batch[0][1].get_notify_targets()
+
+        for target in targets:
+            for ( usn, event ) in batch:
+                if (usn in usns_invalid): continue
+
+                try: event.send_notify([ target ])
+                except ValueException: usns_invalid.add(usn)
+                except Exception as handled_exception:
+                    if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_upnp")
+                #
+            #
+        #
+
+        for usn in usns_invalid: self.remove(usn)
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the AnnouncementPlanner singleton.
+
+:return: (AnnouncementPlanner) Object on success
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with AnnouncementPlanner._instance_lock:
+            if (AnnouncementPlanner._weakref_instance is not None): _return = AnnouncementPlanner._weakref_instance()
+
+            if (_return is None):
+                _return = AnnouncementPlanner()
+                AnnouncementPlanner._weakref_instance = ref(_return)
+            #
+        #
+
+        return _return
+    #
+#
@@ -32,12 +32,13 @@ https://www.direct-netware.de/redirect?licenses;gpl
 
 # pylint: disable=import-error,no-name-in-module
 
-from copy import copy
 from locale import getlocale
+from os import path
 from random import uniform as randfloat
 from time import time
 from threading import Thread
 from weakref import ref
+import os
 import re
 import socket
 
@@ -45,22 +46,37 @@ try: from urllib.parse import urlsplit
 except ImportError: from urlparse import urlsplit
 
 from dNG.data.binary import Binary
+from dNG.data.json_resource import JsonResource
 from dNG.data.settings import Settings
 from dNG.data.text.l10n import L10n
 from dNG.data.upnp.control_point_event import ControlPointEvent
 from dNG.data.upnp.device import Device
+from dNG.data.upnp.lru_cache import LruCache
 from dNG.data.upnp.pas_upnp_version_mixin import PasUpnpVersionMixin
+from dNG.data.upnp.usn_record import UsnRecord
 from dNG.module.named_loader import NamedLoader
 from dNG.net.http.client import Client as HttpClient
 from dNG.plugins.hook import Hook
 from dNG.runtime.exception_log_trap import ExceptionLogTrap
 from dNG.runtime.instance_lock import InstanceLock
+from dNG.runtime.thread_lock import ThreadLock
 from dNG.runtime.value_exception import ValueException
 from dNG.tasks.abstract_timed import AbstractTimed
 
+from .announcement_planner import AnnouncementPlanner
+from .event_dispatcher import EventDispatcher
 from .gena import Gena
+from .read_write_lock import ReadWriteLock
+from .resolver_cache import ResolverCache
 from .ssdp_listener_ipv4_multicast import SsdpListenerIpv4Multicast
 from .ssdp_listener_ipv6_multicast import SsdpListenerIpv6Multicast
+from .task_heap import TaskHeap
+
+try: from .ssdp_asyncio_listener import SsdpAsyncioListener
+except ImportError: SsdpAsyncioListener = None
+
+try: from .ssdp_reuseport_listener import SsdpReuseportListener
+except ImportError: SsdpReuseportListener = None
 
 class ControlPoint(PasUpnpVersionMixin, AbstractTimed):
     """
@@ -130,6 +146,10 @@ Unicast IPv4 listener
         self.listener_port = int(Settings.get("pas_upnp_device_port", 1900))
         """
 Unicast port in the range 49152-65535 (searchport.upnp.org)
+        """
+        self.listeners_asyncio = False
+        """
+True to receive SSDP messages with one shared asyncio event loop
         """
         self.listeners_multicast = { }
         """
@@ -142,34 +162,151 @@ Number of IPv4 multicast listeners
         self.listeners_multicast_ipv6 = 0
         """
 Number of IPv6 multicast listeners
+        """
+        self.listeners_reuseport = False
+        """
+True to receive SSDP messages with "SO_REUSEPORT" worker processes
         """
         self.managed_devices = { }
         """
 List of managed devices
+        """
+        self.notify_count = 0
+        """
+Number of ssdp:alive NOTIFY messages received
+        """
+        self.notify_short_circuited_count = 0
+        """
+Number of ssdp:alive NOTIFY messages only extending the USN expiry time
+        """
+        self.notify_statistics_lock = ThreadLock()
+        """
+Thread safety lock for the NOTIFY message counters
+        """
+        self.rootdevice_cache = None
+        """
+Cache of initialized UPnP root devices
+        """
+        self.rootdevice_cache_building = { }
+        """
+Dict of root device cache keys with the lock held while the device is
+initialized
+        """
+        self.rootdevice_cache_building_lock = ThreadLock()
+        """
+Thread safety lock for the dict of root devices being initialized
         """
         self.rootdevices = [ ]
         """
 List of UPnP root devices
         """
-        self.tasks = [ ]
+        self.snapshot_file_path = None
         """
-List of tasks (e.g. timed out services) to run
+File path of the snapshot of discovered USNs and UPnP descriptions; None if
+disabled
+        """
+        self.tasks = TaskHeap()
+        """
+Heap of tasks (e.g. timed out services) to run
         """
         self.upnp_desc = { }
         """
 Received UPnP descriptions
+        """
+        self.upnp_desc_cache = None
+        """
+Cache of UPnP descriptions with HTTP validators for conditional requests
+        """
+        self.upnp_desc_http_clients = None
+        """
+Idle HTTP clients of previously read UPnP description URLs
+        """
+        self.upnp_desc_read_host_workers_max = None
+        """
+Maximum number of concurrent UPnP description requests per host
+        """
+        self.upnp_desc_read_timeout = None
+        """
+Timeout in seconds for UPnP description requests
+        """
+        self.upnp_desc_read_workers = 0
+        """
+Number of active UPnP description reading threads
+        """
+        self.upnp_desc_read_workers_max = None
+        """
+Maximum number of UPnP description reading threads
+        """
+        self.upnp_desc_reading = { }
+        """
+UPnP description URLs currently read
+        """
+        self.upnp_desc_reading_hosts = { }
+        """
+Number of UPnP description requests currently sent per host
+        """
+        self.upnp_desc_reading_lock = ThreadLock()
+        """
+Thread safety lock for UPnP description URLs unread and currently read
         """
         self.upnp_desc_unread = { }
         """
 Unread UPnP description URLs
+        """
+        self.usn_desc_urls = { }
+        """
+Dict of USNs with the UPnP description URL they have been read from
         """
         self.usns = { }
         """
 List of devices with its services
         """
+        self.usns_by_ip = { }
+        """
+Dict of IP addresses with a list of USNs announced by them
+        """
+        self.usns_by_type = { }
+        """
+Dict of UPnP class and type tuples with a list of USNs
+        """
+        self.usns_lock = None
+        """
+Reader/writer lock for USNs, devices and UPnP descriptions received
+        """
+        self.usns_restored = set()
+        """
+USNs restored from the snapshot and not yet revalidated
+        """
+        self.usns_seen = { }
+        """
+Dict of USNs with the bootId, configId, location URL and expiry time
+announced last. It is read without acquiring the lock.
+        """
 
         Settings.read_file("{0}/settings/pas_upnp.json".format(Settings.get("path_data")))
 
+        self.rootdevice_cache = LruCache(int(Settings.get("pas_upnp_rootdevice_cache_size", 32)))
+        self.upnp_desc_cache = LruCache(int(Settings.get("pas_upnp_desc_cache_size", 64)))
+        self.upnp_desc_read_host_workers_max = int(Settings.get("pas_upnp_desc_read_host_workers_max", 2))
+        self.upnp_desc_read_timeout = int(Settings.get("pas_upnp_desc_read_timeout", 10))
+        self.upnp_desc_read_workers_max = int(Settings.get("pas_upnp_desc_read_workers_max", 8))
+        self.usns_lock = ReadWriteLock(Settings.get("pas_upnp_control_point_lock_statistics", False))
+
+        self.listeners_asyncio = (SsdpAsyncioListener is not None and Settings.get("pas_upnp_ssdp_asyncio_listener", False))
+
+        self.listeners_reuseport = (SsdpReuseportListener is not None
+                                    and hasattr(socket, "SO_REUSEPORT")
+                                    and int(Settings.get("pas_upnp_ssdp_reuseport_workers", 0)) > 0
+                                   )
+
+        self.upnp_desc_http_clients = LruCache(self.upnp_desc_read_workers_max * self.upnp_desc_read_host_workers_max,
+                                               ControlPoint._close_http_client
+                                              )
+
+        if (Settings.get("pas_upnp_control_point_snapshot", False)):
+            self.snapshot_file_path = path.join(Settings.get("path_data"), "upnp", "control_point_snapshot.jsonl")
+        #
+
         self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
 
         if (self.http_language is None):
@@ -210,7 +347,7 @@ Activates all relevant multicast listeners based on the IP address given.
         with self.lock:
             if (ip not in self.listeners_multicast):
                 if (":" in ip):
-                    listener = SsdpListenerIpv6Multicast(ip)
+                    listener = self._get_multicast_listener_instance(ip)
                     listener.add_address("ff04::c")
                     listener.add_address("ff05::c")
                     listener.add_address("ff08::c")
@@ -219,7 +356,7 @@ Activates all relevant multicast listeners based on the IP address given.
                     self.listeners_multicast[ip] = listener
                     self.listeners_multicast_ipv6 += 1
                 else:
-                    self.listeners_multicast[ip] = SsdpListenerIpv4Multicast(ip)
+                    self.listeners_multicast[ip] = self._get_multicast_listener_instance(ip)
                     self.listeners_multicast_ipv4 += 1
                 #
 
@@ -243,18 +380,19 @@ supported and must be handled separately.
         _return = True
 
         if (isinstance(device, Device) and device.is_managed()):
-            with self.lock:
+            with self.usns_lock.write("add_device"):
                 device_identifier = Device.get_identifier(device.get_usn(), self.bootid, self.configid)
 
                 if (device_identifier is not None and device_identifier['usn'] not in self.usns):
                     if (self.log_handler is not None): self.log_handler.info("pas.upnp.ControlPoint adds UPnP device USN '{0}'", device_identifier['usn'], context = "pas_upnp")
 
                     if (device_identifier['device'] not in self.rootdevices): self.rootdevices.append(device_identifier['device'])
-                    device_identifier['url_desc'] = device.get_desc_url()
+                    device_identifier = device_identifier.replace(url_desc = device.get_desc_url())
                     self.managed_devices[device_identifier['uuid']] = device
                     self.usns[device_identifier['usn']] = device_identifier
+                    self._index_usn(device_identifier)
 
-                    self._remove_task(device_identifier['usn'], "deliver_event")
+                    self._cancel_events(device_identifier['usn'])
 
                     if (self.configid < 16777216): self.configid += 1
                     else: self.configid = 0
@@ -275,9 +413,10 @@ supported and must be handled separately.
                         embedded_device_identifier = Device.get_identifier(embedded_device.get_usn(), self.bootid, self.configid)
                         if (self.log_handler is not None): self.log_handler.info("pas.upnp.ControlPoint adds UPnP device USN '{0}'", embedded_device_identifier['usn'], context = "pas_upnp")
 
-                        embedded_device_identifier['url_desc'] = embedded_device.get_desc_url()
+                        embedded_device_identifier = embedded_device_identifier.replace(url_desc = embedded_device.get_desc_url())
                         self.managed_devices[embedded_device_identifier['uuid']] = embedded_device
                         self.usns[embedded_device_identifier['usn']] = embedded_device_identifier
+                        self._index_usn(embedded_device_identifier)
 
                         wait_seconds = randfloat(0.4, 0.6)
 
@@ -312,11 +451,9 @@ ones. Keep track of them after their first query.
         """
 
         if (user_agent is not None and user_agent != ""):
-            with self.lock:
-                for usn in self.usns:
-                    if ("http_client_name" not in self.usns[usn]
-                        and ip in self.usns[usn].get("ips", [ ])
-                       ): self.usns[usn]['http_client_name'] = user_agent
+            with self.usns_lock.write("add_http_client_name_to_ip"):
+                for usn in self.usns_by_ip.get(ip, [ ]):
+                    if ("http_client_name" not in self.usns[usn]): self.usns[usn] = self.usns[usn].replace(http_client_name = user_agent)
                 #
             #
         #
@@ -330,7 +467,7 @@ removed if the timeout expires.
 :param usn: UPnP USN
         """
 
-        with self.lock:
+        with self.usns_lock.write("add_rootdevice"):
             identifier = Device.get_identifier(usn, self.bootid, self.configid)
 
             if (identifier['device'] in self.rootdevices):
@@ -361,37 +498,27 @@ Update the list with the given parsed UPnP identifier.
 
         timestamp = time() + wait_seconds
 
-        with self.lock:
-            tasks_count = len(self.tasks)
+        task = kwargs
+        task.update({ "timestamp": timestamp, "type": _type })
 
-            if (wait_seconds > 600):
-                index = 0
+        usn = (task['identifier']['usn'] if ("identifier" in task) else task.get("usn"))
 
-                if (tasks_count > 0):
-                    for position in range((tasks_count - 1), -1, -1):
-                        if (timestamp > self.tasks[position]['timestamp']):
-                            index = 1 + position
-                            break
-                        #
-                    #
-                #
-            else:
-                index = len(self.tasks)
+        with self.lock: is_next_task = self.tasks.add(timestamp, _type, task, usn)
 
-                for position in range(0, tasks_count):
-                    if (timestamp < self.tasks[position]['timestamp']):
-                        index = position
-                        break
-                    #
-                #
-            #
+        if (is_next_task): self.update_timestamp(timestamp)
+    #
 
-            task = kwargs
-            task.update({ "timestamp": timestamp, "type": _type })
-            self.tasks.insert(index, task)
-        #
+    def _cancel_events(self, usn):
+        """
+Cancels all scheduled events and planned reannouncements of the given USN.
+
+:param usn: UPnP USN
 
-        if (index < 1): self.update_timestamp(timestamp)
+:since: v0.2.00
+        """
+
+        EventDispatcher.get_instance().cancel(usn)
+        AnnouncementPlanner.get_instance().remove(usn)
     #
 
     def _deactivate_multicast_listener(self, ip):
@@ -428,8 +555,9 @@ Delete the parsed UPnP identifier from the ControlPoint list.
 
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._delete()- (#echo(__LINE__)#)", self, context = "pas_upnp")
 
-        with self.lock:
+        with self.usns_lock.write("_delete"):
             if (identifier['usn'] in self.usns and (identifier['bootid'] is None or self.usns[identifier['usn']]['bootid'] <= identifier['bootid'])):
+                ips_removed = [ ]
                 usn_data = self.usns[identifier['usn']]
 
                 if (self.log_handler is not None): self.log_handler.info("pas.upnp.ControlPoint deletes USN '{0}'", identifier['usn'], context = "pas_upnp")
@@ -443,19 +571,10 @@ Delete the parsed UPnP identifier from the ControlPoint list.
                     event.deliver()
 
                     Hook.call("dNG.pas.upnp.ControlPoint.onHostDeviceRemoved", identifier = identifier)
-                    self._remove_task(identifier['usn'], "deliver_event")
+                    self._cancel_events(identifier['usn'])
                     del(self.managed_devices[usn_data['uuid']])
                 elif ("url_desc" in usn_data and usn_data['url_desc'] in self.upnp_desc):
-                    if (self.gena is not None and "ips" in usn_data):
-                        for ip in usn_data['ips']:
-                            usn = ("{0}:{1}:{2}".format(usn_data['domain'], usn_data['class'], usn_data['type'])
-                                   if ("urn" in usn_data) else
-                                   None
-                                  )
-
-                            self.gena.cancel(usn, ip)
-                        #
-                    #
+                    if (self.gena is not None): ips_removed = usn_data.get("ips", [ ])
 
                     if (usn_data['class'] == "device"): Hook.call("dNG.pas.upnp.ControlPoint.onDeviceRemoved", identifier = usn_data)
                     Hook.call("dNG.pas.upnp.ControlPoint.onUsnRemoved", identifier = usn_data)
@@ -469,8 +588,17 @@ can be safely deleted afterwards.
                 """
 
                 self._remove_task(identifier['usn'])
+                self.usns_restored.discard(identifier['usn'])
+                self.usns_seen.pop(identifier['usn'], None)
+                self.rootdevice_cache.remove(( identifier['usn'], usn_data['bootid'], usn_data['configid'] ))
+                self._unindex_usn(usn_data)
                 del(self.usns[identifier['usn']])
 
+                for ip in ips_removed:
+                    # GENA subscriptions of a host are cancelled as soon as none of its USNs is known anymore
+                    if (ip not in self.usns_by_ip): self._add_task(0, "cancel_gena_subscriptions", ip = ip)
+                #
+
                 if (identifier['device'] in self.devices):
                     if (identifier['usn'] in self.devices[identifier['device']]): self.devices[identifier['device']].remove(identifier['usn'])
 
@@ -496,9 +624,9 @@ Delete the USN from the list of UPnP descriptions.
 
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._delete_upnp_desc()- (#echo(__LINE__)#)", self, context = "pas_upnp")
 
-        upnp_desc_iterable = self.upnp_desc.copy()
+        url = self.usn_desc_urls.pop(identifier['usn'], None)
 
-        for url in upnp_desc_iterable:
+        if (url in self.upnp_desc):
             if (identifier['usn'] in self.upnp_desc[url]['usns']): self.upnp_desc[url]['usns'].remove(identifier['usn'])
             if (len(self.upnp_desc[url]['usns']) < 1): del(self.upnp_desc[url])
         #
@@ -523,7 +651,7 @@ Delete the USN from the ControlPoint list.
             identifier = Device.get_identifier(usn, bootid, configid)
 
             if (identifier is not None):
-                with self.lock:
+                with self.usns_lock.write("delete_usn"):
                     if (identifier['usn'] in self.usns and identifier['uuid'] not in self.managed_devices): self._delete(identifier, additional_data)
                 #
             #
@@ -541,7 +669,7 @@ Delete all USNs from the given list.
 
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._delete_usns()- (#echo(__LINE__)#)", self, context = "pas_upnp")
 
-        with self.lock:
+        with self.usns_lock.write("_delete_usns"):
             for usn in usns:
                 if (usn in self.usns): self._delete(self.usns[usn])
             #
@@ -582,15 +710,11 @@ Returns the raw XML UPnP description for the given identifier.
 
         _return = None
 
-        with self.lock:
+        with self.usns_lock.read("get_desc_xml"):
             if ("url_desc" in identifier and identifier['url_desc'] in self.upnp_desc): _return = self.upnp_desc[identifier['url_desc']]['xml_data']
             else:
-                for url in self.upnp_desc:
-                    if (identifier['usn'] in self.upnp_desc[url]['usns']):
-                        _return = self.upnp_desc[url]['xml_data']
-                        break
-                    #
-                #
+                url = self.usn_desc_urls.get(identifier['usn'])
+                if (url in self.upnp_desc): _return = self.upnp_desc[url]['xml_data']
             #
         #
 
@@ -634,13 +758,9 @@ the given IP.
 
         _return = None
 
-        with self.lock:
-            for usn in self.usns:
-                if (ip in self.usns[usn].get("ips", [ ])):
-                    if ("http_client_name" in self.usns[usn]): _return = self.usns[usn]['http_client_name']
-                    break
-                #
-            #
+        with self.usns_lock.read("get_http_client_name_of_ip"):
+            usns = self.usns_by_ip.get(ip)
+            if (usns is not None): _return = self.usns[usns[0]].get("http_client_name")
         #
 
         return _return
@@ -675,14 +795,23 @@ Get the implementation specific next "run()" UNIX timestamp.
 :since:  v0.2.00
         """
 
-        with self.lock:
-            if (len(self.tasks) > 0): _return = self.tasks[0]['timestamp']
-            else: _return = -1
-        #
-
+        with self.lock: _return = self.tasks.get_next_timestamp()
         return _return
     #
 
+    def get_lock_statistics(self):
+        """
+Returns the wait and hold times recorded for the lock of the USN lookup
+tables if enabled with "pas_upnp_control_point_lock_statistics".
+
+:return: (dict) Dict of method names with "count", "wait_total",
+         "wait_max", "hold_total" and "hold_max"; None if disabled
+:since:  v0.2.00
+        """
+
+        return self.usns_lock.get_statistics()
+    #
+
     def get_managed_devices(self):
         """
 Returns all UPnP devices managed by this ControlPoint instance.
@@ -691,7 +820,42 @@ Returns all UPnP devices managed by this ControlPoint instance.
 :since:  v0.2.00
         """
 
-        return self.managed_devices.copy()
+        with self.usns_lock.read("get_managed_devices"): _return = self.managed_devices.copy()
+        return _return
+    #
+
+    def _get_multicast_listener_instance(self, ip):
+        """
+Returns a new multicast listener instance for the IP address given.
+
+:param ip: IPv4 / IPv6 address
+
+:return: (object) Multicast listener instance
+:since:  v0.2.00
+        """
+
+        if (self.listeners_reuseport): _return = SsdpReuseportListener(ip)
+        elif (self.listeners_asyncio): _return = SsdpAsyncioListener(ip)
+        elif (":" in ip): _return = SsdpListenerIpv6Multicast(ip)
+        else: _return = SsdpListenerIpv4Multicast(ip)
+
+        return _return
+    #
+
+    def get_notify_statistics(self):
+        """
+Returns the number of ssdp:alive NOTIFY messages received and the number of
+them only extending the expiry time of an already known USN.
+
+:return: (dict) Dict with "received" and "short_circuited"
+:since:  v0.2.00
+        """
+
+        with self.notify_statistics_lock:
+            return { "received": self.notify_count,
+                     "short_circuited": self.notify_short_circuited_count
+                   }
+        #
     #
 
     def get_rootdevice(self, identifier):
@@ -706,18 +870,47 @@ Returns a UPnP rootdevice for the given identifier.
 
         _return = None
 
-        with self.lock:
+        with self.usns_lock.read("get_rootdevice"):
             if (identifier['class'] == "device" and identifier['usn'] in self.usns):
                 if (identifier['uuid'] in self.managed_devices):
                     if (self.log_handler is not None): self.log_handler.debug("{0!r} got request to return the hosted device '{1}'", self, identifier['usn'], context = "pas_upnp")
                     _return = self.managed_devices[identifier['uuid']]
                     _return.set_configid(self.configid)
                 else:
-                    if (self.log_handler is not None): self.log_handler.debug("{0!r} got request to create an object for device '{1}'", self, identifier['usn'], context = "pas_upnp")
+                    usn_data = self.usns[identifier['usn']]
+                    cache_key = ( identifier['usn'], usn_data['bootid'], usn_data['configid'] )
+
+                    _return = self.rootdevice_cache.get(cache_key)
+
+                    if (_return is None):
+                        with self.rootdevice_cache_building_lock:
+                            building_lock = self.rootdevice_cache_building.get(cache_key)
 
-                    _return = (NamedLoader.get_instance("dNG.data.upnp.devices.{0}".format(identifier['type']), False) if (identifier['class'] == "device") else None)
-                    if (_return is None): _return = Device()
-                    if (_return.init_xml_desc(self.usns[identifier['usn']], self.get_desc_xml(identifier)) == False): _return = None
+                            if (building_lock is None):
+                                building_lock = ThreadLock()
+                                self.rootdevice_cache_building[cache_key] = building_lock
+                            #
+                        #
+
+                        try:
+                            # Concurrent requests for the same device wait for the description to be parsed once
+                            with building_lock:
+                                _return = self.rootdevice_cache.get(cache_key)
+
+                                if (_return is None):
+                                    if (self.log_handler is not None): self.log_handler.debug("{0!r} got request to create an object for device '{1}'", self, identifier['usn'], context = "pas_upnp")
+
+                                    _return = (NamedLoader.get_instance("dNG.data.upnp.devices.{0}".format(identifier['type']), False) if (identifier['class'] == "device") else None)
+                                    if (_return is None): _return = Device()
+
+                                    if (_return.init_xml_desc(usn_data, self.get_desc_xml(identifier)) == False): _return = None
+                                    else: self.rootdevice_cache.set(cache_key, _return)
+                                #
+                            #
+                        finally:
+                            with self.rootdevice_cache_building_lock: self.rootdevice_cache_building.pop(cache_key, None)
+                        #
+                    #
                 #
             #
         #
@@ -725,6 +918,18 @@ Returns a UPnP rootdevice for the given identifier.
         return _return
     #
 
+    def get_rootdevice_cache_statistics(self):
+        """
+Returns the hit and miss statistics of the cache of initialized UPnP root
+devices.
+
+:return: (dict) Dict with "hits", "misses", "size" and "size_max"
+:since:  v0.2.00
+        """
+
+        return self.rootdevice_cache.get_statistics()
+    #
+
     def get_rootdevice_for_host(self, host, _type):
         """
 Returns a UPnP rootdevice for the given UPnP host.
@@ -738,18 +943,17 @@ Returns a UPnP rootdevice for the given UPnP host.
 
         _return = None
 
-        ip_address_list = socket.getaddrinfo(host, None, socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
+        ip_address_list = ResolverCache.get_addrinfo(host, None, socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
 
         for ip_address_data in ip_address_list:
             ip = ip_address_data[4][0]
 
             if (self.is_ip_allowed(ip)):
-                with self.lock:
-                    for usn in self.usns:
-                        if (self.usns[usn]['class'] == "device"
-                            and self.usns[usn]['type'] == _type
-                            and ip in self.usns[usn].get("ips", [ ])
-                           ):
+                with self.usns_lock.read("get_rootdevice_for_host"):
+                    usns_of_type = self.usns_by_type.get(( "device", _type ), [ ])
+
+                    for usn in self.usns_by_ip.get(ip, [ ]):
+                        if (usn in usns_of_type):
                             _return = self.get_rootdevice(self.usns[usn])
                             break
                         #
@@ -775,18 +979,38 @@ Returns the known "Server" SSDP header value for the given IP.
 
         _return = None
 
-        with self.lock:
-            for usn in self.usns:
-                if (ip in self.usns[usn].get("ips", [ ])):
-                    if ("ssdp_server_name" in self.usns[usn]): _return = self.usns[usn]['ssdp_server_name']
-                    break
-                #
-            #
+        with self.usns_lock.read("get_ssdp_server_name_of_ip"):
+            usns = self.usns_by_ip.get(ip)
+            if (usns is not None): _return = self.usns[usns[0]].get("ssdp_server_name")
         #
 
         return _return
     #
 
+    def _index_usn(self, usn_data):
+        """
+Adds the given USN data to the IP address and type lookup indexes.
+
+:param usn_data: USN data
+
+:since: v0.2.00
+        """
+
+        usn = usn_data['usn']
+
+        for ip in usn_data.get("ips", [ ]):
+            if (ip not in self.usns_by_ip): self.usns_by_ip[ip] = [ usn ]
+            elif (usn not in self.usns_by_ip[ip]): self.usns_by_ip[ip].append(usn)
+        #
+
+        if ("type" in usn_data):
+            type_key = ( usn_data['class'], usn_data['type'] )
+
+            if (type_key not in self.usns_by_type): self.usns_by_type[type_key] = set()
+            self.usns_by_type[type_key].add(usn)
+        #
+    #
+
     def is_ip_allowed(self, ip):
         """
 Returns true if the given IP is a allowed to send UPnP control requests.
@@ -801,15 +1025,7 @@ Returns true if the given IP is a allowed to send UPnP control requests.
         _return = False
 
         if (not Settings.get("pas_upnp_allowed_networks_only", True)): _return = True
-        elif (allowed_networks is None):
-            with self.lock:
-                for usn in self.usns:
-                    if (ip in self.usns[usn].get("ips", [ ])):
-                        _return = True
-                        break
-                    #
-                #
-            #
+        elif (allowed_networks is None): _return = (ip in self.usns_by_ip)
         else:
             for network_prefix in allowed_networks:
                 if (":" in network_prefix):
@@ -863,69 +1079,255 @@ Check if a given UPnP UUID is a known rootdevice.
         return _return
     #
 
-    def _read_upnp_descs(self):
+    def _load_snapshot(self):
         """
-Parse unread UPnP descriptions.
+Loads the snapshot of discovered USNs and UPnP descriptions saved on the
+last shutdown. Restored USNs are revalidated with the next announcement
+received.
 
 :since: v0.2.00
         """
 
         # pylint: disable=broad-except
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._read_upnp_descs()- (#echo(__LINE__)#)", self, context = "pas_upnp")
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._load_snapshot()- (#echo(__LINE__)#)", self, context = "pas_upnp")
 
-        upnp_desc_unread = self.upnp_desc_unread.copy()
+        entries = [ ]
+        json_resource = JsonResource()
 
-        for url in upnp_desc_unread:
-            try:
-                if (self.log_handler is not None): self.log_handler.debug("{0!r} reads UPnP device description from '{1}'", self, url, context = "pas_upnp")
+        try:
+            with open(self.snapshot_file_path, "rb") as file_object:
+                for line in file_object:
+                    entry = json_resource.json_to_data(Binary.str(line))
+                    if (type(entry) is dict and "type" in entry): entries.append(entry)
+                #
+            #
+        except Exception as handled_exception:
+            if (self.log_handler is not None): self.log_handler.warning(handled_exception, context = "pas_upnp")
+        #
 
-                usns = upnp_desc_unread[url]
+        _time = time()
+
+        with self.usns_lock.write("_load_snapshot"):
+            for entry in entries:
+                if (entry['type'] == "usn" and entry['expires'] > _time):
+                    usn_data = UsnRecord(entry['data'])
+                    identifier = Device.get_identifier(usn_data['usn'], usn_data['bootid'], usn_data['configid'])
+
+                    if (identifier is not None
+                        and identifier['usn'] not in self.usns
+                        and identifier['uuid'] not in self.managed_devices
+                       ):
+                        self.usns[identifier['usn']] = usn_data
+                        self.usns_restored.add(identifier['usn'])
+                        self._index_usn(usn_data)
+
+                        if ("urn" in identifier):
+                            if (identifier['device'] not in self.devices): self.devices[identifier['device']] = [ ]
+                            self.devices[identifier['device']].append(identifier['usn'])
+                        #
 
-                http_client = HttpClient(url, event_handler = self.log_handler)
-                http_client.set_header("Accept-Language", self.http_language)
-                http_client.set_header("User-Agent", ControlPoint.get_pas_upnp_http_client_identifier_string())
-                http_client.set_ipv6_link_local_interface(Settings.get("pas_global_ipv6_link_local_interface"))
+                        self._add_task(entry['expires'] - _time, "delete", identifier = identifier)
+                    #
+                elif (entry['type'] == "rootdevice" and entry['expires'] > _time):
+                    identifier = Device.get_identifier(entry['usn'], self.bootid, self.configid)
 
-                http_response = http_client.request_get()
+                    if (identifier is not None and identifier['device'] not in self.rootdevices):
+                        self.rootdevices.append(identifier['device'])
+                        self._add_task(entry['expires'] - _time, "remove_rootdevice", usn = entry['usn'])
+                    #
+                #
+            #
 
-                if (http_response.is_readable()):
-                    with self.lock:
-                        if (url in self.upnp_desc): self.upnp_desc[url]['xml_data'] = Binary.raw_str(http_response.read())
-                        else: self.upnp_desc[url] = { "xml_data": Binary.raw_str(http_response.read()), "usns": [ ] }
+            for entry in entries:
+                if (entry['type'] == "desc" and entry['url'] not in self.upnp_desc):
+                    usns = [ usn for usn in entry['usns'] if (usn in self.usns_restored) ]
 
-                        if (url in self.upnp_desc_unread): del(self.upnp_desc_unread[url])
+                    if (len(usns) > 0):
+                        self.upnp_desc[entry['url']] = { "xml_data": entry['xml_data'], "usns": usns }
 
                         for usn in usns:
-                            if (usn in self.usns and usn not in self.upnp_desc[url]['usns']):
-                                self.upnp_desc[url]['usns'].append(usn)
+                            self.usn_desc_urls[usn] = entry['url']
 
-                                Hook.call("dNG.pas.upnp.ControlPoint.onUsnAdded", identifier = self.usns[usn])
-                                if (self.usns[usn]['class'] == "device"): Hook.call("dNG.pas.upnp.ControlPoint.onDeviceAdded", identifier = self.usns[usn])
-                            #
+                            Hook.call("dNG.pas.upnp.ControlPoint.onUsnAdded", identifier = self.usns[usn])
+                            if (self.usns[usn]['class'] == "device"): Hook.call("dNG.pas.upnp.ControlPoint.onDeviceAdded", identifier = self.usns[usn])
                         #
                     #
-                else:
-                    if (self.log_handler is not None): self.log_handler.error(http_response.get_error_message(), context = "pas_upnp")
+                #
+            #
+
+            if (self.log_handler is not None): self.log_handler.info("pas.upnp.ControlPoint restored '{0:d}' USNs from the snapshot", len(self.usns_restored), context = "pas_upnp")
+        #
+    #
+
+    def _read_upnp_desc(self, url, usns, http_client):
+        """
+Reads and parses the UPnP description from the given URL.
+
+:param url: UPnP description URL
+:param usns: List of USNs announced with the UPnP description URL
+:param http_client: HTTP client instance to reuse; None to create a new one
+
+:return: (object) HTTP client instance used
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("{0!r} reads UPnP device description from '{1}'", self, url, context = "pas_upnp")
+
+        if (http_client is None):
+            http_client = HttpClient(url, self.upnp_desc_read_timeout, event_handler = self.log_handler)
+            http_client.set_ipv6_link_local_interface(Settings.get("pas_global_ipv6_link_local_interface"))
+        else: http_client.reset_headers()
+
+        http_client.set_header("Accept-Language", self.http_language)
+        http_client.set_header("User-Agent", ControlPoint.get_pas_upnp_http_client_identifier_string())
+
+        cached_desc = self.upnp_desc_cache.get(url)
+
+        if (cached_desc is not None):
+            if (cached_desc['etag'] is not None): http_client.set_header("If-None-Match", cached_desc['etag'])
+            if (cached_desc['last_modified'] is not None): http_client.set_header("If-Modified-Since", cached_desc['last_modified'])
+        #
+
+        try: http_response = http_client.request_get()
+        except Exception:
+            ControlPoint._close_http_client(http_client)
+            raise
+        #
+
+        if (cached_desc is not None and http_response.get_code() == 304):
+            if (self.log_handler is not None): self.log_handler.debug("{0!r} reuses unchanged UPnP device description from '{1}'", self, url, context = "pas_upnp")
+            xml_data = cached_desc['xml_data']
+        elif (http_response.is_readable()):
+            xml_data = Binary.raw_str(http_response.read())
+
+            etag = http_response.get_header("ETag")
+            last_modified = http_response.get_header("Last-Modified")
+
+            if (etag is not None or last_modified is not None):
+                self.upnp_desc_cache.set(url, { "etag": etag, "last_modified": last_modified, "xml_data": xml_data })
+            else: self.upnp_desc_cache.remove(url)
+        else: xml_data = None
+
+        if (xml_data is None):
+            if (self.log_handler is not None): self.log_handler.error(http_response.get_error_message(), context = "pas_upnp")
+            self._delete_usns(usns)
+
+            ControlPoint._close_http_client(http_client)
+            http_client = None
+        else:
+            with self.usns_lock.write("_read_upnp_desc"):
+                if (url not in self.upnp_desc): self.upnp_desc[url] = { "xml_data": xml_data, "usns": [ ] }
+                elif (self.upnp_desc[url]['xml_data'] != xml_data):
+                    self.upnp_desc[url]['xml_data'] = xml_data
+
+                    for usn in self.upnp_desc[url]['usns']:
+                        usn_data = self.usns.get(usn)
+                        if (usn_data is not None): self.rootdevice_cache.remove(( usn, usn_data['bootid'], usn_data['configid'] ))
+                    #
+                #
+
+                for usn in usns:
+                    if (usn in self.usns and usn not in self.upnp_desc[url]['usns']):
+                        usn_data = self.usns[usn]
+                        url_previously_read = self.usn_desc_urls.get(usn)
+
+                        if (url_previously_read is not None and url_previously_read != url):
+                            self._delete_upnp_desc(usn_data)
+                        #
+
+                        self.rootdevice_cache.remove(( usn, usn_data['bootid'], usn_data['configid'] ))
+
+                        self.upnp_desc[url]['usns'].append(usn)
+                        self.usn_desc_urls[usn] = url
+
+                        Hook.call("dNG.pas.upnp.ControlPoint.onUsnAdded", identifier = usn_data)
+                        if (usn_data['class'] == "device"): Hook.call("dNG.pas.upnp.ControlPoint.onDeviceAdded", identifier = usn_data)
+                    #
+                #
+            #
+        #
+
+        return http_client
+    #
+
+    def _read_upnp_descs(self):
+        """
+Starts worker threads to parse unread UPnP descriptions.
+
+:since: v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._read_upnp_descs()- (#echo(__LINE__)#)", self, context = "pas_upnp")
+
+        with self.upnp_desc_reading_lock:
+            workers_count = min(len(self.upnp_desc_unread),
+                                self.upnp_desc_read_workers_max - self.upnp_desc_read_workers
+                               )
+
+            for _ in range(0, workers_count):
+                self.upnp_desc_read_workers += 1
+                Thread(target = self._read_upnp_descs_worker).start()
+            #
+        #
+    #
+
+    def _read_upnp_descs_worker(self):
+        """
+Worker thread reading unread UPnP descriptions until no further one can be
+read without exceeding the number of concurrent requests per host.
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        while (True):
+            url = None
+
+            with self.upnp_desc_reading_lock:
+                for url_unread in self.upnp_desc_unread:
+                    host = urlsplit(url_unread).netloc.lower()
 
-                    with self.lock:
-                        if (url in self.upnp_desc_unread): del(self.upnp_desc_unread[url])
+                    if (self.upnp_desc_reading_hosts.get(host, 0) < self.upnp_desc_read_host_workers_max):
+                        url = url_unread
+                        break
                     #
+                #
+
+                if (url is None):
+                    self.upnp_desc_read_workers -= 1
 
-                    self._delete_usns(usns)
+                    if (self.upnp_desc_read_workers < 1
+                        and len(self.upnp_desc_unread) > 0
+                       ): self._add_task(0, "read_upnp_descs")
+
+                    break
                 #
+
+                usns = self.upnp_desc_unread.pop(url)
+                self.upnp_desc_reading[url] = usns
+                self.upnp_desc_reading_hosts[host] = 1 + self.upnp_desc_reading_hosts.get(host, 0)
+
+                http_client = self.upnp_desc_http_clients.get(url)
+                if (http_client is not None): self.upnp_desc_http_clients.remove(url)
+            #
+
+            try:
+                http_client = self._read_upnp_desc(url, usns, http_client)
+                if (http_client is not None): self.upnp_desc_http_clients.set(url, http_client)
             except Exception as handled_exception:
+                if (http_client is not None): ControlPoint._close_http_client(http_client)
                 if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_upnp")
+            finally:
+                with self.upnp_desc_reading_lock:
+                    if (url in self.upnp_desc_reading): del(self.upnp_desc_reading[url])
 
-                with self.lock:
-                    if (url in self.upnp_desc_unread): del(self.upnp_desc_unread[url])
+                    if (self.upnp_desc_reading_hosts.get(host, 0) > 1): self.upnp_desc_reading_hosts[host] -= 1
+                    elif (host in self.upnp_desc_reading_hosts): del(self.upnp_desc_reading_hosts[host])
                 #
             #
         #
-
-        with self.lock:
-            if (len(self.upnp_desc_unread) > 0): self._add_task(0, "read_upnp_descs")
-        #
     #
 
     def remove_device(self, device):
@@ -942,7 +1344,7 @@ Remove a device from the managed list and announce the change.
         _return = False
 
         if (isinstance(device, Device) and device.is_managed()):
-            with self.lock:
+            with self.usns_lock.write("remove_device"):
                 device_identifier = Device.get_identifier(device.get_usn(), self.bootid, self.configid)
 
                 if (device_identifier is not None and device_identifier['usn'] in self.usns):
@@ -955,7 +1357,7 @@ Remove a device from the managed list and announce the change.
                         if (device_identifier['uuid'] != uuid):
                             usn = "uuid:{0}::urn:{1}".format(self.managed_devices[uuid].get_udn(), self.managed_devices[uuid].get_urn())
 
-                            self._remove_task(usn, "deliver_event")
+                            self._cancel_events(usn)
 
                             event = ControlPointEvent(ControlPointEvent.TYPE_DEVICE_CONFIG_CHANGED, control_point = self)
                             event.set_usn(usn)
@@ -982,11 +1384,13 @@ Remove a rootdevice from the list of known root devices.
 
         identifier = Device.get_identifier(usn, self.bootid, self.configid)
 
-        with self.lock:
+        with self.usns_lock.write("remove_rootdevice"):
             if (identifier['device'] in self.rootdevices):
                 if (self.log_handler is not None): self.log_handler.debug("{0!r} removes UPnP root device USN '{1}'", self, usn, context = "pas_upnp")
 
                 self.rootdevices.remove(identifier['device'])
+                self.usns_seen.pop("uuid:{0}::upnp:rootdevice".format(identifier['uuid']), None)
+                self.usns_seen.pop(usn, None)
                 self._remove_task(usn, "remove_rootdevice")
             #
         #
@@ -1002,26 +1406,59 @@ Delete the USN from the list of UPnP descriptions.
 :since: v0.2.00
         """
 
-        # pylint: disable=no-member
-
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._remove_task({1})- (#echo(__LINE__)#)", self, usn, context = "pas_upnp")
 
-        with self.lock:
-            index = len(self.tasks)
+        with self.lock: self.tasks.remove(usn, _type)
+    #
 
-            if (index > 0):
-                tasks = (self.tasks.copy() if (hasattr(self.tasks, "copy")) else copy(self.tasks))
-                tasks.reverse()
+    def _renew_task_if_seen(self, usn, _type, **kwargs):
+        """
+Schedules the given task again if the USN has been announced again and its
+expiry time has been extended in the meantime.
 
-                for task in tasks:
-                    index -= 1
+:param usn: UPnP USN
+:param _type: Task type to be renewed
 
-                    if (_type is None or task['type'] == _type):
-                        if ("identifier" in task and usn == task['identifier']['usn']): self.tasks.pop(index)
-                        elif (usn == task.get("usn")): self.tasks.pop(index)
-                    #
-                #
-            #
+:return: (bool) True if the task has been scheduled again
+:since:  v0.2.00
+        """
+
+        # pylint: disable=star-args
+
+        usn_seen = self.usns_seen.get(usn)
+        _time = time()
+
+        _return = (usn_seen is not None and usn_seen[3] > _time)
+        if (_return): self._add_task(usn_seen[3] - _time, _type, **kwargs)
+
+        return _return
+    #
+
+    def _revalidate_restored_usn(self, identifier, location_url):
+        """
+Compares an USN restored from the snapshot with the values announced. All
+restored USNs of the device are deleted if it has been rebooted or changed
+in the meantime.
+
+:param identifier: Parsed UPnP identifier announced
+:param location_url: UPnP location URL announced
+
+:since: v0.2.00
+        """
+
+        usn_data = self.usns[identifier['usn']]
+        self.usns_restored.discard(identifier['usn'])
+
+        if (usn_data['bootid'] != identifier['bootid']
+            or usn_data['configid'] != identifier['configid']
+            or usn_data.get("url_desc", location_url) != location_url
+           ):
+            if (self.log_handler is not None): self.log_handler.debug("{0!r} invalidates restored UPnP device USN '{1}'", self, identifier['usn'], context = "pas_upnp")
+
+            usns = [ identifier['usn'] ]
+            if (identifier['device'] in self.devices): usns += self.devices[identifier['device']]
+
+            self._delete_usns([ usn for usn in usns if (usn in self.usns_restored or usn == identifier['usn']) ])
         #
     #
 
@@ -1038,7 +1475,7 @@ Timed task execution
 
         if (self.timer_active):
             with self.lock:
-                if (len(self.tasks) > 0 and self.tasks[0]['timestamp'] <= time()): task = self.tasks.pop(0)
+                task = self.tasks.pop(time())
                 AbstractTimed.run(self)
             #
         #
@@ -1047,15 +1484,82 @@ Timed task execution
             with ExceptionLogTrap("pas_upnp"):
                 if (self.log_handler is not None): self.log_handler.debug("{0!r} runs task type '{1}'", self, task['type'], context = "pas_upnp")
 
-                thread = None
+                if (task['type'] == "cancel_gena_subscriptions"):
+                    # Cancellation is done without holding the USN lock and skipped if the host has been announced again in the meantime
+                    with self.usns_lock.read("run"): is_ip_known = (task['ip'] in self.usns_by_ip)
+                    if (self.gena is not None and (not is_ip_known)): self.gena.cancel(None, task['ip'])
+                elif (task['type'] == "delete"):
+                    if (not self._renew_task_if_seen(task['identifier']['usn'], "delete", identifier = task['identifier'])): self._delete(task['identifier'])
+                #
+                elif (task['type'] == "read_upnp_descs"): self._read_upnp_descs()
+                elif (task['type'] == "remove_rootdevice"):
+                    if (not self._renew_task_if_seen(task['usn'], "remove_rootdevice", usn = task['usn'])): self.remove_rootdevice(task['usn'])
+                #
+            #
+        #
+    #
+
+    def _save_snapshot(self):
+        """
+Saves a snapshot of discovered USNs and UPnP descriptions to be restored on
+the next startup.
 
-                if (task['type'] == "delete"): self._delete(task['identifier'])
-                elif (task['type'] == "deliver_event"): thread = task['event']
-                elif (task['type'] == "read_upnp_descs"): thread = Thread(target = self._read_upnp_descs)
-                elif (task['type'] == "remove_rootdevice"): self.remove_rootdevice(task['usn'])
+:since: v0.2.00
+        """
 
-                if (thread is not None): thread.start()
+        # pylint: disable=broad-except
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._save_snapshot()- (#echo(__LINE__)#)", self, context = "pas_upnp")
+
+        json_resource = JsonResource()
+        lines = [ ]
+
+        with self.usns_lock.read("_save_snapshot"):
+            with self.lock:
+                delete_tasks = self.tasks.get_tasks("delete")
+                remove_rootdevice_tasks = self.tasks.get_tasks("remove_rootdevice")
             #
+
+            for ( timestamp, task ) in delete_tasks:
+                usn = task['identifier']['usn']
+
+                if (usn in self.usns and self.usns[usn]['uuid'] not in self.managed_devices):
+                    if (usn in self.usns_seen): timestamp = max(timestamp, self.usns_seen[usn][3])
+                    lines.append(json_resource.data_to_json({ "type": "usn", "expires": timestamp, "data": self.usns[usn].to_dict() }))
+                #
+            #
+
+            for ( timestamp, task ) in remove_rootdevice_tasks:
+                if (task['usn'] in self.usns_seen): timestamp = max(timestamp, self.usns_seen[task['usn']][3])
+                lines.append(json_resource.data_to_json({ "type": "rootdevice", "expires": timestamp, "usn": task['usn'] }))
+            #
+
+            for url in self.upnp_desc:
+                lines.append(json_resource.data_to_json({ "type": "desc",
+                                                          "url": url,
+                                                          "xml_data": self.upnp_desc[url]['xml_data'],
+                                                          "usns": self.upnp_desc[url]['usns']
+                                                        }))
+            #
+        #
+
+        file_path_temporary = "{0}.tmp".format(self.snapshot_file_path)
+        snapshot_directory_path = path.dirname(self.snapshot_file_path)
+
+        try:
+            if (not path.isdir(snapshot_directory_path)): os.makedirs(snapshot_directory_path)
+
+            with open(file_path_temporary, "wb") as file_object:
+                for line in lines: file_object.write(Binary.utf8_bytes("{0}\n".format(line)))
+            #
+
+            if (hasattr(os, "replace")): os.replace(file_path_temporary, self.snapshot_file_path)
+            else:
+                if (path.exists(self.snapshot_file_path)): os.unlink(self.snapshot_file_path)
+                os.rename(file_path_temporary, self.snapshot_file_path)
+            #
+        except Exception as handled_exception:
+            if (self.log_handler is not None): self.log_handler.warning(handled_exception, context = "pas_upnp")
         #
     #
 
@@ -1154,6 +1658,9 @@ Starts all UPnP listeners and announces itself.
         #
 
         AbstractTimed.start(self)
+
+        if (self.snapshot_file_path is not None and path.exists(self.snapshot_file_path)): self._load_snapshot()
+
         Hook.call("dNG.pas.upnp.ControlPoint.onStartup")
         if (self.log_handler is not None): self.log_handler.info("pas.upnp.ControlPoint starts with bootId '{0:d}' and configId '{1:d}'", self.bootid, self.configid, context = "pas_upnp")
 
@@ -1174,10 +1681,22 @@ Stops all UPnP listeners and deregisters itself.
 
         AbstractTimed.stop(self)
 
-        with self.lock:
+        if (self.snapshot_file_path is not None): self._save_snapshot()
+
+        with self.usns_lock.write("stop"):
             self._delete_usns(self.usns.copy())
+            self.rootdevice_cache.clear()
+            self.upnp_desc_http_clients.clear()
+
+            self.usn_desc_urls = { }
             self.usns = { }
+            self.usns_by_ip = { }
+            self.usns_by_type = { }
+            self.usns_restored = set()
+            self.usns_seen = { }
+        #
 
+        with self.lock:
             listeners_multicast = self.listeners_multicast.copy()
             for ip in listeners_multicast: self._deactivate_multicast_listener(ip)
         #
@@ -1185,6 +1704,32 @@ Stops all UPnP listeners and deregisters itself.
         return last_return
     #
 
+    def _unindex_usn(self, usn_data):
+        """
+Removes the given USN data from the IP address and type lookup indexes.
+
+:param usn_data: USN data
+
+:since: v0.2.00
+        """
+
+        usn = usn_data['usn']
+
+        for ip in usn_data.get("ips", [ ]):
+            if (ip in self.usns_by_ip and usn in self.usns_by_ip[ip]):
+                self.usns_by_ip[ip].remove(usn)
+                if (len(self.usns_by_ip[ip]) < 1): del(self.usns_by_ip[ip])
+            #
+        #
+
+        type_key = ( usn_data.get("class"), usn_data.get("type") )
+
+        if (type_key in self.usns_by_type):
+            self.usns_by_type[type_key].discard(usn)
+            if (len(self.usns_by_type[type_key]) < 1): del(self.usns_by_type[type_key])
+        #
+    #
+
     def _update(self, servername, identifier, bootid, bootid_old, configid, timeout, unicast_port, http_version, location_url, additional_data = None):
         """
 Update the list with the given parsed UPnP identifier.
@@ -1206,25 +1751,25 @@ Update the list with the given parsed UPnP identifier.
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._update({1}, {2:d}, {3:.1f}, {4})- (#echo(__LINE__)#)", self, servername, timeout, http_version, location_url, context = "pas_upnp")
 
         url_base = location_url.rsplit("/", 1)[0]
-        usn_data = identifier.copy()
-        usn_data.update({ "http_version": http_version, "ssdp_server_name": servername, "unicast_port": unicast_port })
         url_elements = urlsplit(url_base)
 
         is_url_desc_available = (url_elements.scheme != "ssdp")
 
-        if (is_url_desc_available):
-            usn_data['url_base'] = url_base
-            usn_data['url_desc'] = location_url
-        #
+        usn_data = identifier.replace(http_version = http_version,
+                                      ssdp_server_name = servername,
+                                      unicast_port = unicast_port,
+                                      url_base = (url_base if (is_url_desc_available) else None),
+                                      url_desc = (location_url if (is_url_desc_available) else None)
+                                     )
 
-        ip_address_list = (socket.getaddrinfo(url_elements.hostname, None)
+        ip_address_list = (ResolverCache.get_addrinfo(url_elements.hostname, None)
                            if (url_elements.scheme == "ssdp") else
-                           socket.getaddrinfo(url_elements.hostname,
-                                              url_elements.port,
-                                              socket.AF_UNSPEC,
-                                              0,
-                                              socket.IPPROTO_TCP
-                                             )
+                           ResolverCache.get_addrinfo(url_elements.hostname,
+                                                      url_elements.port,
+                                                      socket.AF_UNSPEC,
+                                                      0,
+                                                      socket.IPPROTO_TCP
+                                                     )
                           )
 
         if (len(ip_address_list) > 0):
@@ -1234,12 +1779,14 @@ Update the list with the given parsed UPnP identifier.
                 if (ip_address_data[0] == socket.AF_INET or ip_address_data[0] == socket.AF_INET6): ips.append(ip_address_data[4][0])
             #
 
-            if (len(ips) > 0): usn_data['ips'] = ips
+            if (len(ips) > 0): usn_data = usn_data.replace(ips = ips)
         #
 
-        with self.lock:
+        with self.usns_lock.write("_update"):
             if (self.log_handler is not None): self.log_handler.info("pas.upnp.ControlPoint updates USN '{0}'", identifier['usn'], context = "pas_upnp")
 
+            if (identifier['usn'] in self.usns_restored): self._revalidate_restored_usn(identifier, location_url)
+
             is_update = False
             read_config = True
 
@@ -1259,7 +1806,7 @@ Three possibilities:
                     elif (self.usns[identifier['usn']]['bootid'] != bootid_old): is_update = False
                     else:
                         read_config = False
-                        self.usns[identifier['usn']]['bootid'] = bootid
+                        self.usns[identifier['usn']] = self.usns[identifier['usn']].replace(bootid = bootid)
                     #
                 else: read_config = False
             elif (self.get_desc_xml(usn_data) is not None): read_config = False
@@ -1273,22 +1820,34 @@ Three possibilities:
 
             if (identifier['usn'] in self.usns):
                 if (is_update):
-                    self.usns[identifier['usn']].update(usn_data)
+                    self._unindex_usn(self.usns[identifier['usn']])
+                    self.usns[identifier['usn']] = self.usns[identifier['usn']].merge(usn_data)
+                    self._index_usn(self.usns[identifier['usn']])
+
                     self._remove_task(identifier['usn'], "delete")
                     self._add_task(1 + timeout, "delete", identifier = identifier)
+
+                    self.usns_seen[identifier['usn']] = ( bootid, configid, location_url, time() + 1 + timeout )
                 else: self._delete(identifier)
             else:
                 self.usns[identifier['usn']] = usn_data
+                self._index_usn(usn_data)
+
                 self._add_task(1 + timeout, "delete", identifier = identifier)
+                self.usns_seen[identifier['usn']] = ( bootid, configid, location_url, time() + 1 + timeout )
             #
 
             if (is_url_desc_available and read_config):
-                is_task_scheduled = (len(self.upnp_desc_unread) > 0)
+                with self.upnp_desc_reading_lock:
+                    is_task_scheduled = (len(self.upnp_desc_unread) > 0)
 
-                if (location_url not in self.upnp_desc_unread): self.upnp_desc_unread[location_url] = [ identifier['usn'] ]
-                elif (identifier['usn'] not in self.upnp_desc_unread[location_url]): self.upnp_desc_unread[location_url].append(identifier['usn'])
+                    if (location_url in self.upnp_desc_reading):
+                        if (identifier['usn'] not in self.upnp_desc_reading[location_url]): self.upnp_desc_reading[location_url].append(identifier['usn'])
+                    elif (location_url not in self.upnp_desc_unread): self.upnp_desc_unread[location_url] = [ identifier['usn'] ]
+                    elif (identifier['usn'] not in self.upnp_desc_unread[location_url]): self.upnp_desc_unread[location_url].append(identifier['usn'])
 
-                if (not is_task_scheduled): self._add_task(0, "read_upnp_descs")
+                    if ((not is_task_scheduled) and len(self.upnp_desc_unread) > 0): self._add_task(0, "read_upnp_descs")
+                #
             elif (not is_update):
                 Hook.call("dNG.pas.upnp.ControlPoint.onUsnAdded", identifier = identifier)
                 if (identifier['class'] == "device"): Hook.call("dNG.pas.upnp.ControlPoint.onDeviceAdded", identifier = identifier)
@@ -1314,13 +1873,47 @@ Update the list with the given USN.
 :since: v0.2.00
         """
 
-        if (len(usn) > 41):
+        if (bootid_old is None):
+            with self.notify_statistics_lock: self.notify_count += 1
+        #
+
+        is_short_circuited = False
+
+        if (bootid_old is None and usn in self.usns_seen):
+            rootdevice_identifier = (Device.get_identifier(usn) if (usn.endswith("::upnp:rootdevice")) else None)
+
+            # Readers only replace the "usns_seen" entry of their USN while changes are excluded
+            with self.usns_lock.read("update_usn"):
+                usn_seen = self.usns_seen.get(usn)
+
+                if (usn_seen is not None
+                    and usn_seen[0] == bootid
+                    and usn_seen[1] == configid
+                    and usn_seen[2] == location_url
+                   ):
+                    # Re-announcements of USNs deleted in the meantime are processed in full
+                    if (usn in self.usns): is_short_circuited = True
+                    elif (rootdevice_identifier is not None): is_short_circuited = (rootdevice_identifier['device'] in self.rootdevices)
+                #
+
+                # Unchanged ssdp:alive re-announcement only extends the expiry time
+                if (is_short_circuited): self.usns_seen[usn] = ( bootid, configid, location_url, time() + 1 + timeout )
+            #
+
+            if (is_short_circuited):
+                with self.notify_statistics_lock: self.notify_short_circuited_count += 1
+            #
+        #
+
+        if ((not is_short_circuited) and len(usn) > 41):
             identifier = Device.get_identifier(usn, bootid, configid)
 
             if (identifier is not None):
-                with self.lock:
+                with self.usns_lock.write("update_usn"):
                     if (identifier['uuid'] not in self.managed_devices):
-                        if (identifier['class'] == "rootdevice"): self.add_rootdevice(identifier['usn'], timeout)
+                        if (identifier['class'] == "rootdevice"):
+                            self.add_rootdevice(identifier['usn'], timeout)
+                            self.usns_seen[identifier['usn']] = ( bootid, configid, location_url, time() + 1 + timeout )
                         else: self._update(servername, identifier, bootid, bootid_old, configid, timeout, unicast_port, http_version, location_url, additional_data)
                     #
                 #
@@ -1328,6 +1921,23 @@ Update the list with the given USN.
         #
     #
 
+    @staticmethod
+    def _close_http_client(http_client):
+        """
+Closes the connection of an HTTP client not reused anymore.
+
+:param http_client: HTTP client instance
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        try:
+            if (hasattr(http_client, "disconnect")): http_client.disconnect()
+        except Exception: pass
+    #
+
     @staticmethod
     def get_instance():
         """
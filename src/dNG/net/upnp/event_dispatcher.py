@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import deque
+from threading import Condition, Thread
+from time import time
+from weakref import ref
+
+from dNG.data.settings import Settings
+from dNG.runtime.instance_lock import InstanceLock
+
+from .timing_wheel import TimingWheel
+
+class EventDispatcher(object):
+    """
+"EventDispatcher" delivers UPnP events with a bounded pool of worker
+threads. Delayed events are kept in a timing wheel until they are due.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    WORKER_IDLE_TIMEOUT = 30
+    """
+Seconds an idle worker thread waits for new events before it exits
+    """
+
+    _instance_lock = InstanceLock()
+    """
+Thread safety lock
+    """
+    _weakref_instance = None
+    """
+EventDispatcher weakref instance
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(EventDispatcher)
+
+:since: v0.2.00
+        """
+
+        self.delivered_count = 0
+        """
+Number of events delivered
+        """
+        self.queue = deque()
+        """
+Queue of events due for delivery
+        """
+        self.queue_condition = Condition()
+        """
+Condition used by worker threads to wait for events
+        """
+        self.queue_depth_max = 0
+        """
+Maximum number of events queued at the same time
+        """
+        self.timing_wheel = None
+        """
+Timing wheel of scheduled events
+        """
+        self.timing_wheel_condition = Condition()
+        """
+Condition used by the timing wheel thread to wait for scheduled events
+        """
+        self.timing_wheel_thread = None
+        """
+Thread advancing the timing wheel
+        """
+        self.workers = 0
+        """
+Number of worker threads
+        """
+        self.workers_idle = 0
+        """
+Number of worker threads waiting for events
+        """
+        self.workers_max = None
+        """
+Maximum number of worker threads
+        """
+
+        Settings.read_file("{0}/settings/pas_upnp.json".format(Settings.get("path_data")))
+
+        self.timing_wheel = TimingWheel(float(Settings.get("pas_upnp_event_timing_wheel_tick", 0.05)))
+        self.workers_max = max(1, int(Settings.get("pas_upnp_event_workers_max", 8)))
+    #
+
+    def cancel(self, usn):
+        """
+Cancels all scheduled events of the given USN not yet due.
+
+:param usn: UPnP USN
+
+:return: (int) Number of events cancelled
+:since:  v0.2.00
+        """
+
+        with self.timing_wheel_condition: _return = self.timing_wheel.remove(usn)
+        return _return
+    #
+
+    def deliver(self, event):
+        """
+Queues the given event for immediate delivery.
+
+:param event: UPnP event
+
+:since: v0.2.00
+        """
+
+        with self.queue_condition:
+            self.queue.append(event)
+            if (self.queue_depth_max < len(self.queue)): self.queue_depth_max = len(self.queue)
+
+            if (self.workers_idle < len(self.queue) and self.workers < self.workers_max):
+                self.workers += 1
+
+                thread = Thread(target = self._run_worker)
+                thread.daemon = True
+                thread.start()
+            else: self.queue_condition.notify()
+        #
+    #
+
+    def get_statistics(self):
+        """
+Returns the number of events delivered, queued and scheduled as well as the
+worker threads used.
+
+:return: (dict) Dict with "delivered", "queue_depth", "queue_depth_max",
+         "scheduled", "workers" and "workers_max"
+:since:  v0.2.00
+        """
+
+        with self.timing_wheel_condition: scheduled = len(self.timing_wheel)
+
+        with self.queue_condition:
+            _return = { "delivered": self.delivered_count,
+                        "queue_depth": len(self.queue),
+                        "queue_depth_max": self.queue_depth_max,
+                        "scheduled": scheduled,
+                        "workers": self.workers,
+                        "workers_max": self.workers_max
+                      }
+        #
+
+        return _return
+    #
+
+    def _run_timing_wheel(self):
+        """
+Thread advancing the timing wheel and delivering events due.
+
+:since: v0.2.00
+        """
+
+        while (True):
+            with self.timing_wheel_condition:
+                while (len(self.timing_wheel) < 1): self.timing_wheel_condition.wait()
+
+                self.timing_wheel_condition.wait(self.timing_wheel.tick)
+                events = self.timing_wheel.advance(time())
+            #
+
+            for event in events: self.deliver(event)
+        #
+    #
+
+    def _run_worker(self):
+        """
+Worker thread delivering queued events until no further one is queued
+within the idle timeout.
+
+:since: v0.2.00
+        """
+
+        while (True):
+            event = None
+
+            with self.queue_condition:
+                if (len(self.queue) < 1):
+                    self.workers_idle += 1
+                    self.queue_condition.wait(EventDispatcher.WORKER_IDLE_TIMEOUT)
+                    self.workers_idle -= 1
+                #
+
+                if (len(self.queue) < 1):
+                    self.workers -= 1
+                    break
+                #
+
+                event = self.queue.popleft()
+                self.delivered_count += 1
+            #
+
+            event.run()
+        #
+    #
+
+    def schedule(self, event, wait_timeout = 0):
+        """
+Schedules the given event for delivery after the given time.
+
+:param event: UPnP event
+:param wait_timeout: Time to wait before delivery
+
+:since: v0.2.00
+        """
+
+        if (wait_timeout > 0):
+            with self.timing_wheel_condition:
+                _time = time()
+                if (len(self.timing_wheel) < 1): self.timing_wheel.reset(_time)
+
+                self.timing_wheel.add(_time + wait_timeout, event, event.get_usn())
+
+                if (self.timing_wheel_thread is None):
+                    self.timing_wheel_thread = Thread(target = self._run_timing_wheel)
+                    self.timing_wheel_thread.daemon = True
+                    self.timing_wheel_thread.start()
+                else: self.timing_wheel_condition.notify()
+            #
+        else: self.deliver(event)
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the EventDispatcher singleton.
+
+:return: (EventDispatcher) Object on success
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with EventDispatcher._instance_lock:
+            if (EventDispatcher._weakref_instance is not None): _return = EventDispatcher._weakref_instance()
+
+            if (_return is None):
+                _return = EventDispatcher()
+                EventDispatcher._weakref_instance = ref(_return)
+            #
+        #
+
+        return _return
+    #
+#
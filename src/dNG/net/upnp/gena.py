@@ -43,14 +43,20 @@ import socket
 try: from urllib.parse import urlsplit
 except ImportError: from urlparse import urlsplit
 
+from dNG.data.settings import Settings
 from dNG.data.text.md5 import Md5
 from dNG.data.upnp.abstract_event import AbstractEvent
+from dNG.data.xml_resource import XmlResource
 from dNG.module.named_loader import NamedLoader
 from dNG.plugins.hook import Hook
 from dNG.runtime.instance_lock import InstanceLock
 from dNG.runtime.type_exception import TypeException
 from dNG.tasks.abstract_timed import AbstractTimed
 
+from .gena_notifier import GenaNotifier
+from .resolver_cache import ResolverCache
+from .task_heap import TaskHeap
+
 class Gena(AbstractTimed):
     """
 The UPnP GENA manager.
@@ -91,102 +97,36 @@ Constructor __init__(Gena)
 
         AbstractTimed.__init__(self)
 
-        self.subscriptions = { }
+        self.moderated_delta_window = 1
         """
-Active subscriptions
+Seconds changes of events moderated by delta only are coalesced at most
         """
-        self.timeouts = [ ]
+        self.ip_sids = { }
         """
-Active subscriptions
+Dict of subscribed client IPs with the set of SIDs subscribed
         """
-
-        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
-    #
-
-    def _approve_seq_for_event(self, event, sid):
+        self.notifier = GenaNotifier.get_instance()
         """
-Returns the notification sequence number if the event is approved.
-
-:param event: UPnP event instance
-:param sid: UPnP SID
-
-:return: (int) Sequence number
-:since:  v0.2.00
+GENA notification delivery engine
+        """
+        self.service_sids = { }
+        """
+Dict of UPnP service names with the set of SIDs subscribed
+        """
+        self.subscriptions = { }
+        """
+Dict of SIDs with their active subscription
+        """
+        self.timeouts = TaskHeap()
+        """
+Subscription expiries and moderated notifications queued by UNIX timestamp
         """
 
-        _return = None
-
-        if (not isinstance(event, AbstractEvent)): raise TypeException("Given event is invalid")
-
-        is_approved = False
-
-        moderated_delta = (event.get_moderated_delta()
-                           if (hasattr(event, "get_moderated_delta")) else
-                           0
-                          )
-
-        moderated_interval = (event.get_moderated_interval()
-                           if (hasattr(event, "get_moderated_interval")) else
-                           0
-                          )
-
-        variables_evented = (event.get_variables()
-                             if (hasattr(event, "get_variables")) else
-                             None
-                            )
-
-        usn = event.get_usn()
-        service_name = Gena.strip_usn_version(usn)
-
-        if (service_name in self.subscriptions):
-            with self.lock:
-                # Thread safety
-                if (service_name in self.subscriptions and sid in self.subscriptions[service_name]):
-                    moderated_subscription_delta = 0
-                    subscription = self.subscriptions[service_name][sid]
-                    _time = time()
-
-                    is_approved = (moderated_interval == 0 or subscription.get("time_updated", 0) + moderated_interval < _time)
-
-                    variables_subscribed = subscription.get("variables_subscribed")
-
-                    if (is_approved
-                        and variables_evented is not None
-                        and variables_subscribed != "*"
-                       ):
-                        is_variable_subscribed = False
-
-                        for variable_name in variables_evented:
-                            if (variable_name in variables_subscribed):
-                                is_variable_subscribed = True
-                                break
-                            #
-                        #
-
-                        if (not is_variable_subscribed): is_approved = False
-                    #
-
-                    if (is_approved and moderated_delta > 0):
-                        moderated_subscription_delta = subscription.get("moderated_delta", 0)
-                        moderated_subscription_delta += 1
-
-                        is_approved = (moderated_delta == 0 or subscription.get("moderated_delta", 0) >= moderated_delta)
-                        subscription['moderated_delta'] = moderated_subscription_delta
-                    #
-
-                    if (is_approved):
-                        _return = subscription['seq']
-
-                        subscription['seq'] += 1
-                        if (subscription['seq'] > Gena.SEQ_NUMBER_MAX): subscription['seq'] = 1
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
 
-                        subscription['time_updated'] = _time
-                    #
-                #
-            #
-        #
+        Settings.read_file("{0}/settings/pas_upnp.json".format(Settings.get("path_data")))
 
-        return _return
+        self.moderated_delta_window = float(Settings.get("pas_upnp_gena_moderated_delta_window", 1))
     #
 
     def cancel(self, usn, ip):
@@ -194,7 +134,7 @@ Returns the notification sequence number if the event is approved.
 Cancels all subscriptions based on the given IP. "deregister()" should be
 preferred if possible.
 
-:param usn: UPnP USN
+:param usn: UPnP USN; None to cancel subscriptions for all services
 :param ip: Subscribed client IP
 
 :return: (bool) True if at least one subscription has been canceled.
@@ -205,18 +145,15 @@ preferred if possible.
         _return = False
 
         with self.lock:
-            if (usn is None): subscriptions = self.subscriptions.copy()
-            elif (usn in self.subscriptions):
-                service_name = Gena.strip_usn_version(usn)
-                subscriptions = { service_name: self.subscriptions[service_name].copy() }
-            else: subscriptions = None
-
-            if (subscriptions is not None):
-                for service_name_subscribed in subscriptions:
-                    for sid in subscriptions[service_name_subscribed]:
-                        if (ip in subscriptions[service_name_subscribed][sid]['ips']): self.deregister(service_name_subscribed, sid)
-                        _return = True
-                    #
+            sids = set(self.ip_sids.get(ip, ( )))
+            if (usn is not None): sids.intersection_update(self.service_sids.get(Gena.strip_usn_version(usn), ( )))
+
+            for sid in sids:
+                subscription = self.subscriptions.get(sid)
+
+                if (subscription is not None):
+                    self.deregister(subscription['usn'], sid)
+                    _return = True
                 #
             #
         #
@@ -240,18 +177,27 @@ Removes the subscription identified by the given SID.
 
         service_name = Gena.strip_usn_version(usn)
 
-        if (service_name in self.subscriptions):
+        if (sid in self.subscriptions):
             with self.lock:
                 # Thread safety
-                if (service_name in self.subscriptions and sid in self.subscriptions[service_name]):
-                    del(self.subscriptions[service_name][sid])
-                    if (len(self.subscriptions[service_name]) < 1): del(self.subscriptions[service_name])
+                subscription = self.subscriptions.get(sid)
 
-                    for position in range(len(self.timeouts) - 1, -1, -1):
-                        timeout_entry = self.timeouts[position]
-                        if (timeout_entry['sid'] == sid): self.timeouts.pop(position)
+                if (subscription is not None and subscription['service_name'] == service_name):
+                    del(self.subscriptions[sid])
+
+                    self.service_sids[service_name].discard(sid)
+                    if (len(self.service_sids[service_name]) < 1): del(self.service_sids[service_name])
+
+                    for ip in subscription['ips']:
+                        if (ip in self.ip_sids):
+                            self.ip_sids[ip].discard(sid)
+                            if (len(self.ip_sids[ip]) < 1): del(self.ip_sids[ip])
+                        #
                     #
 
+                    self.timeouts.remove(sid)
+                    self.notifier.remove(sid)
+
                     _return = True
                 #
             #
@@ -265,6 +211,59 @@ Removes the subscription identified by the given SID.
         return _return
     #
 
+    def _flush(self, sid):
+        """
+Sends the changes coalesced for the given SID if the moderation window has
+been closed.
+
+:param sid: UPnP SID
+
+:since: v0.2.00
+        """
+
+        with self.lock:
+            subscription = self.subscriptions.get(sid)
+
+            if (subscription is not None):
+                subscription['flush_timestamp'] = None
+                self._flush_subscription(sid, subscription, time())
+            #
+        #
+    #
+
+    def _flush_subscription(self, sid, subscription, timestamp):
+        """
+Queues a single e:propertyset containing the latest values of all changes
+coalesced for the given subscription. The caller has to hold the lock.
+
+:param sid: UPnP SID
+:param subscription: Subscription information
+:param timestamp: UNIX timestamp the moderation window is reset to
+
+:since: v0.2.00
+        """
+
+        variables = subscription['variables_pending']
+
+        if (subscription['flush_timestamp'] is not None):
+            self.timeouts.remove(sid, "flush")
+            subscription['flush_timestamp'] = None
+        #
+
+        if (len(variables) > 0):
+            seq = subscription['seq']
+
+            subscription['changes_pending'] = 0
+            subscription['seq'] += 1
+            if (subscription['seq'] > Gena.SEQ_NUMBER_MAX): subscription['seq'] = 1
+
+            subscription['time_updated'] = timestamp
+            subscription['variables_pending'] = { }
+
+            self.notifier.queue(sid, subscription['usn'], subscription['callback_urls'], seq, Gena._get_propertyset_xml(variables))
+        #
+    #
+
     def _get_next_update_timestamp(self):
         """
 Get the implementation specific next "run()" UNIX timestamp.
@@ -277,10 +276,7 @@ Get the implementation specific next "run()" UNIX timestamp.
         _return = -1
 
         if (len(self.timeouts) > 0):
-            with self.lock:
-                # Thread safety
-                if (len(self.timeouts) > 0): _return = self.timeouts[0]['timestamp']
-            #
+            with self.lock: _return = self.timeouts.get_next_timestamp()
         #
 
         return _return
@@ -297,18 +293,7 @@ Returns the subscription identified by the given SID.
         """
 
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_subscriber({1})- (#echo(__LINE__)#)", self, sid, context = "pas_upnp")
-        _return = None
-
-        subscriptions = self.subscriptions.copy()
-
-        for service_name_subscribed in subscriptions:
-            if (sid in subscriptions[service_name_subscribed]):
-                _return = subscriptions[service_name_subscribed][sid]
-                break
-            #
-        #
-
-        return _return
+        return self.subscriptions.get(sid)
     #
 
     def get_subscribers(self, usn):
@@ -324,12 +309,98 @@ Returns a list of subscriptions identified by the given USN.
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_subscribers({1})- (#echo(__LINE__)#)", self, usn, context = "pas_upnp")
 
         service_name = Gena.strip_usn_version(usn)
-        subscriptions = self.subscriptions.copy()
 
-        return subscriptions.get(service_name, { })
+        with self.lock:
+            _return = dict(( sid, self.subscriptions[sid] ) for sid in self.service_sids.get(service_name, ( )))
+        #
+
+        return _return
+    #
+
+    def queue_event(self, event, sid, moderated = True):
+        """
+Queues the upnp:propchange variables of the given event for the subscriber.
+Changes within the moderation window are merged with the latest value
+winning and sent as a single notification once the window is closed.
+
+:param event: UPnP event instance
+:param sid: UPnP SID
+:param moderated: False to send all pending changes immediately (e.g. for
+                  the initial event of a subscription)
+
+:return: (bool) True if queued
+:since:  v0.2.00
+        """
+
+        if (not isinstance(event, AbstractEvent)): raise TypeException("Given event is invalid")
+
+        _return = False
+
+        moderated_delta = (event.get_moderated_delta()
+                           if (moderated and hasattr(event, "get_moderated_delta")) else
+                           0
+                          )
+
+        moderated_interval = (event.get_moderated_interval()
+                              if (moderated and hasattr(event, "get_moderated_interval")) else
+                              0
+                             )
+
+        variables_evented = (event.get_variables()
+                             if (hasattr(event, "get_variables")) else
+                             None
+                            )
+
+        if (variables_evented is None): variables_evented = { }
+        variables_names = frozenset(variables_evented)
+
+        is_next_timeout = False
+        service_name = Gena.strip_usn_version(event.get_usn())
+        timestamp = -1
+
+        with self.lock:
+            subscription = self.subscriptions.get(sid)
+
+            if (subscription is not None and subscription['service_name'] == service_name):
+                variables_subscribed = subscription['variables_subscribed']
+
+                if (variables_subscribed == "*"):
+                    variables_changed = variables_evented
+                    _return = True
+                elif (not variables_subscribed.isdisjoint(variables_names)):
+                    variables_changed = dict(( name, variables_evented[name] ) for name in variables_subscribed.intersection(variables_names))
+                    _return = True
+                #
+            #
+
+            if (_return):
+                _time = time()
+
+                subscription['changes_pending'] += 1
+                subscription['variables_pending'].update(variables_changed)
+
+                if (subscription['time_updated'] + moderated_interval <= _time
+                    and subscription['changes_pending'] >= moderated_delta
+                   ): self._flush_subscription(sid, subscription, _time)
+                elif (subscription['flush_timestamp'] is None):
+                    # Changes not reaching the delta are sent at the latest
+                    # after the moderation window to not lose the final state
+                    timestamp = (subscription['time_updated'] + moderated_interval
+                                 if (moderated_delta < 1) else
+                                 max(subscription['time_updated'] + moderated_interval, _time + self.moderated_delta_window)
+                                )
+
+                    subscription['flush_timestamp'] = timestamp
+                    is_next_timeout = self.timeouts.add(timestamp, "flush", ( "flush", subscription['usn'], sid ), sid)
+                #
+            #
+        #
+
+        if (is_next_timeout): self.update_timestamp(timestamp)
+        return _return
     #
 
-    def register(self, usn, callback_value, timeout, variables = None):
+    def register(self, usn, callback_value, timeout, variables = None, variables_evented = None):
         """
 Registers a callback URL endpoint for notifications for the given service
 name.
@@ -338,6 +409,8 @@ name.
 :param callback_value: Endpoint URL(s) for notification messages
 :param timeout: Timeout in seconds for the subscription
 :param variables: CSV of UPnP state variables interested in
+:param variables_evented: Names of the variables evented by the service to
+                          validate the ones requested against
 
 :return: (bool) True if successful
 :since:  v0.2.00
@@ -345,82 +418,91 @@ name.
 
         _return = None
 
-        index = 1
+        is_next_timeout = False
         timestamp = -1
         variables = ("" if (variables is None) else variables.strip())
 
         callback_urls = Gena.RE_CALLBACK_URL_ELEMENTS.findall(callback_value)
+        service_name = Gena.strip_usn_version(usn)
 
         if (len(callback_urls) > 1):
             sorted_callback_urls = (callback_urls.copy() if (hasattr(callback_urls, "copy")) else copy(callback_urls))
             sorted_callback_urls.sort()
 
-            sid = "uuid:{0}".format(uuid(NAMESPACE_URL, "upnp-gena://{0}/{1}".format(socket.getfqdn(), Md5.hash(" ".join(sorted_callback_urls)))))
-        else: sid = "uuid:{0}".format(uuid(NAMESPACE_URL, "upnp-gena://{0}/{1}".format(socket.getfqdn(), Md5.hash(callback_value))))
+            callback_hash = Md5.hash(" ".join(sorted_callback_urls))
+        else: callback_hash = Md5.hash(callback_value)
+
+        # SIDs are unique per service as subscriptions are indexed by SID only
+        sid = "uuid:{0}".format(uuid(NAMESPACE_URL, "upnp-gena://{0}/{1}/{2}".format(socket.getfqdn(), service_name, callback_hash)))
 
-        service_name = Gena.strip_usn_version(usn)
         variables_subscribed = "*"
 
         if (variables != ""):
-            # TODO: Implementation missing
-            pass
+            variables_subscribed = frozenset(variable.strip() for variable in variables.split(",") if (variable.strip() != ""))
+
+            if (len(variables_subscribed) < 1
+                or (variables_evented is not None and (not variables_subscribed.issubset(variables_evented)))
+               ):
+                if (self.log_handler is not None): self.log_handler.debug("{0!r} rejects subscription for '{1}' with invalid variables '{2}'", self, usn, variables, context = "pas_upnp")
+                variables_subscribed = None
+            #
         #
 
-        with self.lock:
-            if (service_name not in self.subscriptions): self.subscriptions[service_name] = { }
-
-            if (sid not in self.subscriptions[service_name]):
-                self.subscriptions[service_name][sid] = { "callback_urls": callback_urls,
-                                                          "ips": [ ],
-                                                          "seq": 0,
-                                                          "variables_subscribed": variables_subscribed
-                                                        }
-
-                for callback_url in callback_urls:
-                    url_elements = urlsplit(callback_url)
-
-                    try:
-                        ip_address_list = socket.getaddrinfo(url_elements.hostname,
-                                                             url_elements.port,
-                                                             socket.AF_UNSPEC,
-                                                             0,
-                                                             socket.IPPROTO_TCP
-                                                            )
-
-                        if (len(ip_address_list) > 0):
-                            ips = [ ]
-
-                            for ip_address_data in ip_address_list:
-                                if (ip_address_data[0] == socket.AF_INET or ip_address_data[0] == socket.AF_INET6): ips.append(ip_address_data[4][0])
-                            #
-
-                            if (len(ips) > 0): self.subscriptions[service_name][sid]['ips'] += ips
-                        #
-                    except socket.error as handled_exception:
-                        if (self.log_handler is not None): self.log_handler.error(handled_exception)
-                    #
-                #
+        if (variables_subscribed is not None and sid not in self.subscriptions):
+            ips = [ ]
 
-                index = len(self.timeouts)
-                timestamp = int(time() + timeout + 1)
+            for callback_url in callback_urls:
+                url_elements = urlsplit(callback_url)
 
-                if (index > 0):
-                    for position in range(index - 1, -1, -1):
-                        if (timestamp > self.timeouts[position]['timestamp']):
-                            index = position
-                            break
-                        #
+                try:
+                    ip_address_list = ResolverCache.get_addrinfo(url_elements.hostname,
+                                                                 url_elements.port,
+                                                                 socket.AF_UNSPEC,
+                                                                 0,
+                                                                 socket.IPPROTO_TCP
+                                                                )
+
+                    for ip_address_data in ip_address_list:
+                        if (ip_address_data[0] == socket.AF_INET or ip_address_data[0] == socket.AF_INET6): ips.append(ip_address_data[4][0])
                     #
+                except socket.error as handled_exception:
+                    if (self.log_handler is not None): self.log_handler.error(handled_exception)
                 #
+            #
+
+            with self.lock:
+                if (sid not in self.subscriptions):
+                    self.subscriptions[sid] = { "callback_urls": callback_urls,
+                                                "changes_pending": 0,
+                                                "flush_timestamp": None,
+                                                "ips": ips,
+                                                "seq": 0,
+                                                "service_name": service_name,
+                                                "time_updated": 0,
+                                                "usn": usn,
+                                                "variables_pending": { },
+                                                "variables_subscribed": variables_subscribed
+                                              }
+
+                    if (service_name not in self.service_sids): self.service_sids[service_name] = set()
+                    self.service_sids[service_name].add(sid)
+
+                    for ip in ips:
+                        if (ip not in self.ip_sids): self.ip_sids[ip] = set()
+                        self.ip_sids[ip].add(sid)
+                    #
+
+                    timestamp = int(time() + timeout + 1)
+                    is_next_timeout = self.timeouts.add(timestamp, "deregister", ( "deregister", usn, sid ), sid)
 
-                self.timeouts.insert(index, { "timestamp": timestamp, "usn": usn, "sid": sid })
-                if (self.log_handler is not None): self.log_handler.debug("{0!r} adds subscription '{1}' for '{2}' with callback URL value '{3}' and timeout '{4:d}'", self, sid, usn, " ".join(callback_urls), timeout, context = "pas_upnp")
+                    if (self.log_handler is not None): self.log_handler.debug("{0!r} adds subscription '{1}' for '{2}' with callback URL value '{3}' and timeout '{4:d}'", self, sid, usn, " ".join(callback_urls), timeout, context = "pas_upnp")
 
-                _return = sid
+                    _return = sid
+                #
             #
         #
 
-        if (index < 1): self.update_timestamp(timestamp)
+        if (is_next_timeout): self.update_timestamp(timestamp)
         if (_return is not None): Hook.call("dNG.pas.upnp.Gena.onRegistered", usn = usn, sid = _return)
 
         return _return
@@ -441,33 +523,27 @@ Renews an subscription identified by the given SID.
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.reregister({1}, {2}, {3:d})- (#echo(__LINE__)#)", self, usn, sid, timeout, context = "pas_upnp")
         _return = False
 
-        index = 1
+        is_next_timeout = False
         service_name = Gena.strip_usn_version(usn)
         timestamp = -1
 
-        if (service_name in self.subscriptions):
+        if (sid in self.subscriptions):
             with self.lock:
                 # Thread safety
-                if (service_name in self.subscriptions and sid in self.subscriptions[service_name]):
-                    index = None
-                    timestamp = int(time() + timeout + 1)
+                subscription = self.subscriptions.get(sid)
 
-                    for position in range(len(self.timeouts) - 1, -1, -1):
-                        timeout_entry = self.timeouts[position]
-
-                        if (timeout_entry['sid'] == sid): self.timeouts.pop(position)
-                        elif (index is None and timestamp > timeout_entry['timestamp']): index = position
-                    #
+                if (subscription is not None and subscription['service_name'] == service_name):
+                    timestamp = int(time() + timeout + 1)
 
-                    if (index is None): index = len(self.timeouts)
-                    self.timeouts.insert(index, { "timestamp": timestamp, "usn": usn, "sid": sid })
+                    self.timeouts.remove(sid, "deregister")
+                    is_next_timeout = self.timeouts.add(timestamp, "deregister", ( "deregister", usn, sid ), sid)
 
                     _return = True
                 #
             #
         #
 
-        if (index < 1): self.update_timestamp(timestamp)
+        if (is_next_timeout): self.update_timestamp(timestamp)
         return _return
     #
 
@@ -478,21 +554,29 @@ Timed task execution
 :since: v0.2.00
         """
 
-        timeout_entry = None
+        timeout_entries = [ ]
 
         if (self.timer_active):
             with self.lock:
                 # Thread safety
-                if (self.timer_active
-                    and len(self.timeouts) > 0
-                    and int(self.timeouts[0]['timestamp']) <= time()
-                   ): timeout_entry = self.timeouts.pop(0)
+                if (self.timer_active):
+                    _time = time()
+                    timeout_entry = self.timeouts.pop(_time)
+
+                    while (timeout_entry is not None):
+                        timeout_entries.append(timeout_entry)
+                        timeout_entry = self.timeouts.pop(_time)
+                    #
+                #
 
                 AbstractTimed.run(self)
             #
         #
 
-        if (timeout_entry is not None): self.deregister(timeout_entry['usn'], timeout_entry['sid'])
+        for ( _type, usn, sid ) in timeout_entries:
+            if (_type == "flush"): self._flush(sid)
+            else: self.deregister(usn, sid)
+        #
     #
 
     def start(self, params = None, last_return = None):
@@ -507,7 +591,10 @@ Starts the GENA manager.
 
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.start()- (#echo(__LINE__)#)", self, context = "pas_upnp")
 
+        self.ip_sids = { }
+        self.service_sids = { }
         self.subscriptions = { }
+        self.timeouts.clear()
 
         return AbstractTimed.start(self)
     #
@@ -535,6 +622,31 @@ Get the GENA singleton.
         return _return
     #
 
+    @staticmethod
+    def _get_propertyset_xml(variables):
+        """
+Returns the XML encoded e:propertyset for the given variables.
+
+:param variables: Dictionary of UPnP state variables changed
+
+:return: (str) XML encoded e:propertyset
+:since:  v0.2.00
+        """
+
+        xml_resource = XmlResource()
+        xml_resource.set_cdata_encoding(False)
+
+        xml_resource.add_node("e:propertyset", attributes = { "xmlns:e": "urn:schemas-upnp-org:event-1-0" })
+
+        xml_base_path = "e:propertyset e:property"
+        xml_resource.add_node(xml_base_path)
+        xml_resource.set_cached_node(xml_base_path)
+
+        for key in variables: xml_resource.add_node("{0} {1}".format(xml_base_path, key), variables[key])
+
+        return "<?xml version='1.0' encoding='UTF-8' ?>{0}".format(xml_resource.export_cache(True))
+    #
+
     @staticmethod
     def strip_usn_version(usn):
         """
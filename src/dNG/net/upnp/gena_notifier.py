@@ -0,0 +1,565 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import deque
+from threading import Condition, Thread
+from time import time
+from weakref import ref
+
+try: from urllib.parse import urlsplit
+except ImportError: from urlparse import urlsplit
+
+from dNG.data.settings import Settings
+from dNG.data.upnp.lru_cache import LruCache
+from dNG.module.named_loader import NamedLoader
+from dNG.net.http.client import Client as HttpClient
+from dNG.runtime.instance_lock import InstanceLock
+
+from .task_heap import TaskHeap
+
+class GenaNotifier(object):
+    """
+"GenaNotifier" delivers GENA notifications with a bounded pool of worker
+threads. Each SID has its own queue processed by at most one worker at a
+time to preserve the SEQ order. Idle HTTP clients are kept per callback URL
+to reuse their connections. Callback hosts failing are suspended with an
+exponential backoff. Notifications of a SID are kept and retried once its
+hosts are no longer suspended. The oldest notifications of a SID are
+dropped if its queue is full as subscribers only need the latest state.
+Subscriptions failing repeatedly are cancelled.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    HOSTS_FAILED_MAX = 256
+    """
+Maximum number of failed callback hosts tracked
+    """
+    WORKER_IDLE_TIMEOUT = 30
+    """
+Seconds an idle worker thread waits for new notifications before it exits
+    """
+
+    _instance_lock = InstanceLock()
+    """
+Thread safety lock
+    """
+    _weakref_instance = None
+    """
+GenaNotifier weakref instance
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(GenaNotifier)
+
+:since: v0.2.00
+        """
+
+        self.backoff = None
+        """
+Seconds a callback host is suspended after its first failure
+        """
+        self.backoff_max = None
+        """
+Maximum seconds a callback host is suspended
+        """
+        self.condition = Condition()
+        """
+Condition used by worker threads to wait for notifications
+        """
+        self.failures_max = None
+        """
+Consecutive delivery failures before a subscription is cancelled
+        """
+        self.hosts_failed = LruCache(GenaNotifier.HOSTS_FAILED_MAX)
+        """
+Callback hosts with their number of consecutive failures and the UNIX
+timestamp sending is suspended until
+        """
+        self.http_clients = None
+        """
+Idle HTTP clients per callback URL
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.queue_max = None
+        """
+Maximum number of pending notifications per SID
+        """
+        self.queues = { }
+        """
+Dict of SIDs with their queue of pending notifications
+        """
+        self.sids_delayed = TaskHeap()
+        """
+SIDs with pending notifications queued by the UNIX timestamp their callback
+hosts are retried at
+        """
+        self.sids_queued = set()
+        """
+Set of SIDs with pending notifications or a notification being sent
+        """
+        self.sids_ready = deque()
+        """
+Queue of SIDs with pending notifications not being processed by a worker
+        """
+        self.statistics = { }
+        """
+Dict of SIDs with their delivery statistics
+        """
+        self.timeout = None
+        """
+Timeout in seconds for each notification request
+        """
+        self.workers = 0
+        """
+Number of worker threads
+        """
+        self.workers_idle = 0
+        """
+Number of worker threads waiting for notifications
+        """
+        self.workers_max = None
+        """
+Maximum number of worker threads
+        """
+
+        Settings.read_file("{0}/settings/pas_upnp.json".format(Settings.get("path_data")))
+
+        self.backoff = float(Settings.get("pas_upnp_gena_notify_backoff", 2))
+        self.backoff_max = float(Settings.get("pas_upnp_gena_notify_backoff_max", 300))
+        self.failures_max = int(Settings.get("pas_upnp_gena_notify_failures_max", 5))
+        self.http_clients = LruCache(int(Settings.get("pas_upnp_gena_notify_connections_max", 32)), GenaNotifier._disconnect_http_client)
+        self.queue_max = max(1, int(Settings.get("pas_upnp_gena_notify_queue_max", 32)))
+        self.timeout = int(Settings.get("pas_upnp_gena_notify_timeout", 2))
+        self.workers_max = max(1, int(Settings.get("pas_upnp_gena_notify_workers_max", 8)))
+    #
+
+    def get_statistics(self, sid = None):
+        """
+Returns the delivery statistics of the given or all subscribers.
+
+:param sid: UPnP SID; None for all
+
+:return: (dict) Dict with "delivered", "dropped" (notifications replaced
+         by newer ones in a full queue), "failed", "failed_consecutive",
+         "fallbacks", "latency_avg", "latency_max", "queued" and
+         "suspended" (notifications deferred as all callback hosts have been
+         suspended) of the SID given; Dict of SIDs with their statistics
+         otherwise
+:since:  v0.2.00
+        """
+
+        with self.condition:
+            if (sid is None):
+                _return = dict(( statistics_sid, self._get_statistics(statistics_sid) ) for statistics_sid in self.statistics)
+            else: _return = (self._get_statistics(sid) if (sid in self.statistics) else None)
+        #
+
+        return _return
+    #
+
+    def _get_statistics(self, sid):
+        """
+Returns a copy of the delivery statistics of the given subscriber.
+
+:param sid: UPnP SID
+
+:return: (dict) Delivery statistics
+:since:  v0.2.00
+        """
+
+        statistics = self.statistics[sid]
+
+        return { "delivered": statistics['delivered'],
+                 "dropped": statistics['dropped'],
+                 "failed": statistics['failed'],
+                 "failed_consecutive": statistics['failed_consecutive'],
+                 "fallbacks": statistics['fallbacks'],
+                 "latency_avg": (statistics['latency_sum'] / statistics['delivered'] if (statistics['delivered'] > 0) else None),
+                 "latency_max": statistics['latency_max'],
+                 "queued": len(self.queues.get(sid, ( ))),
+                 "suspended": statistics['suspended']
+               }
+    #
+
+    def _get_retry_timestamp(self, callback_urls):
+        """
+Returns the UNIX timestamp the first of the given callback URLs is no longer
+suspended at. The caller has to hold the condition lock.
+
+:param callback_urls: List of callback URLs
+
+:return: (float) UNIX timestamp
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        for callback_url in callback_urls:
+            host_failed = self.hosts_failed.get(urlsplit(callback_url).netloc)
+            timestamp_retry = (time() + self.backoff if (host_failed is None) else host_failed['timestamp_retry'])
+
+            if (_return is None or _return > timestamp_retry): _return = timestamp_retry
+        #
+
+        return _return
+    #
+
+    def queue(self, sid, usn, callback_urls, seq, xml_data):
+        """
+Queues a upnp:propchange notification for the given subscriber.
+Notifications of the same SID are sent in the order they are queued. The
+oldest pending one is dropped if the queue of the SID is full.
+
+:param sid: UPnP SID
+:param usn: UPnP USN
+:param callback_urls: List of callback URLs
+:param seq: GENA notification sequence number
+:param xml_data: XML encoded e:propertyset
+
+:since: v0.2.00
+        """
+
+        with self.condition:
+            if (sid not in self.statistics):
+                self.statistics[sid] = { "delivered": 0,
+                                         "dropped": 0,
+                                         "failed": 0,
+                                         "failed_consecutive": 0,
+                                         "fallbacks": 0,
+                                         "latency_max": 0,
+                                         "latency_sum": 0,
+                                         "suspended": 0
+                                       }
+            #
+
+            if (sid not in self.queues): self.queues[sid] = deque(maxlen = self.queue_max)
+            queue = self.queues[sid]
+
+            if (len(queue) >= self.queue_max): self.statistics[sid]['dropped'] += 1
+            queue.append(( usn, callback_urls, seq, xml_data ))
+
+            if (sid not in self.sids_queued):
+                self.sids_queued.add(sid)
+                self.sids_ready.append(sid)
+
+                if (self.workers_idle < len(self.sids_ready) and self.workers < self.workers_max):
+                    self.workers += 1
+
+                    thread = Thread(target = self._run_worker)
+                    thread.daemon = True
+                    thread.start()
+                else: self.condition.notify()
+            #
+        #
+    #
+
+    def remove(self, sid):
+        """
+Removes pending notifications and statistics of the given subscriber.
+
+:param sid: UPnP SID
+
+:since: v0.2.00
+        """
+
+        with self.condition:
+            self.queues.pop(sid, None)
+            self.statistics.pop(sid, None)
+
+            if (self.sids_delayed.remove(sid) > 0): self.sids_queued.discard(sid)
+        #
+    #
+
+    def _run_worker(self):
+        """
+Worker thread sending notifications until no further one is queued within
+the idle timeout. Each worker takes one notification of the next SID ready
+to keep the delivery fair between subscribers.
+
+:since: v0.2.00
+        """
+
+        while (True):
+            with self.condition:
+                if (len(self.sids_ready) < 1):
+                    timeout = GenaNotifier.WORKER_IDLE_TIMEOUT
+                    timestamp_delayed = self.sids_delayed.get_next_timestamp()
+
+                    if (timestamp_delayed > -1): timeout = max(0, min(timeout, timestamp_delayed - time()))
+
+                    self.workers_idle += 1
+                    self.condition.wait(timeout)
+                    self.workers_idle -= 1
+                #
+
+                self._schedule_delayed_sids()
+
+                if (len(self.sids_ready) < 1):
+                    # Workers are kept as long as SIDs are delayed
+                    if (len(self.sids_delayed) > 0): continue
+
+                    self.workers -= 1
+                    break
+                #
+
+                sid = self.sids_ready.popleft()
+                queue = self.queues.get(sid)
+
+                notification = (queue.popleft() if (queue is not None and len(queue) > 0) else None)
+            #
+
+            timestamp_retry = (None if (notification is None) else self._send(sid, notification))
+
+            with self.condition:
+                queue_current = self.queues.get(sid)
+
+                # Retries are dropped if the subscriber has been removed or registered again in the meantime
+                if (timestamp_retry is not None and queue_current is not None and queue_current is queue):
+                    # A full queue contains newer notifications superseding the one failed
+                    if (len(queue) < self.queue_max): queue.appendleft(notification)
+                    elif (sid in self.statistics): self.statistics[sid]['dropped'] += 1
+
+                    self.sids_delayed.add(timestamp_retry, "retry", sid, sid)
+                elif (queue_current is not None and len(queue_current) > 0): self.sids_ready.append(sid)
+                else:
+                    self.queues.pop(sid, None)
+                    self.sids_queued.discard(sid)
+                #
+            #
+        #
+    #
+
+    def _schedule_delayed_sids(self):
+        """
+Moves SIDs delayed until now to the queue of SIDs ready. The caller has to
+hold the condition lock.
+
+:since: v0.2.00
+        """
+
+        _time = time()
+        sid = self.sids_delayed.pop(_time)
+
+        while (sid is not None):
+            self.sids_ready.append(sid)
+            sid = self.sids_delayed.pop(_time)
+        #
+    #
+
+    def _send(self, sid, notification):
+        """
+Sends the given notification to the first callback URL accepting it.
+Callback hosts suspended after failures are skipped without connecting.
+
+:param sid: UPnP SID
+:param notification: Tuple of USN, callback URLs, SEQ and XML data
+
+:return: (float) UNIX timestamp to retry the notification at; None if
+         delivered or the subscription has been cancelled
+:since:  v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        ( usn, callback_urls, seq, xml_data ) = notification
+
+        _return = None
+
+        is_attempted = False
+        is_cancelled = False
+        is_delivered = False
+        fallbacks = 0
+        timestamp = time()
+
+        for callback_url in callback_urls:
+            host = urlsplit(callback_url).netloc
+
+            with self.condition:
+                host_failed = self.hosts_failed.get(host)
+
+                if (host_failed is not None):
+                    if (host_failed['timestamp_retry'] > timestamp): host = None
+                    # Only one notification probes a host after its backoff
+                    else: host_failed['timestamp_retry'] = timestamp + self.timeout
+                #
+
+                http_client = (None if (host is None) else self.http_clients.get(callback_url))
+                if (http_client is not None): self.http_clients.remove(callback_url)
+            #
+
+            if (host is None):
+                fallbacks += 1
+                continue
+            #
+
+            is_attempted = True
+
+            if (http_client is None): http_client = HttpClient(callback_url, self.timeout)
+            else: http_client.reset_headers()
+
+            http_client.set_header("Content-Type", "text/xml; charset=UTF-8")
+            http_client.set_header("USN", usn)
+            http_client.set_header("SID", sid)
+            http_client.set_header("NT", "upnp:event")
+            http_client.set_header("NTS", "upnp:propchange")
+            http_client.set_header("SEQ", seq)
+
+            try:
+                response = http_client.request("NOTIFY", data = xml_data)
+                is_delivered = response.is_readable()
+            except Exception as handled_exception:
+                if (self.log_handler is not None): self.log_handler.debug(handled_exception, context = "pas_upnp")
+            #
+
+            with self.condition:
+                if (is_delivered):
+                    self.hosts_failed.remove(host)
+                    self.http_clients.set(callback_url, http_client)
+                else: self._suspend_host(host)
+            #
+
+            if (not is_delivered): GenaNotifier._disconnect_http_client(http_client)
+
+            if (is_delivered): break
+            fallbacks += 1
+        #
+
+        latency = time() - timestamp
+
+        with self.condition:
+            statistics = self.statistics.get(sid)
+
+            if (statistics is not None):
+                if (is_delivered):
+                    statistics['delivered'] += 1
+                    statistics['failed_consecutive'] = 0
+                    statistics['fallbacks'] += fallbacks
+                    statistics['latency_sum'] += latency
+                    if (statistics['latency_max'] < latency): statistics['latency_max'] = latency
+                elif (is_attempted):
+                    statistics['failed'] += 1
+                    statistics['failed_consecutive'] += 1
+
+                    is_cancelled = (self.failures_max > 0 and statistics['failed_consecutive'] >= self.failures_max)
+                else: statistics['suspended'] += 1
+            #
+
+            if (not (is_delivered or is_cancelled)): _return = self._get_retry_timestamp(callback_urls)
+        #
+
+        if ((not is_delivered) and self.log_handler is not None): self.log_handler.debug("{0!r} failed to deliver notification '{1:d}' to '{2}'", self, seq, sid, context = "pas_upnp")
+
+        if (is_cancelled):
+            if (self.log_handler is not None): self.log_handler.debug("{0!r} cancels subscription '{1}' after repeated delivery failures", self, sid, context = "pas_upnp")
+
+            gena = NamedLoader.get_singleton("dNG.net.upnp.Gena", False)
+            if (gena is not None): gena.deregister(usn, sid)
+        #
+
+        return _return
+    #
+
+    def _suspend_host(self, host):
+        """
+Suspends sending to the given callback host after a failure. The time
+suspended doubles with each consecutive failure.
+
+:param host: Callback URL host and port
+
+:since: v0.2.00
+        """
+
+        host_failed = self.hosts_failed.get(host)
+
+        if (host_failed is None):
+            host_failed = { "failures": 0 }
+            self.hosts_failed.set(host, host_failed)
+        #
+
+        host_failed['failures'] += 1
+
+        backoff = min(self.backoff * (2 ** min(host_failed['failures'] - 1, 16)), self.backoff_max)
+        host_failed['timestamp_retry'] = time() + backoff
+    #
+
+    @staticmethod
+    def _disconnect_http_client(http_client):
+        """
+Disconnects an HTTP client that failed or is no longer kept idle.
+
+:param http_client: HTTP client instance
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        try:
+            if (hasattr(http_client, "disconnect")): http_client.disconnect()
+        except Exception: pass
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the GenaNotifier singleton.
+
+:return: (GenaNotifier) Object on success
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with GenaNotifier._instance_lock:
+            if (GenaNotifier._weakref_instance is not None): _return = GenaNotifier._weakref_instance()
+
+            if (_return is None):
+                _return = GenaNotifier()
+                GenaNotifier._weakref_instance = ref(_return)
+            #
+        #
+
+        return _return
+    #
+#
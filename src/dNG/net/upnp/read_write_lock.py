@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from contextlib import contextmanager
+from threading import Condition, Lock, local
+from time import time
+
+try: from threading import get_ident
+except ImportError: from thread import get_ident
+
+from dNG.runtime.operation_not_supported_exception import OperationNotSupportedException
+
+class ReadWriteLock(object):
+    """
+"ReadWriteLock" allows concurrent readers or one writer. Waiting writers are
+preferred over new readers. Both locks are reentrant and a thread holding
+the write lock may acquire the read lock as well. Wait and hold times may be
+recorded per context name given.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, is_instrumented = False):
+        """
+Constructor __init__(ReadWriteLock)
+
+:param is_instrumented: True to record wait and hold times
+
+:since: v0.2.00
+        """
+
+        self._condition = Condition(Lock())
+        """
+Condition used to wait for the lock
+        """
+        self._local = local()
+        """
+Thread local read lock counter
+        """
+        self._readers = 0
+        """
+Number of threads holding the read lock
+        """
+        self.statistics = ({ } if (is_instrumented) else None)
+        """
+Dict of context names with the wait and hold times recorded
+        """
+        self._statistics_lock = Lock()
+        """
+Thread safety lock for the statistics
+        """
+        self._writer = None
+        """
+Thread identifier of the thread holding the write lock
+        """
+        self._writer_count = 0
+        """
+Number of write lock acquisitions of the thread holding it
+        """
+        self._writers_waiting = 0
+        """
+Number of threads waiting for the write lock
+        """
+    #
+
+    def acquire_read(self):
+        """
+Acquires the read lock.
+
+:since: v0.2.00
+        """
+
+        read_count = getattr(self._local, "read_count", 0)
+
+        if (read_count < 1 and self._writer != get_ident()):
+            with self._condition:
+                while (self._writer is not None or self._writers_waiting > 0): self._condition.wait()
+                self._readers += 1
+            #
+        #
+
+        self._local.read_count = 1 + read_count
+    #
+
+    def acquire_write(self):
+        """
+Acquires the write lock.
+
+:since: v0.2.00
+        """
+
+        thread_id = get_ident()
+
+        with self._condition:
+            if (self._writer == thread_id): self._writer_count += 1
+            elif (getattr(self._local, "read_count", 0) > 0): raise OperationNotSupportedException("Read locks can not be upgraded to write locks")
+            else:
+                self._writers_waiting += 1
+
+                try:
+                    while (self._writer is not None or self._readers > 0): self._condition.wait()
+                finally: self._writers_waiting -= 1
+
+                self._writer = thread_id
+                self._writer_count = 1
+            #
+        #
+    #
+
+    def get_statistics(self):
+        """
+Returns the wait and hold times recorded.
+
+:return: (dict) Dict of context names with "count", "wait_total",
+         "wait_max", "hold_total" and "hold_max"; None if not instrumented
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        if (self.statistics is not None):
+            with self._statistics_lock:
+                _return = { }
+
+                for context in self.statistics:
+                    statistics = self.statistics[context]
+
+                    _return[context] = { "count": statistics[0],
+                                         "wait_total": statistics[1],
+                                         "wait_max": statistics[2],
+                                         "hold_total": statistics[3],
+                                         "hold_max": statistics[4]
+                                       }
+                #
+            #
+        #
+
+        return _return
+    #
+
+    @contextmanager
+    def _instrumented(self, acquire, release, context):
+        """
+Acquires and releases the lock with the given methods and records the wait
+and hold times for the context name given.
+
+:param acquire: Method acquiring the lock
+:param release: Method releasing the lock
+:param context: Context name
+
+:since: v0.2.00
+        """
+
+        timestamp_waiting = time()
+        acquire()
+        timestamp_acquired = time()
+
+        try: yield
+        finally:
+            release()
+            timestamp_released = time()
+
+            wait_time = timestamp_acquired - timestamp_waiting
+            hold_time = timestamp_released - timestamp_acquired
+
+            with self._statistics_lock:
+                statistics = self.statistics.get(context)
+
+                if (statistics is None): self.statistics[context] = [ 1, wait_time, wait_time, hold_time, hold_time ]
+                else:
+                    statistics[0] += 1
+                    statistics[1] += wait_time
+                    if (statistics[2] < wait_time): statistics[2] = wait_time
+                    statistics[3] += hold_time
+                    if (statistics[4] < hold_time): statistics[4] = hold_time
+                #
+            #
+        #
+    #
+
+    def read(self, context = None):
+        """
+Returns a context manager for the read lock.
+
+:param context: Context name used to record wait and hold times
+
+:return: (object) Context manager
+:since:  v0.2.00
+        """
+
+        return (self._locked(self.acquire_read, self.release_read)
+                if (self.statistics is None) else
+                self._instrumented(self.acquire_read, self.release_read, "{0} (read)".format(context))
+               )
+    #
+
+    def release_read(self):
+        """
+Releases the read lock.
+
+:since: v0.2.00
+        """
+
+        read_count = getattr(self._local, "read_count", 0) - 1
+        self._local.read_count = read_count
+
+        if (read_count < 1 and self._writer != get_ident()):
+            with self._condition:
+                self._readers -= 1
+                if (self._readers < 1): self._condition.notify_all()
+            #
+        #
+    #
+
+    def release_write(self):
+        """
+Releases the write lock.
+
+:since: v0.2.00
+        """
+
+        with self._condition:
+            self._writer_count -= 1
+
+            if (self._writer_count < 1):
+                self._writer = None
+                self._condition.notify_all()
+            #
+        #
+    #
+
+    def write(self, context = None):
+        """
+Returns a context manager for the write lock.
+
+:param context: Context name used to record wait and hold times
+
+:return: (object) Context manager
+:since:  v0.2.00
+        """
+
+        return (self._locked(self.acquire_write, self.release_write)
+                if (self.statistics is None) else
+                self._instrumented(self.acquire_write, self.release_write, "{0} (write)".format(context))
+               )
+    #
+
+    @staticmethod
+    @contextmanager
+    def _locked(acquire, release):
+        """
+Acquires and releases the lock with the given methods.
+
+:param acquire: Method acquiring the lock
+:param release: Method releasing the lock
+
+:since: v0.2.00
+        """
+
+        acquire()
+
+        try: yield
+        finally: release()
+    #
+#
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from time import time
+import socket
+
+from dNG.data.settings import Settings
+from dNG.data.upnp.lru_cache import LruCache
+
+class ResolverCache(object):
+    """
+"ResolverCache" caches "socket.getaddrinfo()" results including failed
+lookups. Literal IPv4 and IPv6 addresses are returned without resolving
+them.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    _cache = LruCache(1024)
+    """
+Cache of resolved addresses
+    """
+
+    @staticmethod
+    def get_addrinfo(host, port = None, family = socket.AF_UNSPEC, _type = 0, proto = 0):
+        """
+Returns the address information for the given host and port. The arguments
+and return value are compatible to "socket.getaddrinfo()".
+
+:param host: Host name or IP address
+:param port: Port
+:param family: Address family
+:param _type: Socket type
+:param proto: Protocol
+
+:return: (list) List of address information tuples
+:since:  v0.2.00
+        """
+
+        _return = ResolverCache._get_literal_addrinfo(host, port, family, _type, proto)
+
+        if (_return is None):
+            key = ( host, port, family, _type, proto )
+            _time = time()
+
+            cached_entry = ResolverCache._cache.get(key)
+
+            if (cached_entry is None or cached_entry[0] < _time):
+                try:
+                    addrinfo = socket.getaddrinfo(host, port, family, _type, proto)
+                    cached_entry = ( _time + int(Settings.get("pas_upnp_resolver_cache_ttl", 300)), addrinfo, None )
+                except socket.error as handled_exception:
+                    # Exception instances raised again would accumulate tracebacks
+                    cached_entry = ( _time + int(Settings.get("pas_upnp_resolver_cache_negative_ttl", 30)),
+                                     None,
+                                     ( handled_exception.__class__, handled_exception.args )
+                                   )
+                #
+
+                ResolverCache._cache.set(key, cached_entry)
+            #
+
+            if (cached_entry[2] is not None):
+                ( exception_class, exception_args ) = cached_entry[2]
+                raise exception_class(*exception_args)
+            #
+
+            _return = list(cached_entry[1])
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def _get_literal_addrinfo(host, port, family, _type, proto):
+        """
+Returns the address information for a literal IPv4 or IPv6 address.
+
+:param host: Host name or IP address
+:param port: Port
+:param family: Address family
+:param _type: Socket type
+:param proto: Protocol
+
+:return: (list) List of address information tuples; None if the host is not
+         a literal IP address
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        if (host is not None and hasattr(socket, "inet_pton")):
+            port = (0 if (port is None) else int(port))
+
+            if (":" in host):
+                if (family in ( socket.AF_UNSPEC, socket.AF_INET6 )):
+                    try:
+                        socket.inet_pton(socket.AF_INET6, host)
+                        _return = [ ( socket.AF_INET6, _type, proto, "", ( host, port, 0, 0 ) ) ]
+                    except socket.error: pass
+                #
+            elif (family in ( socket.AF_UNSPEC, socket.AF_INET )):
+                try:
+                    socket.inet_pton(socket.AF_INET, host)
+                    _return = [ ( socket.AF_INET, _type, proto, "", ( host, port ) ) ]
+                except socket.error: pass
+            #
+        #
+
+        return _return
+    #
+#
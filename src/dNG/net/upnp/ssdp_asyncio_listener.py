@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from struct import pack
+from threading import Thread, current_thread
+import asyncio
+import socket
+
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.thread_lock import ThreadLock
+
+from .ssdp_datagram_protocol import SsdpDatagramProtocol
+
+class SsdpAsyncioListener(object):
+    """
+Listener instance receiving IPv4 or IPv6 multicast SSDP messages. All
+instances share one asyncio event loop running in a single thread and the
+executors handling the datagrams received.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    START_TIMEOUT = 5
+    """
+Seconds to wait for the event loop to register a listener endpoint
+    """
+
+    _executors = None
+    """
+Single threaded executors handling datagrams received
+    """
+    _loop = None
+    """
+asyncio event loop shared by all listeners
+    """
+    _loop_lock = ThreadLock()
+    """
+Thread safety lock
+    """
+    _loop_thread = None
+    """
+Thread running the asyncio event loop
+    """
+    _loop_users = 0
+    """
+Number of active listeners using the event loop
+    """
+
+    def __init__(self, ip, multicast_address = None):
+        """
+Constructor __init__(SsdpAsyncioListener)
+
+:param ip: IPv4 / IPv6 address
+:param multicast_address: Multicast address to listen for
+
+:since: v0.2.00
+        """
+
+        self.listener_active = False
+        """
+True if multicast listener is active
+        """
+        self.listener_if_index = 0
+        """
+Listener IPv6 interface index
+        """
+        self.listener_ip = ip
+        """
+Listener IP address
+        """
+        self.listener_socket = None
+        """
+Listener UDP socket
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.multicast_addresses = [ ]
+        """
+Multicast addresses to listen for on this socket
+        """
+        self.transport = None
+        """
+asyncio datagram transport
+        """
+
+        # pylint: disable=no-member
+
+        is_ipv6 = (":" in ip)
+
+        if (is_ipv6):
+            # Split listener interface from IPv6 address and find corresponding index
+            if ("%" in ip and hasattr(socket, "if_nameindex")):
+                if_list = { if_name: index for index, if_name in socket.if_nameindex() }
+
+                ( ip, _if ) = ip.split("%", 1)
+                self.listener_if_index = (if_list[_if] if (_if in if_list) else int(_if))
+
+                self.listener_ip = ip
+            #
+
+            if (multicast_address is None): multicast_address = "ff02::c"
+        elif (multicast_address is None): multicast_address = "239.255.255.250"
+
+        self.listener_socket = socket.socket((socket.AF_INET6 if (is_ipv6) else socket.AF_INET), socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.listener_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener_socket.bind(( ("::" if (is_ipv6) else ""), 1900 ))
+        self.listener_socket.setblocking(False)
+
+        self.add_address(multicast_address)
+    #
+
+    def add_address(self, multicast_address):
+        """
+Adds a new multicast address to listen for SSDP messages.
+
+:param multicast_address: Multicast address to listen for
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        if (multicast_address not in self.multicast_addresses):
+            try:
+                if (":" in multicast_address):
+                    if (socket.has_ipv6):
+                        self.listener_socket.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP, socket.inet_pton(socket.AF_INET6, multicast_address) + pack("I", self.listener_if_index))
+                        self.multicast_addresses.append(multicast_address)
+                    #
+                else:
+                    self.listener_socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, socket.inet_aton(multicast_address) + socket.inet_aton(self.listener_ip))
+                    self.multicast_addresses.append(multicast_address)
+                #
+
+                if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.add_address()- reporting: Added listener for '{1} {2}'", self, multicast_address, self.listener_ip, context = "pas_upnp")
+            except Exception as handled_exception:
+                if (self.log_handler is not None): self.log_handler.debug(handled_exception, context = "pas_upnp")
+            #
+        #
+    #
+
+    def is_listening(self):
+        """
+Returns true if the listener is active.
+
+:return: (bool) Listener state
+:since:  v0.2.00
+        """
+
+        return self.listener_active
+    #
+
+    def remove_address(self, multicast_address):
+        """
+Removes a multicast address currently listening for SSDP messages.
+
+:param multicast_address: Multicast address to remove
+
+:since: v0.2.00
+        """
+
+        if (multicast_address in self.multicast_addresses):
+            if (":" in multicast_address): self.listener_socket.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_LEAVE_GROUP, socket.inet_pton(socket.AF_INET6, multicast_address) + pack("I", self.listener_if_index))
+            else: self.listener_socket.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, socket.inet_aton(multicast_address) + socket.inet_aton(self.listener_ip))
+
+            self.multicast_addresses.remove(multicast_address)
+        #
+    #
+
+    def start(self):
+        """
+Registers the listener socket with the shared event loop.
+
+:since: v0.2.00
+        """
+
+        if (self.listener_active): return
+
+        if (len(self.multicast_addresses) < 1):
+            if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.start()- reporting: No multicast addresses bound", self, context = "pas_upnp")
+            return
+        #
+
+        with SsdpAsyncioListener._loop_lock:
+            if (SsdpAsyncioListener._loop is None):
+                executors_count = max(1, int(Settings.get("pas_upnp_ssdp_asyncio_handler_workers", 4)))
+
+                SsdpAsyncioListener._executors = [ ThreadPoolExecutor(1) for _ in range(0, executors_count) ]
+                SsdpAsyncioListener._loop = asyncio.new_event_loop()
+
+                SsdpAsyncioListener._loop_thread = Thread(target = SsdpAsyncioListener._run_loop, args = ( SsdpAsyncioListener._loop, ))
+                SsdpAsyncioListener._loop_thread.daemon = True
+                SsdpAsyncioListener._loop_thread.start()
+            #
+
+            executors = SsdpAsyncioListener._executors
+            loop = SsdpAsyncioListener._loop
+            SsdpAsyncioListener._loop_users += 1
+        #
+
+        self.listener_active = True
+
+        future = asyncio.run_coroutine_threadsafe(loop.create_datagram_endpoint(lambda: SsdpDatagramProtocol(loop, executors, self.log_handler),
+                                                                                sock = self.listener_socket
+                                                                               ),
+                                                  loop
+                                                 )
+
+        try: ( self.transport, _ ) = future.result(SsdpAsyncioListener.START_TIMEOUT)
+        except Exception:
+            self.stop()
+            raise
+        #
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.start()- reporting: Started listening on '{1}'", self, self.listener_ip, context = "pas_upnp")
+    #
+
+    def stop(self):
+        """
+Stops the listener and closes its socket.
+
+:since: v0.2.00
+        """
+
+        # pylint: disable=broad-except
+
+        if (self.listener_active):
+            multicast_addresses = copy(self.multicast_addresses)
+
+            for multicast_address in multicast_addresses:
+                try: self.remove_address(multicast_address)
+                except Exception as handled_exception:
+                    if (self.log_handler is not None): self.log_handler.debug(handled_exception, context = "pas_upnp")
+                #
+            #
+
+            self.listener_active = False
+
+            with SsdpAsyncioListener._loop_lock:
+                executors = None
+                loop = SsdpAsyncioListener._loop
+                loop_thread = None
+
+                if (self.transport is None): self.listener_socket.close()
+                else:
+                    loop.call_soon_threadsafe(self.transport.close)
+                    self.transport = None
+                #
+
+                SsdpAsyncioListener._loop_users -= 1
+
+                if (SsdpAsyncioListener._loop_users < 1):
+                    executors = SsdpAsyncioListener._executors
+                    loop_thread = SsdpAsyncioListener._loop_thread
+
+                    SsdpAsyncioListener._executors = None
+                    SsdpAsyncioListener._loop = None
+                    SsdpAsyncioListener._loop_thread = None
+
+                    # Stop one iteration later to let the closed transports release their sockets
+                    loop.call_soon_threadsafe(loop.call_soon, loop.stop)
+                #
+            #
+
+            if (loop_thread is not None and loop_thread is not current_thread()): loop_thread.join(SsdpAsyncioListener.START_TIMEOUT)
+
+            if (executors is not None):
+                for executor in executors: executor.shutdown(False)
+            #
+        #
+    #
+
+    @staticmethod
+    def _run_loop(loop):
+        """
+Runs the given asyncio event loop until it is stopped.
+
+:param loop: asyncio event loop
+
+:since: v0.2.00
+        """
+
+        asyncio.set_event_loop(loop)
+
+        try: loop.run_forever()
+        finally: loop.close()
+    #
+#
@@ -0,0 +1,755 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from threading import Thread
+from time import sleep, time
+import json
+import socket
+
+try: from time import process_time
+except ImportError: from time import clock as process_time
+
+try: import resource
+except ImportError: resource = None
+
+try: import tracemalloc
+except ImportError: tracemalloc = None
+
+from dNG.data.binary import Binary
+from dNG.data.upnp.identifier_mixin import IdentifierMixin
+from dNG.data.upnp.usn_record import UsnRecord
+
+from .ssdp_capture import SsdpCapture
+from .ssdp_header_parser import SsdpHeaderParser
+from .ssdp_request import SsdpRequest
+from .task_heap import TaskHeap
+
+class SsdpBenchmark(object):
+    """
+"SsdpBenchmark" replays recorded or synthesized SSDP traffic against the
+local ControlPoint and measures the discovery path. Datagrams are either
+injected directly into "SsdpRequest" or sent through a UDP socket. Parts of
+the discovery path may be measured on their own as well.
+
+Usage: python -m dNG.net.upnp.ssdp_benchmark --help
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    CORPUS = ( "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age=120\r\nLOCATION: http://192.168.1.1:1900/gatedesc.xml\r\nNT: upnp:rootdevice\r\nNTS: ssdp:alive\r\nSERVER: Linux/3.14 UPnP/1.0 IpBridge/1.0\r\nUSN: uuid:2f402f80-da50-11e1-9b23-00178801a001::upnp:rootdevice\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age=1800\r\nLOCATION: http://192.168.1.1:5000/rootDesc.xml\r\nOPT: \"http://schemas.upnp.org/upnp/1/0/\"; ns=01\r\n01-NLS: 1\r\nNT: urn:schemas-upnp-org:service:WANIPConnection:1\r\nNTS: ssdp:alive\r\nSERVER: OpenWRT/18.06 UPnP/1.1 MiniUPnPd/2.1\r\nUSN: uuid:8b6a3e2c-1d3f-4b5a-9c7e-0a1b2c3d4e5f::urn:schemas-upnp-org:service:WANIPConnection:1\r\nBOOTID.UPNP.ORG: 1600000000\r\nCONFIGID.UPNP.ORG: 1337\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age = 1800\r\nLOCATION: http://192.168.1.20:1400/xml/device_description.xml\r\nNT: urn:schemas-upnp-org:device:ZonePlayer:1\r\nNTS: ssdp:alive\r\nSERVER: Linux UPnP/1.0 Sonos/57.3-77280 (ZPS9)\r\nUSN: uuid:RINCON_000E58A0B1C201400::urn:schemas-upnp-org:device:ZonePlayer:1\r\nX-RINCON-HOUSEHOLD: Sonos_abcdefghijklmnopqrstuvwxyz\r\nX-RINCON-BOOTSEQ: 42\r\nBOOTID.UPNP.ORG: 42\r\nX-RINCON-WIFIMODE: 0\r\nX-RINCON-VARIANT: 1\r\nHOUSEHOLD.SMARTSPEAKER.AUDIO: Sonos_abcdefghijklmnopqrstuvwxyz.AbCdEfGhIjKlMnOpQr\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age=1800\r\nLOCATION: http://192.168.1.30:8008/ssdp/device-desc.xml\r\nNT: urn:dial-multiscreen-org:service:dial:1\r\nNTS: ssdp:alive\r\nSERVER: Linux/3.8.13, UPnP/1.0, Portable SDK for UPnP devices/1.6.18\r\nX-User-Agent: redsonic\r\nUSN: uuid:3e1cc7c3-f4f2-4e1a-9b8d-6c5f4e3d2c1b::urn:dial-multiscreen-org:service:dial:1\r\nBOOTID.UPNP.ORG: 7\r\nCONFIGID.UPNP.ORG: 1\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age=1800\r\nDATE: Sun, 18 Oct 2026 09:00:00 GMT\r\nLOCATION: http://192.168.1.40:9197/dmr\r\nNT: urn:schemas-upnp-org:service:RenderingControl:1\r\nNTS: ssdp:alive\r\nSERVER: SHP, UPnP/1.0, Samsung UPnP SDK/1.0\r\nUSN: uuid:0a1b2c3d-0000-1000-8000-f47b09a1b2c3::urn:schemas-upnp-org:service:RenderingControl:1\r\nContent-Length: 0\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHost: 239.255.255.250:1900\r\nNT: urn:schemas-upnp-org:device:MediaServer:1\r\nNTS: ssdp:alive\r\nLocation: http://192.168.1.50:2869/upnphost/udhisapi.dll?content=uuid:5d1e2f3a-4b5c-6d7e-8f90-a1b2c3d4e5f6\r\nUSN: uuid:5d1e2f3a-4b5c-6d7e-8f90-a1b2c3d4e5f6::urn:schemas-upnp-org:device:MediaServer:1\r\nCache-Control: max-age=900\r\nServer: Microsoft-Windows/10.0 UPnP/1.0 UPnP-Device-Host/1.0\r\nOPT: \"http://schemas.upnp.org/upnp/1/0/\"; ns=01\r\n01-NLS: 0f8e7d6c5b4a39281706f5e4d3c2b1a0\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age=1800\r\nLOCATION: http://192.168.1.60:49152/description.xml\r\nNT: urn:schemas-upnp-org:service:ContentDirectory:1\r\nNTS: ssdp:alive\r\nSERVER: Linux/4.4.59 UPnP/1.0 MiniDLNA/1.2.1\r\nUSN: uuid:4d696e69-444c-164e-9d41-b827eb0c1d2e::urn:schemas-upnp-org:service:ContentDirectory:1\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nNT: urn:schemas-upnp-org:service:ConnectionManager:1\r\nNTS: ssdp:byebye\r\nUSN: uuid:4d696e69-444c-164e-9d41-b827eb0c1d2e::urn:schemas-upnp-org:service:ConnectionManager:1\r\nBOOTID.UPNP.ORG: 3\r\nCONFIGID.UPNP.ORG: 2\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nLOCATION: http://192.168.1.1:5000/rootDesc.xml\r\nNT: uuid:8b6a3e2c-1d3f-4b5a-9c7e-0a1b2c3d4e5f\r\nNTS: ssdp:update\r\nUSN: uuid:8b6a3e2c-1d3f-4b5a-9c7e-0a1b2c3d4e5f\r\nBOOTID.UPNP.ORG: 1600000000\r\nCONFIGID.UPNP.ORG: 1337\r\nNEXTBOOTID.UPNP.ORG: 1600000001\r\nSEARCHPORT.UPNP.ORG: 1901\r\n\r\n",
+               "M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nMAN: \"ssdp:discover\"\r\nMX: 1\r\nST: urn:dial-multiscreen-org:service:dial:1\r\nUSER-AGENT: Google Chrome/118.0.5993.117 Windows\r\n\r\n",
+               "M-SEARCH * HTTP/1.1\r\nHost: 239.255.255.250:1900\r\nST: urn:schemas-upnp-org:device:InternetGatewayDevice:1\r\nMan: \"ssdp:discover\"\r\nMX: 3\r\n\r\n",
+               "HTTP/1.1 200 OK\r\nCACHE-CONTROL: max-age=1800\r\nDATE: Sun, 18 Oct 2026 09:00:00 GMT\r\nEXT:\r\nLOCATION: http://192.168.1.20:1400/xml/device_description.xml\r\nSERVER: Linux UPnP/1.0 Sonos/57.3-77280 (ZPS9)\r\nST: upnp:rootdevice\r\nUSN: uuid:RINCON_000E58A0B1C201400::upnp:rootdevice\r\n\r\n",
+               "NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age=60\r\nLOCATION: http://192.168.1.70:80/\r\nNT: roku:ecp\r\nNTS: ssdp:alive\r\nSERVER: Roku/9.4.0 UPnP/1.0 Roku/9.4.0\r\nUSN: uuid:roku:ecp:X00000123456\r\n\r\n",
+               "TYPE: WM-NOTIFY\r\nVERSION: 1.0\r\n\r\nMSG: LOGOUT\r\nDEVICE_ID: 0123456789\r\n\r\n"
+             )
+    """
+Datagrams modelled on SSDP traffic of common device types used if no capture
+file is given to measure the header parser. It contains announcements,
+searches, a search response and an unrelated message to be rejected.
+    """
+    DEVICE_TYPE = "urn:schemas-upnp-org:device:PasUpnpBenchmark:1"
+    """
+UPnP device type of synthesized devices
+    """
+    RESPONSE_TIMEOUT = 6
+    """
+Seconds to wait for M-SEARCH responses after the last datagram has been sent
+    """
+    SERVER = "Linux/4.0 UPnP/1.1 pasUPnPBenchmark/1.0"
+    """
+SERVER header value of synthesized NOTIFY messages
+    """
+    SERVICE_TYPE = "urn:schemas-upnp-org:service:PasUpnpBenchmark{0:d}:1"
+    """
+UPnP service type template of synthesized services
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(SsdpBenchmark)
+
+:since: v0.2.00
+        """
+
+        self.notify_count = 0
+        """
+Number of NOTIFY datagrams replayed
+        """
+        self.search_count = 0
+        """
+Number of M-SEARCH datagrams replayed
+        """
+        self.search_latencies = [ ]
+        """
+List of M-SEARCH latencies in seconds
+        """
+        self.search_results_count = 0
+        """
+Number of M-SEARCH results scheduled or received
+        """
+        self.searches_pending = { }
+        """
+Dict of search targets with a list of UNIX timestamps the M-SEARCH requests
+have been sent at
+        """
+        self.searches_pending_active = False
+        """
+True while M-SEARCH responses are received
+        """
+    #
+
+    @staticmethod
+    def _get_peak_memory():
+        """
+Returns the peak resident memory of this process.
+
+:return: (int) Peak memory in bytes; None if unknown
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        if (resource is not None):
+            _return = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux reports kilobytes while BSD based systems report bytes
+            if (_return < (1 << 32)): _return *= 1024
+        #
+
+        return _return
+    #
+
+    def _get_results(self, datagrams_count, duration, cpu_time):
+        """
+Returns the measurements of the last replay.
+
+:param datagrams_count: Number of datagrams replayed
+:param duration: Seconds the replay took
+:param cpu_time: CPU seconds used by this process
+
+:return: (dict) Measurements
+:since:  v0.2.00
+        """
+
+        search_latencies_count = len(self.search_latencies)
+
+        return { "datagrams": datagrams_count,
+                 "duration": duration,
+                 "notify_count": self.notify_count,
+                 "notify_per_second": (self.notify_count / duration if (duration > 0) else None),
+                 "search_count": self.search_count,
+                 "search_results_count": self.search_results_count,
+                 "search_latency_avg": (sum(self.search_latencies) / search_latencies_count if (search_latencies_count > 0) else None),
+                 "search_latency_max": (max(self.search_latencies) if (search_latencies_count > 0) else None),
+                 "cpu_time": cpu_time,
+                 "peak_memory": SsdpBenchmark._get_peak_memory()
+               }
+    #
+
+    @staticmethod
+    def get_corpus_datagrams():
+        """
+Returns the datagrams of the built-in corpus.
+
+:return: (list) List of UNIX timestamp, source address data and datagram
+         tuples
+:since:  v0.2.00
+        """
+
+        return [ ( 0, ( "127.0.0.1", 1900 ), Binary.utf8_bytes(data) ) for data in SsdpBenchmark.CORPUS ]
+    #
+
+    @staticmethod
+    def get_search_datagram(search_target, wait_timeout = 1):
+        """
+Returns a M-SEARCH datagram for the given search target.
+
+:param search_target: UPnP search target
+:param wait_timeout: UPnP MX value
+
+:return: (bytes) SSDP datagram
+:since:  v0.2.00
+        """
+
+        return Binary.utf8_bytes("M-SEARCH * HTTP/1.1\r\n"
+                                 "HOST: 239.255.255.250:1900\r\n"
+                                 "MAN: \"ssdp:discover\"\r\n"
+                                 "MX: {0:d}\r\n"
+                                 "ST: {1}\r\n"
+                                 "USER-AGENT: {2}\r\n"
+                                 "\r\n".format(wait_timeout, search_target, SsdpBenchmark.SERVER)
+                                )
+    #
+
+    @staticmethod
+    def get_storm_datagrams(devices_count, services_count, alive_ratio = 1, byebye_ratio = 0, update_ratio = 0, searches_count = 0, location_port = 9, seed = None):
+        """
+Returns synthesized NOTIFY datagrams for the given number of devices with
+the given number of services each. The NOTIFY subtype of each message is
+chosen randomly based on the given ratios. M-SEARCH datagrams are inserted
+at random positions.
+
+:param devices_count: Number of UPnP root devices
+:param services_count: Number of UPnP services per device
+:param alive_ratio: Weight of "ssdp:alive" messages
+:param byebye_ratio: Weight of "ssdp:byebye" messages
+:param update_ratio: Weight of "ssdp:update" messages
+:param searches_count: Number of M-SEARCH datagrams
+:param location_port: Local TCP port used for UPnP description URLs
+:param seed: Seed for the random number generator
+
+:return: (list) List of UNIX timestamp, source address data and datagram
+         tuples
+:since:  v0.2.00
+        """
+
+        ratios_sum = float(alive_ratio + byebye_ratio + update_ratio)
+        if (ratios_sum <= 0): ratios_sum = alive_ratio = 1.0
+
+        random = Random(seed)
+        source_data = ( "127.0.0.1", 1900 )
+        _return = [ ]
+
+        for device_index in range(0, devices_count):
+            uuid = "uuid:00000000-0000-4000-8000-{0:012x}".format(device_index)
+            location = "http://127.0.0.1:{0:d}/upnp/{1:d}/desc.xml".format(location_port, device_index)
+
+            notifications = [ ( "upnp:rootdevice", "{0}::upnp:rootdevice".format(uuid) ),
+                              ( uuid, uuid ),
+                              ( SsdpBenchmark.DEVICE_TYPE, "{0}::{1}".format(uuid, SsdpBenchmark.DEVICE_TYPE) )
+                            ]
+
+            for service_index in range(0, services_count):
+                service_type = SsdpBenchmark.SERVICE_TYPE.format(service_index)
+                notifications.append(( service_type, "{0}::{1}".format(uuid, service_type) ))
+            #
+
+            for ( notification_type, usn ) in notifications:
+                value = random.random() * ratios_sum
+
+                if (value < alive_ratio): nts = "ssdp:alive"
+                elif (value < alive_ratio + byebye_ratio): nts = "ssdp:byebye"
+                else: nts = "ssdp:update"
+
+                headers = "HOST: 239.255.255.250:1900\r\nNT: {0}\r\nNTS: {1}\r\nUSN: {2}\r\nBOOTID.UPNP.ORG: 1\r\nCONFIGID.UPNP.ORG: 1\r\n".format(notification_type, nts, usn)
+
+                if (nts != "ssdp:byebye"):
+                    headers += "CACHE-CONTROL: max-age=1800\r\nLOCATION: {0}\r\nSERVER: {1}\r\n".format(location, SsdpBenchmark.SERVER)
+                    if (nts == "ssdp:update"): headers += "NEXTBOOTID.UPNP.ORG: 2\r\n"
+                #
+
+                _return.append(( 0, source_data, Binary.utf8_bytes("NOTIFY * HTTP/1.1\r\n{0}\r\n".format(headers)) ))
+            #
+        #
+
+        for _ in range(0, searches_count):
+            search_datagram = SsdpBenchmark.get_search_datagram(random.choice(( "ssdp:all", "upnp:rootdevice", SsdpBenchmark.DEVICE_TYPE )))
+            _return.insert(random.randint(0, len(_return)), ( 0, source_data, search_datagram ))
+        #
+
+        return _return
+    #
+
+    def _handle_search_result(self, event, wait_seconds):
+        """
+Counts a search result scheduled for an injected M-SEARCH request instead
+of sending it.
+
+:param event: Search result event
+:param wait_seconds: Seconds to wait before the event should be sent
+
+:since: v0.2.00
+        """
+
+        self.search_results_count += 1
+    #
+
+    def inject(self, datagrams, respect_timing = False, speed = 1.0):
+        """
+Injects the given datagrams directly into "SsdpRequest". Search results
+are counted but not sent. The M-SEARCH latency is the time needed to
+handle the request.
+
+:param datagrams: List of UNIX timestamp, source address data and datagram
+       tuples
+:param respect_timing: True to keep the recorded time between datagrams
+:param speed: Replay speed factor used if timing is respected
+
+:return: (dict) Measurements
+:since:  v0.2.00
+        """
+
+        self._reset()
+
+        cpu_time = process_time()
+        timestamp_start = time()
+        timestamp_first = (datagrams[0][0] if (len(datagrams) > 0) else 0)
+
+        for ( timestamp, source_data, data ) in datagrams:
+            if (respect_timing): SsdpBenchmark._wait(timestamp_start + (timestamp - timestamp_first) / speed)
+
+            is_search = data.startswith(Binary.bytes("M-SEARCH"))
+            timestamp_handling = time()
+
+            SsdpRequest.handle_data(data, source_data, self._handle_search_result)
+
+            if (is_search):
+                self.search_count += 1
+                self.search_latencies.append(time() - timestamp_handling)
+            else: self.notify_count += 1
+        #
+
+        return self._get_results(len(datagrams), time() - timestamp_start, process_time() - cpu_time)
+    #
+
+    @staticmethod
+    def measure_headers(datagrams, rounds = 1):
+        """
+Measures the throughput of the SSDP header parser for the given datagrams.
+
+:param datagrams: List of UNIX timestamp, source address data and datagram
+                  tuples
+:param rounds: Number of times all datagrams are parsed
+
+:return: (dict) Measurements
+:since:  v0.2.00
+        """
+
+        datagrams = [ datagram for ( _, _, datagram ) in datagrams ]
+        accepted_count = 0
+
+        process_timestamp = process_time()
+        timestamp = time()
+
+        for _ in range(0, rounds):
+            for datagram in datagrams:
+                if (SsdpHeaderParser.parse(datagram) is not None): accepted_count += 1
+            #
+        #
+
+        duration = time() - timestamp
+        cpu_duration = process_time() - process_timestamp
+        datagrams_count = len(datagrams) * rounds
+
+        return { "accepted": accepted_count,
+                 "bytes_per_second": (sum(len(datagram) for datagram in datagrams) * rounds / duration if (duration > 0) else None),
+                 "cpu_seconds": cpu_duration,
+                 "datagrams": datagrams_count,
+                 "datagrams_per_second": (datagrams_count / duration if (duration > 0) else None),
+                 "duration": duration,
+                 "rejected": datagrams_count - accepted_count
+               }
+    #
+
+    @staticmethod
+    def measure_identifiers(datagrams):
+        """
+Measures the NOTIFY parsing path for the given datagrams. USNs are parsed
+once without and once with the memoized UPnP identifiers.
+
+:param datagrams: List of UNIX timestamp, source address data and datagram
+                  tuples
+
+:return: (dict) Measurements
+:since:  v0.2.00
+        """
+
+        timestamp = time()
+        requests_data = [ SsdpHeaderParser.parse(datagram) for ( _, _, datagram ) in datagrams ]
+        headers_duration = time() - timestamp
+
+        notifications = [ ]
+
+        for request_data in requests_data:
+            if (request_data is not None and request_data[0] == "NOTIFY" and "USN" in request_data[3]):
+                headers = request_data[3]
+
+                notifications.append(( headers['USN'],
+                                       (int(headers['BOOTID.UPNP.ORG']) if ("BOOTID.UPNP.ORG" in headers) else None),
+                                       (int(headers['CONFIGID.UPNP.ORG']) if ("CONFIGID.UPNP.ORG" in headers) else None)
+                                    ))
+            #
+        #
+
+        timestamp = time()
+
+        for ( usn, bootid, configid ) in notifications:
+            identifier = IdentifierMixin._parse_identifier(usn)
+            if (identifier is not None and bootid is not None and configid is not None): identifier.replace_ids(bootid, configid)
+        #
+
+        parsed_duration = time() - timestamp
+
+        cache_statistics = IdentifierMixin.get_identifier_cache_statistics()
+        timestamp = time()
+
+        for ( usn, bootid, configid ) in notifications: IdentifierMixin.get_identifier(usn, bootid, configid)
+
+        memoized_duration = time() - timestamp
+        cache_statistics_updated = IdentifierMixin.get_identifier_cache_statistics()
+
+        return { "datagrams": len(datagrams),
+                 "headers_duration": headers_duration,
+                 "identifiers_memoized_duration": memoized_duration,
+                 "identifiers_memoized_hits": cache_statistics_updated['hits'] - cache_statistics['hits'],
+                 "identifiers_memoized_misses": cache_statistics_updated['misses'] - cache_statistics['misses'],
+                 "identifiers_parsed_duration": parsed_duration,
+                 "notifications": len(notifications)
+               }
+    #
+
+    @staticmethod
+    def measure_records(count = 100000):
+        """
+Measures the memory allocated for the given number of USN entries stored as
+UsnRecord instances compared to the dicts used before. String values are
+shared by both representations and not included.
+
+:param count: Number of USN entries
+
+:return: (dict) Measurements; memory values are None if "tracemalloc" is
+         not available
+:since:  v0.2.00
+        """
+
+        entries_data = [ ]
+
+        for index in range(0, count):
+            usn = "uuid:00000000-0000-4000-8000-{0:012x}::{1}".format(index // 8, SsdpBenchmark.SERVICE_TYPE.format(index % 8))
+
+            entry_data = IdentifierMixin.get_identifier(usn, 1, 1).to_dict()
+
+            entry_data.update({ "ips": [ "127.0.0.1" ],
+                                "http_version": 1.1,
+                                "ssdp_server_name": SsdpBenchmark.SERVER,
+                                "url_base": "http://127.0.0.1:9/upnp/",
+                                "url_desc": "http://127.0.0.1:9/upnp/desc.xml"
+                              })
+
+            entries_data.append(entry_data)
+        #
+
+        _return = { "count": count }
+
+        for ( name, factory ) in ( ( "dict", dict ), ( "record", UsnRecord ) ):
+            if (tracemalloc is None): memory = None
+            else:
+                tracemalloc.start()
+                memory = tracemalloc.get_traced_memory()[0]
+            #
+
+            timestamp = time()
+            entries = [ factory(entry_data) for entry_data in entries_data ]
+            duration = time() - timestamp
+
+            if (memory is not None):
+                memory = tracemalloc.get_traced_memory()[0] - memory
+                tracemalloc.stop()
+            #
+
+            _return["{0}_bytes".format(name)] = memory
+            _return["{0}_bytes_per_usn".format(name)] = (None if (memory is None) else memory / float(count))
+            _return["{0}_duration".format(name)] = duration
+
+            del(entries)
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def measure_tasks(cycles = 50000, count = 1000, seed = None):
+        """
+Measures the ControlPoint task scheduler by replaying the given number of
+ssdp:alive and ssdp:byebye cycles. Each ssdp:byebye cancels the "delete"
+task of the USN and the following ssdp:alive schedules a new one while the
+tasks of all other USNs known stay queued.
+
+:param cycles: Number of ssdp:alive and ssdp:byebye cycles
+:param count: Number of USNs known
+:param seed: Seed for the random number generator
+
+:return: (dict) Measurements
+:since:  v0.2.00
+        """
+
+        random = Random(seed)
+        tasks = TaskHeap()
+        timestamp = time()
+
+        usns = [ "uuid:00000000-0000-4000-8000-{0:012x}::{1}".format(index // 8, SsdpBenchmark.SERVICE_TYPE.format(index % 8)) for index in range(0, count) ]
+
+        for usn in usns: tasks.add(timestamp + 1800 + random.random(), "delete", { "usn": usn }, usn)
+
+        entries_max = len(tasks.entries)
+        process_timestamp = process_time()
+        timestamp = time()
+
+        for cycle in range(0, cycles):
+            usn = usns[cycle % count]
+
+            tasks.remove(usn)
+            tasks.add(timestamp + 1800 + random.random(), "delete", { "usn": usn }, usn)
+            tasks.pop(timestamp)
+
+            if (entries_max < len(tasks.entries)): entries_max = len(tasks.entries)
+        #
+
+        duration = time() - timestamp
+        cpu_duration = process_time() - process_timestamp
+
+        return { "count": count,
+                 "cpu_seconds": cpu_duration,
+                 "cycles": cycles,
+                 "cycles_per_second": (cycles / duration if (duration > 0) else None),
+                 "duration": duration,
+                 "heap_entries_max": entries_max,
+                 "tasks": len(tasks)
+               }
+    #
+
+    def _reset(self):
+        """
+Resets all measurements.
+
+:since: v0.2.00
+        """
+
+        self.notify_count = 0
+        self.search_count = 0
+        self.search_latencies = [ ]
+        self.search_results_count = 0
+        self.searches_pending = { }
+    #
+
+    def _run_response_receiver(self, client_socket):
+        """
+Receives M-SEARCH responses and records the time since the matching
+request has been sent.
+
+:param client_socket: UDP socket the requests have been sent with
+
+:since: v0.2.00
+        """
+
+        binary_st_header = Binary.bytes("\nST:")
+
+        while (self.searches_pending_active):
+            try: data = client_socket.recv(65535)
+            except socket.timeout: continue
+            except socket.error: break
+
+            timestamp = time()
+            position = data.upper().find(binary_st_header)
+
+            if (position > -1):
+                search_target = Binary.str(data[position + 4:data.find(Binary.bytes("\n"), position + 4)]).strip()
+
+                self.search_results_count += 1
+
+                # Responses for "ssdp:all" requests contain specific search targets
+                if (search_target not in self.searches_pending): search_target = "ssdp:all"
+
+                if (len(self.searches_pending.get(search_target, [ ])) > 0):
+                    self.search_latencies.append(timestamp - self.searches_pending[search_target].pop(0))
+                #
+            #
+        #
+    #
+
+    def send(self, datagrams, target = ( "239.255.255.250", 1900 ), respect_timing = False, speed = 1.0):
+        """
+Sends the given datagrams to the given target address. M-SEARCH responses
+are received until "RESPONSE_TIMEOUT" passed after the last datagram. The
+M-SEARCH latency is the time until the first response for a request has
+been received.
+
+:param datagrams: List of UNIX timestamp, source address data and datagram
+       tuples
+:param target: Target address data
+:param respect_timing: True to keep the recorded time between datagrams
+:param speed: Replay speed factor used if timing is respected
+
+:return: (dict) Measurements
+:since:  v0.2.00
+        """
+
+        self._reset()
+
+        client_socket = socket.socket((socket.AF_INET6 if (":" in target[0]) else socket.AF_INET), socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        client_socket.settimeout(0.5)
+
+        if (":" not in target[0]): client_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+
+        client_socket.bind(( ("::" if (":" in target[0]) else ""), 0 ))
+
+        self.searches_pending_active = True
+
+        receiver_thread = Thread(target = self._run_response_receiver, args = ( client_socket, ))
+        receiver_thread.daemon = True
+        receiver_thread.start()
+
+        cpu_time = process_time()
+        timestamp_start = time()
+        timestamp_first = (datagrams[0][0] if (len(datagrams) > 0) else 0)
+
+        try:
+            for ( timestamp, _, data ) in datagrams:
+                if (respect_timing): SsdpBenchmark._wait(timestamp_start + (timestamp - timestamp_first) / speed)
+
+                if (data.startswith(Binary.bytes("M-SEARCH"))):
+                    position = data.find(Binary.bytes("\nST:"))
+                    search_target = Binary.str(data[position + 4:data.find(Binary.bytes("\n"), position + 4)]).strip()
+
+                    self.search_count += 1
+                    self.searches_pending.setdefault(search_target, [ ]).append(time())
+                else: self.notify_count += 1
+
+                client_socket.sendto(data, target)
+            #
+
+            duration = time() - timestamp_start
+            if (self.search_count > 0): sleep(SsdpBenchmark.RESPONSE_TIMEOUT)
+        finally:
+            self.searches_pending_active = False
+            receiver_thread.join()
+            client_socket.close()
+        #
+
+        return self._get_results(len(datagrams), duration, process_time() - cpu_time)
+    #
+
+    @staticmethod
+    def _wait(timestamp):
+        """
+Waits until the given UNIX timestamp.
+
+:param timestamp: UNIX timestamp
+
+:since: v0.2.00
+        """
+
+        wait_seconds = timestamp - time()
+        if (wait_seconds > 0): sleep(wait_seconds)
+    #
+
+    @staticmethod
+    def main(args = None):
+        """
+Runs the benchmark with the given command line arguments and prints the
+measurements as JSON.
+
+:param args: Command line arguments
+
+:since: v0.2.00
+        """
+
+        parser = ArgumentParser(description = "Replays recorded or synthesized SSDP traffic against the local UPnP ControlPoint.")
+        parser.add_argument("--capture", help = "Capture file recorded with \"pas_upnp_ssdp_capture_file\"")
+        parser.add_argument("--devices", type = int, default = 100, help = "Number of synthesized root devices")
+        parser.add_argument("--services", type = int, default = 4, help = "Number of synthesized services per device")
+        parser.add_argument("--alive", type = float, default = 0.8, help = "Ratio of synthesized \"ssdp:alive\" messages")
+        parser.add_argument("--byebye", type = float, default = 0.1, help = "Ratio of synthesized \"ssdp:byebye\" messages")
+        parser.add_argument("--update", type = float, default = 0.1, help = "Ratio of synthesized \"ssdp:update\" messages")
+        parser.add_argument("--searches", type = int, default = 0, help = "Number of synthesized M-SEARCH requests")
+        parser.add_argument("--seed", type = int, help = "Seed for synthesized traffic")
+        parser.add_argument("--repeat", type = int, default = 1, help = "Number of times the traffic is replayed")
+        parser.add_argument("--mode", choices = ( "headers", "identifiers", "inject", "records", "send", "tasks" ), default = "inject", help = "Inject datagrams into \"SsdpRequest\", send them with UDP or measure parts of the discovery path")
+        parser.add_argument("--count", type = int, help = "Number of USN entries measured with \"--mode records\" (default 100000) or known with \"--mode tasks\" (default 1000)")
+        parser.add_argument("--cycles", type = int, default = 50000, help = "Number of ssdp:alive and ssdp:byebye cycles replayed with \"--mode tasks\"")
+        parser.add_argument("--rounds", type = int, default = 10000, help = "Number of times the datagrams are parsed with \"--mode headers\"")
+        parser.add_argument("--target", default = "239.255.255.250:1900", help = "Target address used to send datagrams")
+        parser.add_argument("--timing", action = "store_true", help = "Keep the recorded time between datagrams")
+        parser.add_argument("--speed", type = float, default = 1.0, help = "Replay speed factor used with \"--timing\"")
+
+        args = parser.parse_args(args)
+
+        if (args.mode == "records"):
+            for _ in range(0, args.repeat): print(json.dumps(SsdpBenchmark.measure_records(100000 if (args.count is None) else args.count), sort_keys = True))
+            return
+        #
+
+        if (args.mode == "tasks"):
+            for _ in range(0, args.repeat): print(json.dumps(SsdpBenchmark.measure_tasks(args.cycles, (1000 if (args.count is None) else args.count), args.seed), sort_keys = True))
+            return
+        #
+
+        if (args.mode == "headers"):
+            datagrams = (SsdpBenchmark.get_corpus_datagrams() if (args.capture is None) else SsdpCapture.read(args.capture))
+            for _ in range(0, args.repeat): print(json.dumps(SsdpBenchmark.measure_headers(datagrams, args.rounds), sort_keys = True))
+
+            return
+        #
+
+        datagrams = (SsdpCapture.read(args.capture)
+                     if (args.capture is not None) else
+                     SsdpBenchmark.get_storm_datagrams(args.devices,
+                                                       args.services,
+                                                       args.alive,
+                                                       args.byebye,
+                                                       args.update,
+                                                       args.searches,
+                                                       seed = args.seed
+                                                      )
+                    )
+
+        benchmark = SsdpBenchmark()
+
+        for _ in range(0, args.repeat):
+            if (args.mode == "identifiers"): results = SsdpBenchmark.measure_identifiers(datagrams)
+            elif (args.mode == "send"):
+                ( host, port ) = args.target.rsplit(":", 1)
+                results = benchmark.send(datagrams, ( host.strip("[]"), int(port) ), args.timing, args.speed)
+            else: results = benchmark.inject(datagrams, args.timing, args.speed)
+
+            print(json.dumps(results, sort_keys = True))
+        #
+    #
+#
+
+if (__name__ == "__main__"): SsdpBenchmark.main()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from base64 import b64decode, b64encode
+from time import time
+
+from dNG.data.binary import Binary
+from dNG.data.json_resource import JsonResource
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.thread_lock import ThreadLock
+
+class SsdpCapture(object):
+    """
+"SsdpCapture" records received SSDP datagrams with their timestamp and
+source address. Each datagram is written as a JSON line to the file given.
+Capturing is disabled if the file can not be written.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    _instance = None
+    """
+SsdpCapture instance recording to the configured file
+    """
+    _instance_lock = ThreadLock()
+    """
+Thread safety lock
+    """
+    _instance_resolved = False
+    """
+True if the configured capture file has been opened or capturing is
+disabled
+    """
+
+    def __init__(self, file_path):
+        """
+Constructor __init__(SsdpCapture)
+
+:param file_path: File path to append datagrams to
+
+:since: v0.2.00
+        """
+
+        self.file_object = open(file_path, "ab")
+        """
+File object datagrams are appended to
+        """
+        self.file_path = file_path
+        """
+File path datagrams are appended to
+        """
+        self.json_resource = JsonResource()
+        """
+JSON resource used to encode entries
+        """
+        self.lock = ThreadLock()
+        """
+Thread safety lock
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+    #
+
+    def close(self):
+        """
+Closes the capture file.
+
+:since: v0.2.00
+        """
+
+        with self.lock:
+            if (self.file_object is not None):
+                self.file_object.close()
+                self.file_object = None
+            #
+        #
+    #
+
+    def write(self, data, source_data, timestamp = None):
+        """
+Records the given datagram.
+
+:param data: SSDP datagram received
+:param source_data: Source address data
+:param timestamp: UNIX timestamp the datagram has been received
+
+:since: v0.2.00
+        """
+
+        if (timestamp is None): timestamp = time()
+
+        line = self.json_resource.data_to_json({ "timestamp": timestamp,
+                                                 "source": [ source_data[0], source_data[1] ],
+                                                 "data": Binary.str(b64encode(data))
+                                               })
+
+        with self.lock:
+            if (self.file_object is not None):
+                try:
+                    self.file_object.write(Binary.utf8_bytes("{0}\n".format(line)))
+                    self.file_object.flush()
+                except IOError as handled_exception:
+                    if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_upnp")
+
+                    self.file_object.close()
+                    self.file_object = None
+                #
+            #
+        #
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Returns the SsdpCapture instance recording to the file configured with
+"pas_upnp_ssdp_capture_file". The setting is only resolved once.
+
+:return: (object) SsdpCapture instance; None if capturing is disabled
+:since:  v0.2.00
+        """
+
+        if (not SsdpCapture._instance_resolved):
+            with SsdpCapture._instance_lock:
+                if (not SsdpCapture._instance_resolved):
+                    file_path = Settings.get("pas_upnp_ssdp_capture_file")
+
+                    if (file_path is not None):
+                        try: SsdpCapture._instance = SsdpCapture(file_path)
+                        except IOError as handled_exception:
+                            log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+                            if (log_handler is not None): log_handler.error(handled_exception, context = "pas_upnp")
+                        #
+                    #
+
+                    SsdpCapture._instance_resolved = True
+                #
+            #
+        #
+
+        return SsdpCapture._instance
+    #
+
+    @staticmethod
+    def read(file_path):
+        """
+Reads all datagrams recorded in the given file.
+
+:param file_path: Capture file path
+
+:return: (list) List of UNIX timestamp, source address data and datagram
+         tuples
+:since:  v0.2.00
+        """
+
+        json_resource = JsonResource()
+        _return = [ ]
+
+        with open(file_path, "rb") as file_object:
+            for line in file_object:
+                entry = json_resource.json_to_data(Binary.str(line))
+
+                if (type(entry) is dict and "data" in entry):
+                    _return.append(( entry.get("timestamp", 0),
+                                     tuple(entry.get("source", ( "127.0.0.1", 1900 ))),
+                                     b64decode(Binary.bytes(entry['data']))
+                                   ))
+                #
+            #
+        #
+
+        return _return
+    #
+#
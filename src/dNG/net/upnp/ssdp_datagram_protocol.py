@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from zlib import crc32
+import asyncio
+
+from dNG.data.binary import Binary
+from dNG.runtime.exception_log_trap import ExceptionLogTrap
+
+from .ssdp_capture import SsdpCapture
+from .ssdp_header_parser import SsdpHeaderParser
+from .ssdp_request import SsdpRequest
+
+class SsdpDatagramProtocol(asyncio.DatagramProtocol):
+    """
+asyncio protocol handling SSDP datagrams received on a listener endpoint.
+Datagrams are only parsed on the event loop. Handling them may block and is
+done by single threaded executors selected by the source IP to keep the
+order of messages of a device. Search results are sent from the event loop
+after their MX based delay.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, loop, executors, log_handler = None):
+        """
+Constructor __init__(SsdpDatagramProtocol)
+
+:param loop: asyncio event loop
+:param executors: List of single threaded executors handling datagrams
+:param log_handler: Log handler to use
+
+:since: v0.2.00
+        """
+
+        asyncio.DatagramProtocol.__init__(self)
+
+        self.executors = executors
+        """
+List of single threaded executors handling parsed datagrams
+        """
+        self.log_handler = log_handler
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.loop = loop
+        """
+asyncio event loop the endpoint is registered with
+        """
+        self.transport = None
+        """
+asyncio datagram transport
+        """
+    #
+
+    def connection_lost(self, exc):
+        """
+asyncio.DatagramProtocol callback for a closed endpoint.
+
+:param exc: Exception raised or None if closed regularly
+
+:since: v0.2.00
+        """
+
+        self.transport = None
+        if (exc is not None and self.log_handler is not None): self.log_handler.debug(exc, context = "pas_upnp")
+    #
+
+    def connection_made(self, transport):
+        """
+asyncio.DatagramProtocol callback for a new endpoint.
+
+:param transport: asyncio datagram transport
+
+:since: v0.2.00
+        """
+
+        self.transport = transport
+    #
+
+    def datagram_received(self, data, addr):
+        """
+asyncio.DatagramProtocol callback for a received datagram.
+
+:param data: Datagram received
+:param addr: Source address data
+
+:since: v0.2.00
+        """
+
+        with ExceptionLogTrap("pas_upnp"):
+            ssdp_request_data = (None if (len(data) < 1) else SsdpHeaderParser.parse(data))
+            executor = self.executors[crc32(Binary.bytes(addr[0])) % len(self.executors)]
+
+            self.loop.run_in_executor(executor, self._handle_parsed_data, data, ssdp_request_data, addr)
+        #
+    #
+
+    def error_received(self, exc):
+        """
+asyncio.DatagramProtocol callback for a failed send or receive operation.
+
+:param exc: Exception raised
+
+:since: v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug(exc, context = "pas_upnp")
+    #
+
+    def _handle_parsed_data(self, data, ssdp_request_data, addr):
+        """
+Handles a parsed datagram in an executor thread.
+
+:param data: Datagram received
+:param ssdp_request_data: Parsed SSDP request data
+:param addr: Source address data
+
+:since: v0.2.00
+        """
+
+        with ExceptionLogTrap("pas_upnp"):
+            capture = SsdpCapture.get_instance()
+            if (capture is not None): capture.write(data, addr)
+
+            SsdpRequest.handle_parsed_data(ssdp_request_data, addr, self._schedule_search_result, self.log_handler)
+        #
+    #
+
+    def _schedule_search_result(self, event, wait_seconds):
+        """
+Schedules the given search result event with the event loop.
+
+:param event: Search result event
+:param wait_seconds: Seconds to wait before the event is sent
+
+:since: v0.2.00
+        """
+
+        if (not self.loop.is_closed()): self.loop.call_soon_threadsafe(self.loop.call_later, max(0, wait_seconds), event.run)
+    #
+#
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from dNG.data.binary import Binary
+
+class SsdpHeaderParser(object):
+    """
+"SsdpHeaderParser" parses the request line and the headers of a received
+SSDP datagram. Datagrams other than NOTIFY and M-SEARCH requests are
+rejected before any header is parsed. Non-standard headers are kept for
+hooks filtering headers of devices with quirks.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    BINARY_COLON = Binary.bytes(":")
+    """
+Header name separator
+    """
+    BINARY_HTTP_VERSION_PREFIX = Binary.bytes("HTTP/")
+    """
+HTTP version prefix of the request line
+    """
+    BINARY_NEWLINE = Binary.bytes("\n")
+    """
+Line separator
+    """
+    BINARY_REQUEST_PREFIXES = ( Binary.bytes("NOTIFY * "), Binary.bytes("M-SEARCH * ") )
+    """
+Request line prefixes of SSDP requests handled
+    """
+    @staticmethod
+    def parse(data):
+        """
+Parses the given SSDP datagram.
+
+:param data: Received datagram
+
+:return: (tuple) Upper-case method, path, HTTP version and dict of
+         upper-case header names with its values; None if not a supported
+         SSDP request
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        data = Binary.bytes(data)
+        request_line_end = data.find(SsdpHeaderParser.BINARY_NEWLINE, 0, 128)
+
+        if (request_line_end > 0):
+            request_prefix = data[:11].upper()
+
+            is_supported = (request_prefix.startswith(SsdpHeaderParser.BINARY_REQUEST_PREFIXES[0])
+                            or request_prefix == SsdpHeaderParser.BINARY_REQUEST_PREFIXES[1]
+                           )
+
+            request_line = (data[:request_line_end].strip().split(None, 2) if (is_supported) else None)
+
+            if (request_line is not None
+                and len(request_line) == 3
+                and request_line[2].upper().startswith(SsdpHeaderParser.BINARY_HTTP_VERSION_PREFIX)
+               ):
+                try: http_version = float(request_line[2][5:])
+                except ValueError: http_version = None
+
+                if (http_version is not None):
+                    _return = ( Binary.str(request_line[0].upper()),
+                                Binary.str(request_line[1]),
+                                http_version,
+                                SsdpHeaderParser._parse_headers(data, 1 + request_line_end)
+                              )
+                #
+            #
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def _parse_headers(data, position):
+        """
+Parses the headers of the given SSDP datagram.
+
+:param data: Received datagram
+:param position: Position of the first header line
+
+:return: (dict) Dict of upper-case header names with its values
+:since:  v0.2.00
+        """
+
+        _return = { }
+
+        data_length = len(data)
+
+        while (position < data_length):
+            line_end = data.find(SsdpHeaderParser.BINARY_NEWLINE, position)
+            if (line_end < 0): line_end = data_length
+
+            colon_position = data.find(SsdpHeaderParser.BINARY_COLON, position, line_end)
+
+            if (colon_position < 0):
+                # An empty line separates the headers from the body
+                if (line_end - position < 3 and len(data[position:line_end].strip()) < 1): break
+            else:
+                name_end = colon_position
+
+                # Header names are not expected to contain whitespace but some devices pad them
+                while (name_end > position and data[name_end - 1:name_end].isspace()): name_end -= 1
+
+                if (name_end > position): _return[Binary.str(data[position:name_end].upper())] = Binary.str(data[1 + colon_position:line_end].strip())
+            #
+
+            position = 1 + line_end
+        #
+
+        return _return
+    #
+#
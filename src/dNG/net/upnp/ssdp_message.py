@@ -46,6 +46,17 @@ for UDP.
              GNU General Public License 2
     """
 
+    def get_notify_data(self):
+        """
+Returns the encoded SSDP NOTIFY message for the headers set.
+
+:return: (bytes) SSDP message
+:since:  v0.2.00
+        """
+
+        return self.get_request_data("NOTIFY")
+    #
+
     def send_m_search(self):
         """
 Invoke an SSDP M-SEARCH method on the unicast or multicast recipient.
@@ -35,10 +35,12 @@ import re
 from dNG.data.binary import Binary
 from dNG.data.upnp.client_settings import ClientSettings
 from dNG.module.named_loader import NamedLoader
-from dNG.net.http.raw_client import RawClient as HttpClient
 from dNG.net.server.handler import Handler
 from dNG.plugins.hook import Hook
 
+from .ssdp_capture import SsdpCapture
+from .ssdp_header_parser import SsdpHeaderParser
+
 class SsdpRequest(Handler):
     """
 Class for handling a received SSDP message.
@@ -61,30 +63,45 @@ Newline bytes used in raw HTTP data
 RegEx to extract the "Max-Age" header value
     """
 
-    def _thread_run(self):
+    @staticmethod
+    def handle_data(ssdp_data, source_data, search_result_scheduler = None, log_handler = None):
         """
-Active conversation
+Handles a received SSDP datagram.
+
+:param ssdp_data: SSDP datagram received
+:param source_data: Source address data
+:param search_result_scheduler: Callable receiving a search result event and
+       the seconds to wait before it should be sent
+:param log_handler: Log handler to use
 
 :since: v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._thread_run()- (#echo(__LINE__)#)", self, context = "pas_upnp")
+        capture = SsdpCapture.get_instance()
+        if (capture is not None): capture.write(ssdp_data, source_data)
 
-        ssdp_data = self.get_data(65535)
+        ssdp_request_data = (None if (len(ssdp_data) < 1) else SsdpHeaderParser.parse(ssdp_data))
+        SsdpRequest.handle_parsed_data(ssdp_request_data, source_data, search_result_scheduler, log_handler)
+    #
 
-        headers = (None if (ssdp_data == "") else HttpClient.get_headers(ssdp_data))
-        ssdp_request = None
+    @staticmethod
+    def handle_parsed_data(ssdp_request_data, source_data, search_result_scheduler = None, log_handler = None):
+        """
+Handles an SSDP request already parsed by "SsdpHeaderParser".
 
-        if (headers is not None and "@http" in headers):
-            ssdp_request_data = headers['@http'].split(" ", 2)
+:param ssdp_request_data: Tuple of request method, path, HTTP version and
+       headers or None if the datagram was rejected
+:param source_data: Source address data
+:param search_result_scheduler: Callable receiving a search result event and
+       the seconds to wait before it should be sent
+:param log_handler: Log handler to use
 
-            if (len(ssdp_request_data) > 2 and ssdp_request_data[2].startswith("HTTP/")):
-                ssdp_request = ssdp_request_data[0].upper()
-                ssdp_request_path = ssdp_request_data[1]
+:since: v0.2.00
+        """
 
-                http_version = float(ssdp_request_data[2].split("/", 1)[1])
-            #
-        #
+        ssdp_request = None
+
+        if (ssdp_request_data is not None): ( ssdp_request, ssdp_request_path, http_version, headers ) = ssdp_request_data
 
         if (ssdp_request == "NOTIFY" and ssdp_request_path == "*" and "NT" in headers and "NTS" in headers and "USN" in headers):
             bootid = (int(headers['BOOTID.UPNP.ORG']) if ("BOOTID.UPNP.ORG" in headers) else None)
@@ -112,16 +129,27 @@ Active conversation
                     unicast_port = (int(headers['SEARCHPORT.UPNP.ORG']) if ("SEARCHPORT.UPNP.ORG" in headers) else None)
 
                     if (re_result is not None): control_point.update_usn(headers['SERVER'], headers['USN'], bootid, bootid_old, configid, int(re_result.group(2)), unicast_port, http_version, headers['LOCATION'], headers)
-                    elif (self.log_handler is not None): self.log_handler.debug("{0!r} ignored broken NOTIFY CACHE-CONTROL '{1}'", self, headers['CACHE-CONTROL'], context = "pas_upnp")
-                elif (self.log_handler is not None): self.log_handler.debug("{0!r} ignored incomplete NOTIFY {1!r}", self, headers, context = "pas_upnp")
+                    elif (log_handler is not None): log_handler.debug("pas.upnp.SsdpRequest ignored broken NOTIFY CACHE-CONTROL '{0}'", headers['CACHE-CONTROL'], context = "pas_upnp")
+                elif (log_handler is not None): log_handler.debug("pas.upnp.SsdpRequest ignored incomplete NOTIFY {0!r}", headers, context = "pas_upnp")
             elif (headers['NTS'] == "ssdp:byebye"): control_point.delete_usn(headers['USN'], bootid, configid, headers)
-            elif (self.log_handler is not None): self.log_handler.debug("{0!r} received unknown NOTIFY {1!r}", self, headers, context = "pas_upnp")
+            elif (log_handler is not None): log_handler.debug("pas.upnp.SsdpRequest received unknown NOTIFY {0!r}", headers, context = "pas_upnp")
         elif (ssdp_request == "M-SEARCH" and ssdp_request_path == "*" and "MAN" in headers and headers['MAN'].strip("\"") == "ssdp:discover" and "ST" in headers):
             wait_timeout = (int(headers['MX']) if ("MX" in headers) else 1)
             if (wait_timeout > 5): wait_timeout = 5
 
             ssdp_search_class = NamedLoader.get_class("dNG.net.upnp.SsdpSearch")
-            ssdp_search_class.handle_request(self.address, wait_timeout, headers['ST'], headers)
+            ssdp_search_class.handle_request(source_data, wait_timeout, headers['ST'], headers, search_result_scheduler)
         #
     #
+
+    def _thread_run(self):
+        """
+Active conversation
+
+:since: v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._thread_run()- (#echo(__LINE__)#)", self, context = "pas_upnp")
+        SsdpRequest.handle_data(self.get_data(65535), self.address, log_handler = self.log_handler)
+    #
 #
@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from copy import copy
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+from struct import pack
+from threading import Thread
+from time import time
+from zlib import crc32
+import socket
+
+from dNG.data.binary import Binary
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.exception_log_trap import ExceptionLogTrap
+from dNG.runtime.operation_not_supported_exception import OperationNotSupportedException
+
+from .ssdp_header_parser import SsdpHeaderParser
+from .ssdp_request import SsdpRequest
+
+class SsdpReuseportListener(object):
+    """
+Listener instance receiving IPv4 or IPv6 multicast SSDP messages with
+several worker processes. Each worker binds its own socket with
+"SO_REUSEPORT" and forwards parsed requests through a pipe to the process
+owning the ControlPoint.
+
+Multicast datagrams are delivered to every socket bound to the port.
+Workers parse only the ones whose source IP hashes to their index. All
+messages of a device are therefore handled in order by the same worker.
+Unicast datagrams are already balanced by the kernel and parsed by the
+worker receiving them.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    IP_PKTINFO = getattr(socket, "IP_PKTINFO", 8)
+    """
+Socket option to receive the destination address of IPv4 datagrams
+    """
+    RECEIVER_TIMEOUT = 1
+    """
+Seconds the receiver thread waits for forwarded requests before it checks
+if the listener is still active
+    """
+    WORKER_RESTART_DELAY = 1
+    """
+Seconds to wait before a worker process stopped unexpectedly is restarted
+    """
+    WORKER_STOP_TIMEOUT = 5
+    """
+Seconds to wait for a terminated worker process
+    """
+
+    def __init__(self, ip, multicast_address = None, port = 1900):
+        """
+Constructor __init__(SsdpReuseportListener)
+
+:param ip: IPv4 / IPv6 address
+:param multicast_address: Multicast address to listen for
+:param port: UDP port to listen on
+
+:since: v0.2.00
+        """
+
+        self.listener_active = False
+        """
+True if multicast listener is active
+        """
+        self.listener_if_index = 0
+        """
+Listener IPv6 interface index
+        """
+        self.listener_ip = ip
+        """
+Listener IP address
+        """
+        self.listener_port = port
+        """
+Listener UDP port
+        """
+        self.log_handler = NamedLoader.get_singleton("dNG.data.logging.LogHandler", False)
+        """
+The LogHandler is called whenever debug messages should be logged or errors
+happened.
+        """
+        self.multicast_addresses = [ ]
+        """
+Multicast addresses to listen for on the worker sockets
+        """
+        self.receiver_thread = None
+        """
+Thread handling requests forwarded by the worker processes
+        """
+        self.statistics = None
+        """
+List with the number of requests forwarded by each worker
+        """
+        self.workers = [ ]
+        """
+List of worker process and pipe connection tuples
+        """
+        self.workers_count = 1
+        """
+Number of worker processes
+        """
+
+        Settings.read_file("{0}/settings/pas_upnp.json".format(Settings.get("path_data")))
+
+        self.workers_count = int(Settings.get("pas_upnp_ssdp_reuseport_workers", 1))
+        if (self.workers_count < 1): self.workers_count = 1
+
+        # pylint: disable=no-member
+
+        if (":" in ip):
+            # Split listener interface from IPv6 address and find corresponding index
+            if ("%" in ip and hasattr(socket, "if_nameindex")):
+                if_list = { if_name: index for index, if_name in socket.if_nameindex() }
+
+                ( ip, _if ) = ip.split("%", 1)
+                self.listener_if_index = (if_list[_if] if (_if in if_list) else int(_if))
+
+                self.listener_ip = ip
+            #
+
+            if (multicast_address is None): multicast_address = "ff02::c"
+        elif (multicast_address is None): multicast_address = "239.255.255.250"
+
+        self.add_address(multicast_address)
+    #
+
+    def add_address(self, multicast_address):
+        """
+Adds a new multicast address to listen for SSDP messages. Addresses can
+only be added before the worker processes are started.
+
+:param multicast_address: Multicast address to listen for
+
+:since: v0.2.00
+        """
+
+        if (self.listener_active): raise OperationNotSupportedException("Multicast addresses can not be added to running SSDP worker processes")
+
+        if (multicast_address not in self.multicast_addresses
+            and (":" not in multicast_address or socket.has_ipv6)
+           ): self.multicast_addresses.append(multicast_address)
+    #
+
+    @staticmethod
+    def _get_socket(ip, if_index, port, multicast_addresses):
+        """
+Returns a new socket bound with "SO_REUSEPORT" and joined to the given
+multicast addresses.
+
+:param ip: IPv4 / IPv6 address
+:param if_index: IPv6 interface index
+:param port: UDP port to listen on
+:param multicast_addresses: Multicast addresses to join
+
+:return: (object) Socket instance
+:since:  v0.2.00
+        """
+
+        is_ipv6 = (":" in ip)
+
+        _return = socket.socket((socket.AF_INET6 if (is_ipv6) else socket.AF_INET), socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        _return.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        _return.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        if (is_ipv6):
+            _return.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_RECVPKTINFO, 1)
+            _return.bind(( "::", port ))
+
+            for multicast_address in multicast_addresses:
+                _return.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP, socket.inet_pton(socket.AF_INET6, multicast_address) + pack("I", if_index))
+            #
+        else:
+            _return.setsockopt(socket.IPPROTO_IP, SsdpReuseportListener.IP_PKTINFO, 1)
+            _return.bind(( "", port ))
+
+            for multicast_address in multicast_addresses:
+                _return.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, socket.inet_aton(multicast_address) + socket.inet_aton(ip))
+            #
+        #
+
+        return _return
+    #
+
+    def get_statistics(self):
+        """
+Returns the number of requests forwarded by each worker process.
+
+:return: (list) Number of requests forwarded; None if not started
+:since:  v0.2.00
+        """
+
+        return (None if (self.statistics is None) else copy(self.statistics))
+    #
+
+    def is_listening(self):
+        """
+Returns true if the listener is active.
+
+:return: (bool) Listener state
+:since:  v0.2.00
+        """
+
+        return self.listener_active
+    #
+
+    @staticmethod
+    def _is_multicast_destination(ancillary_data):
+        """
+Returns true if the ancillary data of a received datagram contains a
+multicast destination address.
+
+:param ancillary_data: Ancillary data of "socket.recvmsg()"
+
+:return: (bool) True if received for a multicast address
+:since:  v0.2.00
+        """
+
+        _return = False
+
+        for ( level, _type, data ) in ancillary_data:
+            if (level == socket.IPPROTO_IP and _type == SsdpReuseportListener.IP_PKTINFO and len(data) >= 12):
+                # struct in_pktinfo: int ipi_ifindex, in_addr ipi_spec_dst, in_addr ipi_addr
+                _return = (224 <= bytearray(data[8:9])[0] < 240)
+                break
+            elif (level == socket.IPPROTO_IPV6 and _type == socket.IPV6_PKTINFO and len(data) >= 16):
+                # struct in6_pktinfo: in6_addr ipi6_addr, unsigned int ipi6_ifindex
+                _return = (bytearray(data[0:1])[0] == 0xff)
+                break
+            #
+        #
+
+        return _return
+    #
+
+    def remove_address(self, multicast_address):
+        """
+Removes a multicast address. Addresses can only be removed before the
+worker processes are started.
+
+:param multicast_address: Multicast address to remove
+
+:since: v0.2.00
+        """
+
+        if (self.listener_active): raise OperationNotSupportedException("Multicast addresses can not be removed from running SSDP worker processes")
+        if (multicast_address in self.multicast_addresses): self.multicast_addresses.remove(multicast_address)
+    #
+
+    def _run_receiver(self):
+        """
+Handles the requests forwarded by the worker processes until the listener
+is stopped.
+
+:since: v0.2.00
+        """
+
+        connections = dict(( worker[1], index ) for ( index, worker ) in enumerate(self.workers))
+        workers_restarting = { }
+
+        while (self.listener_active and (len(connections) > 0 or len(workers_restarting) > 0)):
+            timestamp = time()
+
+            for worker_index in [ index for ( index, restart_timestamp ) in workers_restarting.items() if (restart_timestamp <= timestamp) ]:
+                del(workers_restarting[worker_index])
+
+                with ExceptionLogTrap("pas_upnp"):
+                    self.workers[worker_index] = self._start_worker(worker_index)
+                    connections[self.workers[worker_index][1]] = worker_index
+                #
+            #
+
+            for connection in wait(list(connections.keys()), SsdpReuseportListener.RECEIVER_TIMEOUT):
+                try: ( source_data, ssdp_request_data ) = connection.recv()
+                except ( EOFError, OSError ):
+                    worker_index = connections.pop(connection)
+                    connection.close()
+
+                    if (self.listener_active):
+                        process = self.workers[worker_index][0]
+                        process.join(SsdpReuseportListener.WORKER_STOP_TIMEOUT)
+
+                        if (self.log_handler is not None): self.log_handler.error("#echo(__FILEPATH__)# -{0!r}._run_receiver()- reporting: SSDP worker {1:d} stopped unexpectedly with exit code {2!r} and will be restarted", self, worker_index, process.exitcode, context = "pas_upnp")
+                        workers_restarting[worker_index] = time() + SsdpReuseportListener.WORKER_RESTART_DELAY
+                    #
+
+                    continue
+                #
+
+                self.statistics[connections[connection]] += 1
+
+                with ExceptionLogTrap("pas_upnp"):
+                    SsdpRequest.handle_parsed_data(ssdp_request_data, source_data, log_handler = self.log_handler)
+                #
+            #
+        #
+    #
+
+    @staticmethod
+    def _run_worker(ip, if_index, port, multicast_addresses, worker_index, workers_count, connection):
+        """
+Receives and parses SSDP datagrams in a worker process and forwards the
+ones handled by this worker.
+
+:param ip: IPv4 / IPv6 address
+:param if_index: IPv6 interface index
+:param port: UDP port to listen on
+:param multicast_addresses: Multicast addresses to join
+:param worker_index: Index of this worker
+:param workers_count: Number of worker processes
+:param connection: Pipe connection to forward parsed requests to
+
+:since: v0.2.00
+        """
+
+        listener_socket = SsdpReuseportListener._get_socket(ip, if_index, port, multicast_addresses)
+        ancillary_size = socket.CMSG_SPACE(32)
+
+        while True:
+            ( data, ancillary_data, _, source_data ) = listener_socket.recvmsg(65535, ancillary_size)
+
+            if (workers_count > 1
+                and SsdpReuseportListener._is_multicast_destination(ancillary_data)
+                and crc32(Binary.bytes(source_data[0])) % workers_count != worker_index
+               ): continue
+
+            with ExceptionLogTrap("pas_upnp"):
+                ssdp_request_data = (None if (len(data) < 1) else SsdpHeaderParser.parse(data))
+                if (ssdp_request_data is not None): connection.send(( source_data, ssdp_request_data ))
+            #
+        #
+    #
+
+    def start(self):
+        """
+Starts the worker processes and the thread handling their requests.
+
+:since: v0.2.00
+        """
+
+        if (self.listener_active): return
+
+        if (len(self.multicast_addresses) < 1):
+            if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.start()- reporting: No multicast addresses bound", self, context = "pas_upnp")
+            return
+        #
+
+        self.listener_active = True
+        self.statistics = [ 0 ] * self.workers_count
+
+        for worker_index in range(0, self.workers_count): self.workers.append(self._start_worker(worker_index))
+
+        self.receiver_thread = Thread(target = self._run_receiver)
+        self.receiver_thread.daemon = True
+        self.receiver_thread.start()
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.start()- reporting: Started {1:d} workers listening on '{2}'", self, self.workers_count, self.listener_ip, context = "pas_upnp")
+    #
+
+    def _start_worker(self, worker_index):
+        """
+Starts the worker process with the given index.
+
+:param worker_index: Index of the worker
+
+:return: (tuple) Worker process and pipe connection to receive forwarded
+         requests from
+:since:  v0.2.00
+        """
+
+        ( connection_receiver, connection_sender ) = Pipe(False)
+
+        process = Process(target = SsdpReuseportListener._run_worker,
+                          args = ( self.listener_ip,
+                                   self.listener_if_index,
+                                   self.listener_port,
+                                   self.multicast_addresses,
+                                   worker_index,
+                                   self.workers_count,
+                                   connection_sender
+                                 )
+                         )
+
+        process.daemon = True
+        process.start()
+
+        connection_sender.close()
+
+        return ( process, connection_receiver )
+    #
+
+    def stop(self):
+        """
+Stops the worker processes and the thread handling their requests.
+
+:since: v0.2.00
+        """
+
+        if (self.listener_active):
+            self.listener_active = False
+
+            # Workers are only restarted by the receiver thread
+            if (self.receiver_thread is not None):
+                self.receiver_thread.join(SsdpReuseportListener.RECEIVER_TIMEOUT * 2)
+                self.receiver_thread = None
+            #
+
+            for ( process, _ ) in self.workers: process.terminate()
+            for ( process, _ ) in self.workers: process.join(SsdpReuseportListener.WORKER_STOP_TIMEOUT)
+
+            for ( _, connection ) in self.workers: connection.close()
+            self.workers = [ ]
+        #
+    #
+#
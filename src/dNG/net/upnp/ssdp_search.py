@@ -31,10 +31,14 @@ https://www.direct-netware.de/redirect?licenses;gpl
 """
 
 from random import uniform as randfloat
+from time import time
 
+from dNG.data.settings import Settings
 from dNG.data.upnp.client_settings import ClientSettings
 from dNG.data.upnp.control_point_event import ControlPointEvent
 from dNG.data.upnp.device import Device
+from dNG.data.upnp.lru_cache import LruCache
+from dNG.runtime.thread_lock import ThreadLock
 
 from .control_point import ControlPoint
 
@@ -51,6 +55,65 @@ The SSDP search instance.
              GNU General Public License 2
     """
 
+    _index = None
+    """
+Dict of UPnP search targets with search result tuples
+    """
+    _index_configid = None
+    """
+UPnP configId value the index has been built for
+    """
+    _index_lock = ThreadLock()
+    """
+Thread safety lock
+    """
+    _limiter_lock = ThreadLock()
+    """
+Thread safety lock for the rate limiter and pending searches
+    """
+    _pending = { }
+    """
+Dict of source address and ST tuples with the UNIX timestamp their search
+results are sent until
+    """
+    _source_buckets = LruCache(1024)
+    """
+Token buckets of search requests per source IP address
+    """
+    _statistics = { "received": 0, "dropped": 0, "merged": 0 }
+    """
+Number of search requests received, dropped by the rate limiter and merged
+with identical ones still pending
+    """
+
+    @staticmethod
+    def _get_condition(search_target):
+        """
+Returns the UPnP search condition and its parsed identifier for the given
+UPnP search target.
+
+:param search_target: UPnP search target
+
+:return: (tuple) UPnP search condition and parsed UPnP search condition
+         identifier; None if not supported
+:since:  v0.2.00
+        """
+
+        condition = None
+        condition_identifier = None
+
+        if (search_target == "ssdp:all" or search_target == "upnp:rootdevice" or search_target.startswith("uuid:")): condition = search_target
+        elif (search_target.startswith("urn:")):
+            condition = search_target
+            condition_identifier = Device.get_identifier("uuid:00000000-0000-0000-0000-000000000000::{0}".format(search_target), None, None)
+        elif (len(search_target) > 41):
+            condition = search_target
+            condition_identifier = Device.get_identifier(search_target, None, None)
+        #
+
+        return ( condition, condition_identifier )
+    #
+
     @staticmethod
     def _get_device_result_usn(device, condition_identifier):
         """
@@ -73,6 +136,75 @@ Returns the result UPnP USN based on the search condition.
                )
     #
 
+    @staticmethod
+    def _get_index(control_point):
+        """
+Returns the index of search results for all UPnP search targets matching
+managed devices. It is rebuilt if the UPnP configId value has changed.
+
+:param control_point: UPnP ControlPoint instance
+
+:return: (dict) Dict of UPnP search targets with search result tuples
+:since:  v0.2.00
+        """
+
+        configid = control_point.get_configid()
+
+        with SsdpSearch._index_lock:
+            if (SsdpSearch._index is None or SsdpSearch._index_configid != configid):
+                SsdpSearch._index = SsdpSearch._get_index_rebuilt(control_point)
+                SsdpSearch._index_configid = configid
+            #
+
+            _return = SsdpSearch._index
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def _get_index_rebuilt(control_point):
+        """
+Builds the index of search results for all UPnP search targets matching
+managed devices.
+
+:param control_point: UPnP ControlPoint instance
+
+:return: (dict) Dict of UPnP search targets with search result tuples
+:since:  v0.2.00
+        """
+
+        search_targets = set([ "ssdp:all", "upnp:rootdevice" ])
+        managed_devices = control_point.get_managed_devices()
+
+        for uuid in managed_devices:
+            device = managed_devices[uuid]
+            devices = { uuid: device }
+
+            for embedded_uuid in device.get_embedded_device_uuids(): devices[embedded_uuid] = device.get_embedded_device(embedded_uuid)
+
+            for device_uuid in devices:
+                device = devices[device_uuid]
+
+                search_targets.add("uuid:{0}".format(device_uuid))
+                search_targets.update(SsdpSearch._get_versioned_search_targets("device", device))
+
+                for service_id in device.get_service_ids():
+                    search_targets.update(SsdpSearch._get_versioned_search_targets("service", device.get_service(service_id)))
+                #
+            #
+        #
+
+        _return = { }
+
+        for search_target in search_targets:
+            ( condition, condition_identifier ) = SsdpSearch._get_condition(search_target)
+            _return[search_target] = tuple(SsdpSearch._get_results(control_point, condition, condition_identifier))
+        #
+
+        return _return
+    #
+
     @staticmethod
     def _get_result_search_target(condition, identifier_instance):
         """
@@ -91,6 +223,86 @@ Returns the result ST returned.
                )
     #
 
+    @staticmethod
+    def _get_results(control_point, condition, condition_identifier):
+        """
+Searches for hosted devices and services matching the given search
+condition.
+
+:param control_point: UPnP ControlPoint instance
+:param condition: UPnP search condition
+:param condition_identifier: Parsed UPnP search condition identifier
+
+:return: (list) Search result tuples of USN, location and ST to be send
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        if (condition is not None):
+            if (condition_identifier is None
+                and condition == "upnp:rootdevice"
+               ): _return += SsdpSearch._get_rootdevice_results(condition)
+            else:
+                managed_devices = control_point.get_managed_devices()
+
+                for uuid in managed_devices:
+                    device = managed_devices[uuid]
+
+                    _return += SsdpSearch._handle_device_search(condition,
+                                                                condition_identifier,
+                                                                uuid,
+                                                                device
+                                                               )
+
+                    if (condition == "ssdp:all"
+                        or (condition_identifier is not None and condition_identifier['class'] == "service")
+                       ):
+                        services = device.get_service_ids()
+
+                        for service_id in services:
+                            service = device.get_service(service_id)
+
+                            _return += SsdpSearch._handle_service_search(condition,
+                                                                         condition_identifier,
+                                                                         service,
+                                                                         device
+                                                                        )
+                        #
+                    #
+
+                    embedded_devices = device.get_embedded_device_uuids()
+
+                    for embedded_uuid in embedded_devices:
+                        embedded_device = device.get_embedded_device(embedded_uuid)
+
+                        _return += SsdpSearch._handle_device_search(condition,
+                                                                    condition_identifier,
+                                                                    embedded_uuid,
+                                                                    embedded_device
+                                                                   )
+
+                        if (condition_identifier is not None and condition_identifier['class'] == "service"):
+                            services = embedded_device.get_service_ids()
+
+                            for service_id in services:
+                                service = embedded_device.get_service(service_id)
+
+                                _return += SsdpSearch._handle_service_search(condition,
+                                                                             condition_identifier,
+                                                                             service,
+                                                                             embedded_device
+                                                                            )
+                            #
+                        #
+                    #
+                #
+            #
+        #
+
+        return _return
+    #
+
     @staticmethod
     def _get_rootdevice_results(condition):
         """
@@ -99,7 +311,7 @@ list of results.
 
 :param condition: UPnP search condition
 
-:return: (list) Search results to be send
+:return: (list) Search result tuples of USN, location and ST to be send
 :since:  v0.2.00
         """
 
@@ -110,15 +322,29 @@ list of results.
         for uuid in managed_devices:
             device = managed_devices[uuid]
 
-            _return.append({ "usn": "uuid:{0}::upnp:rootdevice".format(uuid),
-                             "location": device.get_desc_url(),
-                             "search_target": condition
-                           })
+            _return.append(( "uuid:{0}::upnp:rootdevice".format(uuid),
+                             device.get_desc_url(),
+                             condition
+                           ))
         #
 
         return _return
     #
 
+    @staticmethod
+    def get_search_statistics():
+        """
+Returns the number of search requests received, dropped by the per source
+rate limiter and merged with identical ones still pending.
+
+:return: (dict) Dict with "received", "dropped" and "merged"
+:since:  v0.2.00
+        """
+
+        with SsdpSearch._limiter_lock: _return = SsdpSearch._statistics.copy()
+        return _return
+    #
+
     @staticmethod
     def _get_service_result_usn(service, condition_identifier):
         """
@@ -141,6 +367,28 @@ Returns the result UPnP USN based on the search condition.
                )
     #
 
+    @staticmethod
+    def _get_versioned_search_targets(upnp_class, identifier_instance):
+        """
+Returns the UPnP URN search targets matched by the given device or service
+including all lower versions.
+
+:param upnp_class: UPnP class ("device" or "service")
+:param identifier_instance: Instance providing the IdentifierMixin methods
+
+:return: (list) UPnP search targets
+:since:  v0.2.00
+        """
+
+        return [ "urn:{0}:{1}:{2}:{3:d}".format(identifier_instance.get_upnp_domain(),
+                                                upnp_class,
+                                                identifier_instance.get_type(),
+                                                version
+                                               )
+                 for version in range(1, 1 + int(identifier_instance.get_version()))
+               ]
+    #
+
     @staticmethod
     def _handle_device_search(condition, condition_identifier, uuid, device):
         """
@@ -151,7 +399,7 @@ Searches for hosted devices matching the given search condition.
 :param uuid: Managed UPnP device UUID
 :param device: Managed UPnP device
 
-:return: (list) Search results to be send
+:return: (list) Search result tuples of USN, location and ST to be send
 :since:  v0.2.00
         """
 
@@ -168,22 +416,22 @@ Searches for hosted devices matching the given search condition.
         elif (condition == "ssdp:all" or condition == "uuid:{0}".format(uuid)): device_matched = True
 
         if (device_matched):
-            _return.append({ "usn": SsdpSearch._get_device_result_usn(device, condition_identifier),
-                             "location": device.get_desc_url(),
-                             "search_target": SsdpSearch._get_result_search_target(condition, device)
-                           })
+            _return.append(( SsdpSearch._get_device_result_usn(device, condition_identifier),
+                             device.get_desc_url(),
+                             SsdpSearch._get_result_search_target(condition, device)
+                           ))
 
             if (condition == "ssdp:all"):
-                _return.append({ "usn": "uuid:{0}".format(device.get_udn()),
-                                 "location": device.get_desc_url(),
-                                 "search_target": "uuid:{0}".format(device.get_udn())
-                               })
+                _return.append(( "uuid:{0}".format(device.get_udn()),
+                                 device.get_desc_url(),
+                                 "uuid:{0}".format(device.get_udn())
+                               ))
 
                 if (ControlPoint.get_instance().is_rootdevice_known(uuid = uuid)):
-                    _return.append({ "usn": "uuid:{0}::upnp:rootdevice".format(device.get_udn()),
-                                     "location": device.get_desc_url(),
-                                     "search_target": "upnp:rootdevice"
-                                   })
+                    _return.append(( "uuid:{0}::upnp:rootdevice".format(device.get_udn()),
+                                     device.get_desc_url(),
+                                     "upnp:rootdevice"
+                                   ))
                 #
             #
         #
@@ -201,7 +449,7 @@ Searches for hosted devices matching the given search condition.
 :param service: Managed UPnP service
 :param device: Managed UPnP device
 
-:return: (list) Search results to be send
+:return: (list) Search result tuples of USN, location and ST to be send
 :since:  v0.2.00
         """
 
@@ -216,17 +464,17 @@ Searches for hosted devices matching the given search condition.
              ): service_matched = True
 
         if (service_matched):
-            _return.append({ "usn": SsdpSearch._get_service_result_usn(service, condition_identifier),
-                             "location": device.get_desc_url(),
-                             "search_target": SsdpSearch._get_result_search_target(condition, service)
-                           })
+            _return.append(( SsdpSearch._get_service_result_usn(service, condition_identifier),
+                             device.get_desc_url(),
+                             SsdpSearch._get_result_search_target(condition, service)
+                           ))
         #
 
         return _return
     #
 
     @staticmethod
-    def handle_request(source_data, source_wait_timeout, search_target, additional_data = None):
+    def handle_request(source_data, source_wait_timeout, search_target, additional_data = None, result_scheduler = None):
         """
 Searches for hosted devices matching the given UPnP search target.
 
@@ -234,115 +482,126 @@ Searches for hosted devices matching the given UPnP search target.
 :param source_wait_timeout: UPnP MX value
 :param search_target: UPnP search target
 :param additional_data: Additional data received
+:param result_scheduler: Callable receiving a search result event and the
+       seconds to wait before it should be sent. Events are scheduled with
+       the "EventDispatcher" if not given.
 
 :since: v0.2.00
         """
 
-        condition = None
-        condition_identifier = None
+        control_point = ControlPoint.get_instance()
+        results = None
 
-        if (search_target == "ssdp:all" or search_target == "upnp:rootdevice" or search_target.startswith("uuid:")): condition = search_target
-        elif (search_target.startswith("urn:")):
-            condition = search_target
-            condition_identifier = Device.get_identifier("uuid:00000000-0000-0000-0000-000000000000::{0}".format(search_target), None, None)
-        elif (len(search_target) > 41):
-            condition = search_target
-            condition_identifier = Device.get_identifier(search_target, None, None)
+        if (SsdpSearch._is_search_accepted(source_data, search_target)):
+            results = SsdpSearch._get_index(control_point).get(search_target)
+
+            if (results is None):
+                ( condition, condition_identifier ) = SsdpSearch._get_condition(search_target)
+                results = SsdpSearch._get_results(control_point, condition, condition_identifier)
+            #
         #
 
-        results = [ ]
+        if (results is not None and len(results) > 0):
+            if (additional_data is not None):
+                if ('USER-AGENT' in additional_data):
+                    client_settings = ClientSettings(additional_data['USER-AGENT'])
+                    source_wait_timeout = client_settings.get("ssdp_upnp_search_wait_timeout", source_wait_timeout)
+                elif (source_wait_timeout < 4):
+                    # Expect broken clients if no user-agent is given and MX is too small
+                    source_wait_timeout = 0
+            #
 
-        if (condition is not None):
-            control_point = ControlPoint.get_instance()
+            if (source_wait_timeout > 0):
+                wait_seconds = randfloat(0,
+                                         (source_wait_timeout if (source_wait_timeout < 10) else 10) / len(results)
+                                        )
+            else: wait_seconds = 0
 
-            if (condition_identifier is None
-                and condition == "upnp:rootdevice"
-               ): results += SsdpSearch._get_rootdevice_results(condition)
-            else:
-                managed_devices = control_point.get_managed_devices()
+            SsdpSearch._set_search_pending(source_data, search_target, time() + wait_seconds)
 
-                for uuid in managed_devices:
-                    device = managed_devices[uuid]
+            for result in results:
+                event = ControlPointEvent(ControlPointEvent.TYPE_SEARCH_RESULT, control_point = control_point)
+                event.set_usn(result[0])
+                event.set_location(result[1])
+                event.set_search_target(result[2])
 
-                    results += SsdpSearch._handle_device_search(condition,
-                                                                condition_identifier,
-                                                                uuid,
-                                                                device
-                                                               )
+                event.set_response_target(("[{0}]".format(source_data[0]) if (":" in source_data[0]) else source_data[0]),
+                                          source_data[1]
+                                         )
 
-                    if (condition == "ssdp:all"
-                        or (condition_identifier is not None and condition_identifier['class'] == "service")
-                       ):
-                        services = device.get_service_ids()
+                if (result_scheduler is None): event.schedule(wait_seconds)
+                else: result_scheduler(event, wait_seconds)
+            #
+        #
+    #
 
-                        for service_id in services:
-                            service = device.get_service(service_id)
+    @staticmethod
+    def _is_search_accepted(source_data, search_target):
+        """
+Returns true if the search request should be answered. Requests are
+rejected if identical ones of the same source are still pending or if the
+source exceeded its token bucket.
 
-                            results += SsdpSearch._handle_service_search(condition,
-                                                                         condition_identifier,
-                                                                         service,
-                                                                         device
-                                                                        )
-                        #
-                    #
+:param source_data: UPnP client address data
+:param search_target: UPnP search target
 
-                    embedded_devices = device.get_embedded_device_uuids()
+:return: (bool) True if accepted
+:since:  v0.2.00
+        """
 
-                    for embedded_uuid in embedded_devices:
-                        embedded_device = device.get_embedded_device(embedded_uuid)
+        _time = time()
 
-                        results += SsdpSearch._handle_device_search(condition,
-                                                                    condition_identifier,
-                                                                    embedded_uuid,
-                                                                    embedded_device
-                                                                   )
+        with SsdpSearch._limiter_lock:
+            SsdpSearch._statistics['received'] += 1
 
-                        if (condition_identifier is not None and condition_identifier['class'] == "service"):
-                            services = embedded_device.get_service_ids()
+            if (Settings.get("pas_upnp_ssdp_search_duplicates_merged", True)
+                and SsdpSearch._pending.get(( source_data[0], source_data[1], search_target ), 0) > _time
+               ):
+                SsdpSearch._statistics['merged'] += 1
+                _return = False
+            else:
+                rate = float(Settings.get("pas_upnp_ssdp_search_source_rate", 1))
+                _return = True
 
-                            for service_id in services:
-                                service = embedded_device.get_service(service_id)
+                if (rate > 0):
+                    burst = float(Settings.get("pas_upnp_ssdp_search_source_burst", 10))
+                    bucket = SsdpSearch._source_buckets.get(source_data[0])
 
-                                results += SsdpSearch._handle_service_search(condition,
-                                                                             condition_identifier,
-                                                                             service,
-                                                                             embedded_device
-                                                                            )
-                            #
-                        #
-                    #
+                    tokens = (burst if (bucket is None) else min(burst, bucket[0] + rate * (_time - bucket[1])))
+
+                    if (tokens < 1):
+                        SsdpSearch._statistics['dropped'] += 1
+                        _return = False
+                    else: tokens -= 1
+
+                    SsdpSearch._source_buckets.set(source_data[0], ( tokens, _time ))
                 #
             #
+        #
 
-            if (len(results) > 0):
-                if (additional_data is not None):
-                    if ('USER-AGENT' in additional_data):
-                        client_settings = ClientSettings(additional_data['USER-AGENT'])
-                        source_wait_timeout = client_settings.get("ssdp_upnp_search_wait_timeout", source_wait_timeout)
-                    elif (source_wait_timeout < 4):
-                        # Expect broken clients if no user-agent is given and MX is too small
-                        source_wait_timeout = 0
-                #
+        return _return
+    #
 
-                if (source_wait_timeout > 0):
-                    wait_seconds = randfloat(0,
-                                             (source_wait_timeout if (source_wait_timeout < 10) else 10) / len(results)
-                                            )
-                else: wait_seconds = 0
+    @staticmethod
+    def _set_search_pending(source_data, search_target, timestamp):
+        """
+Sets the UNIX timestamp the search results for the given source and ST are
+sent until.
 
-                for result in results:
-                    event = ControlPointEvent(ControlPointEvent.TYPE_SEARCH_RESULT, control_point = control_point)
-                    event.set_usn(result['usn'])
-                    event.set_location(result['location'])
-                    event.set_search_target(result['search_target'])
+:param source_data: UPnP client address data
+:param search_target: UPnP search target
+:param timestamp: UNIX timestamp
 
-                    event.set_response_target(("[{0}]".format(source_data[0]) if (":" in source_data[0]) else source_data[0]),
-                                              source_data[1]
-                                             )
+:since: v0.2.00
+        """
 
-                    event.schedule(wait_seconds)
-                #
+        with SsdpSearch._limiter_lock:
+            if (len(SsdpSearch._pending) >= 1024):
+                _time = time()
+                SsdpSearch._pending = dict(( key, value ) for ( key, value ) in SsdpSearch._pending.items() if (value > _time))
             #
+
+            SsdpSearch._pending[( source_data[0], source_data[1], search_target )] = timestamp
         #
     #
 #
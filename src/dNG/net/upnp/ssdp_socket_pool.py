@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+import socket
+
+from dNG.data.binary import Binary
+from dNG.net.udp_ne_ipv4_socket import UdpNeIpv4Socket
+from dNG.net.udp_ne_ipv6_socket import UdpNeIpv6Socket
+from dNG.runtime.thread_lock import ThreadLock
+
+class SsdpSocketPool(object):
+    """
+"SsdpSocketPool" provides process-wide UDP sockets to send SSDP messages.
+Sockets are bound and configured once for each combination of family,
+source port, interface and TTL or hops value. They are not connected and
+used with "sendto()" only, so that they can be shared between threads.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+    _sockets = { }
+    """
+Dict of pool keys with configured sockets
+    """
+
+    @staticmethod
+    def get_socket(family, source_port = 0, ipv4_broadcast_interface = None, ipv4_udp_ttl = 2, ipv6_udp_hops = 2):
+        """
+Returns a configured UDP socket for the given parameters.
+
+:param family: Socket family
+:param source_port: Source port to bind to; 0 for any
+:param ipv4_broadcast_interface: IPv4 interface to bind to; None for all
+:param ipv4_udp_ttl: IPv4 TTL for SSDP messages
+:param ipv6_udp_hops: IPv6 hops for SSDP messages
+
+:return: (object) UDP socket
+:since:  v0.2.00
+        """
+
+        key = (( socket.AF_INET, source_port, ipv4_broadcast_interface, ipv4_udp_ttl )
+               if (family == socket.AF_INET) else
+               ( socket.AF_INET6, source_port, None, ipv6_udp_hops )
+              )
+
+        _return = SsdpSocketPool._sockets.get(key)
+
+        if (_return is None):
+            with SsdpSocketPool._lock:
+                _return = SsdpSocketPool._sockets.get(key)
+
+                if (_return is None):
+                    _return = (SsdpSocketPool._get_ipv4_socket(source_port, ipv4_broadcast_interface, ipv4_udp_ttl)
+                               if (family == socket.AF_INET) else
+                               SsdpSocketPool._get_ipv6_socket(source_port, ipv6_udp_hops)
+                              )
+
+                    SsdpSocketPool._sockets[key] = _return
+                #
+            #
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def _get_ipv4_socket(source_port, ipv4_broadcast_interface, ipv4_udp_ttl):
+        """
+Returns a new configured IPv4 UDP socket.
+
+:param source_port: Source port to bind to; 0 for any
+:param ipv4_broadcast_interface: IPv4 interface to bind to; None for all
+:param ipv4_udp_ttl: IPv4 TTL for SSDP messages
+
+:return: (object) UDP socket
+:since:  v0.2.00
+        """
+
+        _return = UdpNeIpv4Socket()
+        _return.bind(( "", source_port ))
+        if (hasattr(socket, "IP_MULTICAST_LOOP")): _return.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 0)
+        if (hasattr(socket, "IP_MULTICAST_TTL")): _return.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ipv4_udp_ttl)
+
+        if (ipv4_broadcast_interface is not None
+            and hasattr(socket, "SO_BINDTODEVICE")
+           ): _return.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, Binary.bytes(ipv4_broadcast_interface))
+
+        return _return
+    #
+
+    @staticmethod
+    def _get_ipv6_socket(source_port, ipv6_udp_hops):
+        """
+Returns a new configured IPv6 UDP socket.
+
+:param source_port: Source port to bind to; 0 for any
+:param ipv6_udp_hops: IPv6 hops for SSDP messages
+
+:return: (object) UDP socket
+:since:  v0.2.00
+        """
+
+        _return = UdpNeIpv6Socket()
+        _return.bind(( "::", source_port ))
+
+        if (hasattr(socket, "IPPROTO_IPV6")):
+            if (hasattr(socket, "IPV6_MULTICAST_LOOP")): _return.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_LOOP, 0)
+            if (hasattr(socket, "IPV6_MULTICAST_HOPS")): _return.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS, ipv6_udp_hops)
+        #
+
+        return _return
+    #
+#
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+class TaskHeap(object):
+    """
+"TaskHeap" is a priority queue of timed tasks. Tasks are indexed by key and
+type to cancel them without scanning the queue. Cancelled entries are
+removed lazily.
+
+Callers are responsible for thread safety.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(TaskHeap)
+
+:since: v0.2.00
+        """
+
+        self.entries = [ ]
+        """
+Heap of task entries
+        """
+        self.entries_cancelled = 0
+        """
+Number of cancelled entries still in the heap
+        """
+        self.index = { }
+        """
+Dict of keys with a dict of task types and its task entries as value
+        """
+        self.sequence = count()
+        """
+Sequence counter to keep the insertion order for equal timestamps
+        """
+    #
+
+    def __len__(self):
+        """
+python.org: Called to implement the built-in function len().
+
+:return: (int) Number of active tasks
+:since:  v0.2.00
+        """
+
+        return len(self.entries) - self.entries_cancelled
+    #
+
+    def add(self, timestamp, _type, task, key = None):
+        """
+Adds the given task.
+
+:param timestamp: UNIX timestamp the task should be run at
+:param _type: Task type
+:param task: Task data
+:param key: Key to index the task with (e.g. an UPnP USN)
+
+:return: (bool) True if the task is the next one to be run
+:since:  v0.2.00
+        """
+
+        entry = [ timestamp, next(self.sequence), task, key, _type ]
+        heappush(self.entries, entry)
+
+        if (key is not None):
+            if (key not in self.index): self.index[key] = { }
+
+            if (_type in self.index[key]): self.index[key][_type].append(entry)
+            else: self.index[key][_type] = [ entry ]
+        #
+
+        self._discard_cancelled_head()
+        return (self.entries[0] is entry)
+    #
+
+    def clear(self):
+        """
+Removes all tasks.
+
+:since: v0.2.00
+        """
+
+        self.entries = [ ]
+        self.entries_cancelled = 0
+        self.index = { }
+    #
+
+    def _compact(self):
+        """
+Rebuilds the heap without cancelled entries.
+
+:since: v0.2.00
+        """
+
+        self.entries = [ entry for entry in self.entries if (entry[2] is not None) ]
+        heapify(self.entries)
+
+        self.entries_cancelled = 0
+    #
+
+    def _discard_cancelled_head(self):
+        """
+Removes cancelled entries from the head of the heap.
+
+:since: v0.2.00
+        """
+
+        while (len(self.entries) > 0 and self.entries[0][2] is None):
+            heappop(self.entries)
+            self.entries_cancelled -= 1
+        #
+    #
+
+    def get_next_timestamp(self):
+        """
+Returns the UNIX timestamp of the next task to be run.
+
+:return: (float) UNIX timestamp; -1 if no task is queued
+:since:  v0.2.00
+        """
+
+        self._discard_cancelled_head()
+        return (self.entries[0][0] if (len(self.entries) > 0) else -1)
+    #
+
+    def get_tasks(self, _type):
+        """
+Returns all queued tasks of the given type.
+
+:param _type: Task type
+
+:return: (list) List of tuples with the UNIX timestamp and task data
+:since:  v0.2.00
+        """
+
+        return [ ( entry[0], entry[2] ) for entry in self.entries if (entry[2] is not None and entry[4] == _type) ]
+    #
+
+    def pop(self, timestamp):
+        """
+Removes and returns the next task if it is due at the given timestamp.
+
+:param timestamp: Current UNIX timestamp
+
+:return: (object) Task data; None if no task is due
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        self._discard_cancelled_head()
+
+        if (len(self.entries) > 0 and self.entries[0][0] <= timestamp):
+            entry = heappop(self.entries)
+            _return = entry[2]
+
+            self._unindex(entry)
+        #
+
+        return _return
+    #
+
+    def remove(self, key, _type = None):
+        """
+Cancels all tasks indexed by the given key and optionally task type.
+
+:param key: Key the task is indexed with
+:param _type: Task type to be cancelled; None for all
+
+:return: (int) Number of tasks cancelled
+:since:  v0.2.00
+        """
+
+        _return = 0
+
+        if (key in self.index):
+            types = self.index[key]
+            types_removed = (list(types.keys()) if (_type is None) else ([ _type ] if (_type in types) else [ ]))
+
+            for type_removed in types_removed:
+                for entry in types[type_removed]:
+                    entry[2] = None
+                    _return += 1
+                #
+
+                del(types[type_removed])
+            #
+
+            if (len(types) < 1): del(self.index[key])
+        #
+
+        if (_return > 0):
+            self.entries_cancelled += _return
+
+            if (self.entries_cancelled > 64 and self.entries_cancelled > (len(self.entries) / 2)): self._compact()
+            else: self._discard_cancelled_head()
+        #
+
+        return _return
+    #
+
+    def _unindex(self, entry):
+        """
+Removes the given entry from the key and type index.
+
+:param entry: Heap entry
+
+:since: v0.2.00
+        """
+
+        key = entry[3]
+        _type = entry[4]
+
+        if (key in self.index and _type in self.index[key]):
+            entries = self.index[key][_type]
+
+            for position in range(len(entries) - 1, -1, -1):
+                if (entries[position] is entry):
+                    entries.pop(position)
+                    break
+                #
+            #
+
+            if (len(entries) < 1):
+                del(self.index[key][_type])
+                if (len(self.index[key]) < 1): del(self.index[key])
+            #
+        #
+    #
+#
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;upnp
+
+The following license agreement remains valid unless any additions or
+changes are being made by direct Netware Group in a written form.
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 2 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;gpl
+----------------------------------------------------------------------------
+#echo(pasUPnPVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from math import ceil
+
+class TimingWheel(object):
+    """
+"TimingWheel" is a hashed timing wheel of timed items. Items are added to
+the slot of the tick they are due in and carry the number of remaining
+wheel rotations. Items are indexed by key to cancel them without scanning
+the wheel.
+
+Callers are responsible for thread safety.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: upnp
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;gpl
+             GNU General Public License 2
+    """
+
+    def __init__(self, tick = 0.05, slots_count = 512):
+        """
+Constructor __init__(TimingWheel)
+
+:param tick: Seconds between two slots
+:param slots_count: Number of slots
+
+:since: v0.2.00
+        """
+
+        self.index = { }
+        """
+Dict of keys with a list of wheel entries as value
+        """
+        self.position = 0
+        """
+Slot position reached last
+        """
+        self.size = 0
+        """
+Number of items in the wheel
+        """
+        self.slots = [ [ ] for _ in range(0, slots_count) ]
+        """
+List of slots with a list of wheel entries
+        """
+        self.tick = (tick if (tick > 0) else 0.05)
+        """
+Seconds between two slots
+        """
+        self.timestamp = 0
+        """
+UNIX timestamp of the slot position reached last
+        """
+    #
+
+    def __len__(self):
+        """
+python.org: Called to implement the built-in function len().
+
+:return: (int) Number of items in the wheel
+:since:  v0.2.00
+        """
+
+        return self.size
+    #
+
+    def add(self, timestamp, item, key = None):
+        """
+Adds an item to the wheel.
+
+:param timestamp: UNIX timestamp the item is due at
+:param item: Item
+:param key: Key to cancel the item later on
+
+:since: v0.2.00
+        """
+
+        slots_count = len(self.slots)
+        ticks = max(1, int(ceil((timestamp - self.timestamp) / self.tick)))
+
+        entry = [ (ticks - 1) // slots_count, item, key ]
+        self.slots[(self.position + ticks) % slots_count].append(entry)
+        self.size += 1
+
+        if (key is not None):
+            if (key not in self.index): self.index[key] = [ ]
+            self.index[key].append(entry)
+        #
+    #
+
+    def advance(self, timestamp):
+        """
+Advances the wheel up to the given UNIX timestamp.
+
+:param timestamp: UNIX timestamp
+
+:return: (list) Items due
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        slots_count = len(self.slots)
+
+        while (self.timestamp + self.tick <= timestamp):
+            self.position = (1 + self.position) % slots_count
+            self.timestamp += self.tick
+
+            entries = self.slots[self.position]
+
+            if (len(entries) > 0):
+                entries_pending = [ ]
+
+                for entry in entries:
+                    if (entry[1] is None): continue
+
+                    if (entry[0] > 0):
+                        entry[0] -= 1
+                        entries_pending.append(entry)
+                    else:
+                        _return.append(entry[1])
+                        self._unindex(entry)
+                        self.size -= 1
+                    #
+                #
+
+                self.slots[self.position] = entries_pending
+            #
+
+            if (self.size < 1):
+                self.timestamp = timestamp
+                break
+            #
+        #
+
+        return _return
+    #
+
+    def remove(self, key):
+        """
+Cancels all items of the given key.
+
+:param key: Key
+
+:return: (int) Number of items cancelled
+:since:  v0.2.00
+        """
+
+        entries = self.index.pop(key, [ ])
+
+        for entry in entries: entry[1] = None
+        self.size -= len(entries)
+
+        return len(entries)
+    #
+
+    def reset(self, timestamp):
+        """
+Sets the UNIX timestamp of the current slot position. It should only be
+called if the wheel is empty.
+
+:param timestamp: UNIX timestamp
+
+:since: v0.2.00
+        """
+
+        self.timestamp = timestamp
+    #
+
+    def _unindex(self, entry):
+        """
+Removes the given wheel entry from the key index.
+
+:param entry: Wheel entry
+
+:since: v0.2.00
+        """
+
+        key = entry[2]
+
+        if (key in self.index):
+            entries = self.index[key]
+
+            for position in range(len(entries) - 1, -1, -1):
+                if (entries[position] is entry): del(entries[position])
+            #
+
+            if (len(entries) < 1): del(self.index[key])
+        #
+    #
+#
@@ -45,6 +45,7 @@ from dNG.data.http.virtual_config import VirtualConfig
 from dNG.data.logging.log_line import LogLine
 from dNG.data.upnp.client_settings import ClientSettings
 from dNG.net.upnp.control_point import ControlPoint
+from dNG.net.upnp.resolver_cache import ResolverCache
 from dNG.plugins.hook import Hook
 from dNG.runtime.value_exception import ValueException
 
@@ -68,7 +69,7 @@ Handles a UPnP device related HTTP request.
 
     if (client_host is None): is_allowed = True
     else:
-        ip_address_list = socket.getaddrinfo(client_host, request.get_client_port(), socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
+        ip_address_list = ResolverCache.get_addrinfo(client_host, request.get_client_port(), socket.AF_UNSPEC, 0, socket.IPPROTO_TCP)
         is_allowed = (False if (len(ip_address_list) < 1) else control_point.is_ip_allowed(ip_address_list[0][4][0]))
     #
 